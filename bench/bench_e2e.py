@@ -0,0 +1,182 @@
+"""
+Benchmark ujung-ke-ujung login -> dashboard terhadap portal tiruan lokal.
+
+Setiap iterasi:
+1. Mengukur tahap terpisah lewat modul src/ (fetch, parse, DataFrame, analitik, pencocokan).
+2. Menjalankan display_login_form lalu display_main_app lewat streamlit AppTest
+   (login lengkap sampai dashboard tampil) dan mencatat waktu render.
+
+Sebelum iterasi, Overview dirender sekali untuk mahasiswa tanpa MK terkunci
+(tab grid kosong berkolom sama) dan benchmark gagal jika dashboard error.
+
+    python bench/bench_e2e.py --iterasi 20 --latensi 0.05 --baris 60 --json hasil.json
+"""
+
+__author__ = "irr"
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from portal_palsu import jalankan_server
+
+
+def persentil(nilai, p):
+    nilai = sorted(nilai)
+    if len(nilai) == 1:
+        return nilai[0]
+    return statistics.quantiles(nilai, n=100, method="inclusive")[p - 1]
+
+
+def ukur_tahap(base_url, kurikulum_df, kbk_df):
+    """Satu putaran pipeline tanpa Streamlit, dipecah per tahap (detik)."""
+    from portal import buat_session, ambil_data_keamanan, ambil_halaman_paralel
+    from transkrip import ekstrak_baris_html, bangun_dataframe
+    from analitik import hitung_analitik, smart_find_taken_courses
+    from normalisasi import KOLOM_KUNCI
+
+    waktu = {}
+    session = buat_session()
+
+    mulai = time.perf_counter()
+    ambil_data_keamanan(session, base_url)
+    session.post(base_url + "login.php", data={"mode": "login"})
+    halaman, _ = ambil_halaman_paralel(session, {
+        "transkrip": base_url + "modul/mhs/akademik-transkrip.php",
+        "biodata": base_url + "modul/mhs/biodata.php",
+    })
+    waktu["fetch"] = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    _, header, baris = ekstrak_baris_html(halaman["transkrip"].text)
+    waktu["parse"] = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    df = bangun_dataframe(header, baris)
+    analitik = hitung_analitik(df)
+    waktu["dataframe"] = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    unique_mk_list = analitik["unique_graded"][KOLOM_KUNCI].tolist()
+    semua_mk_list = analitik["transkrip"][KOLOM_KUNCI].tolist()
+    for kurikulum in (kurikulum_df, kbk_df):
+        smart_find_taken_courses(kurikulum, unique_mk_list)
+        smart_find_taken_courses(kurikulum, semua_mk_list)
+    waktu["matching"] = time.perf_counter() - mulai
+    return waktu
+
+
+def tunggu_transkrip(at, timeout=60, interval=0.02):
+    """Rerun AppTest sampai pemuatan transkrip di latar (latar.mulai_muat) selesai."""
+    batas = time.perf_counter() + timeout
+    while "muat" in at.session_state and not at.exception:
+        if time.perf_counter() > batas:
+            raise RuntimeError("Pemuatan transkrip di latar tidak selesai")
+        time.sleep(interval)
+        at.run()
+
+
+def ukur_aplikasi(timeout=60):
+    """Login lewat form lalu render dashboard Overview dengan AppTest (detik)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "src" / "nilai.py"), default_timeout=timeout)
+
+    mulai = time.perf_counter()
+    at.run()
+    waktu_form = time.perf_counter() - mulai
+
+    at.text_input[0].input("081911333001")
+    at.text_input[1].input("rahasia")
+    at.text_input[2].input("abcd")
+    mulai = time.perf_counter()
+    at.button[0].click().run()  # tombol "Masuk" (form submit)
+    waktu_shell = time.perf_counter() - mulai
+    tunggu_transkrip(at, timeout)
+    waktu_login = time.perf_counter() - mulai
+
+    if at.exception or not at.session_state["logged_in"]:
+        raise RuntimeError(f"Login ke portal tiruan gagal: {at.exception or at.error}")
+
+    # Rerun kedua mengukur render dashboard dengan analitik yang sudah ada di sesi
+    mulai = time.perf_counter()
+    at.run()
+    waktu_render = time.perf_counter() - mulai
+    if at.exception:
+        raise RuntimeError(f"Render dashboard gagal: {at.exception[0].value}")
+    return {
+        "form_login": waktu_form, "login_ke_kerangka": waktu_shell,
+        "login_ke_dashboard": waktu_login, "render": waktu_render,
+    }
+
+
+def periksa_tanpa_terkunci(timeout=60):
+    """
+    Overview untuk transkrip 60 baris (seed 1) yang tidak punya MK terkunci:
+    dua tab "Terkunci prasyarat (0)" berisi grid kosong dengan kolom yang sama.
+    """
+    from streamlit.testing.v1 import AppTest
+    from generator import buat_transkrip
+
+    at = AppTest.from_file(str(ROOT / "src" / "nilai.py"), default_timeout=timeout)
+    at.session_state["logged_in"] = True
+    at.session_state["df"] = buat_transkrip(60, seed=1)
+    at.session_state["user_info"] = {"Nama Lengkap": "Mahasiswa Uji", "NIM": "081911333001"}
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"Overview tanpa MK terkunci gagal: {at.exception[0].value}")
+    kosong = [t.label for t in at.tabs if t.label == "Terkunci prasyarat (0)"]
+    if len(kosong) < 2:
+        raise RuntimeError(f"Transkrip uji masih punya MK terkunci: {[t.label for t in at.tabs]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login -> dashboard")
+    parser.add_argument("--iterasi", type=int, default=10)
+    parser.add_argument("--latensi", type=float, default=0.05, help="latensi portal tiruan per request (detik)")
+    parser.add_argument("--baris", type=int, default=60, help="jumlah baris transkrip")
+    parser.add_argument("--rekaman", help="file HTML transkrip rekaman")
+    parser.add_argument("--json", help="simpan hasil mentah ke file JSON")
+    args = parser.parse_args()
+
+    server, base_url, statistik = jalankan_server(latensi=args.latensi, baris=args.baris, rekaman=args.rekaman)
+    # Harus diset sebelum modul portal diimpor oleh aplikasi
+    os.environ["PORTAL_BASE_URL"] = base_url
+    os.chdir(ROOT)  # aplikasi membaca data/*.xlsx relatif terhadap direktori kerja
+
+    from kurikulum import muat_kurikulum
+    kurikulum_df, kbk_df = muat_kurikulum()
+
+    periksa_tanpa_terkunci()
+
+    hasil = []
+    for i in range(args.iterasi):
+        waktu = ukur_tahap(base_url, kurikulum_df, kbk_df)
+        waktu.update(ukur_aplikasi())
+        waktu["total"] = waktu["form_login"] + waktu["login_ke_dashboard"] + waktu["render"]
+        hasil.append(waktu)
+        print(f"iterasi {i + 1}/{args.iterasi}: total {waktu['total'] * 1000:.0f} ms", file=sys.stderr)
+    server.shutdown()
+
+    print(f"\nPortal tiruan: latensi {args.latensi * 1000:.0f} ms, {args.baris} baris, "
+          f"{statistik['request']} request\n")
+    print(f"{'tahap':<22}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for tahap in hasil[0]:
+        nilai = [h[tahap] for h in hasil]
+        print(f"{tahap:<22}{persentil(nilai, 50) * 1000:>12.1f}{persentil(nilai, 95) * 1000:>12.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"argumen": vars(args), "iterasi": hasil}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
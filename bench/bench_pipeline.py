@@ -0,0 +1,166 @@
+"""
+Benchmark per tahap pipeline dashboard di atas transkrip sintetis.
+
+Tahap: dedup retake, ips_df, analitik penuh, smart_find_taken_courses,
+basis skenario simulasi, IPK simulasi dari suntingan, dan pembuatan grafik.
+Hasil dibandingkan dengan bench/hasil/pipeline.json (baseline yang ikut
+di-commit) sehingga regresi terlihat saat review; --simpan menulis ulang baseline. Baseline menyimpan
+identitas mesinnya, dan perbandingan dilewati di mesin lain.
+
+    python bench/bench_pipeline.py                    # bandingkan dengan baseline
+    python bench/bench_pipeline.py --ukuran 40,400 --simpan
+"""
+
+__author__ = "irr"
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from analitik import (
+    ambil_nilai_terbaik,
+    agregasi_ips,
+    lengkapi_ips,
+    hitung_analitik,
+    smart_find_taken_courses,
+)
+from grafik import create_donut_chart, grafik_distribusi_nilai, grafik_ips
+from generator import buat_transkrip, buat_kohort, muat_kurikulum
+from normalisasi import KOLOM_KUNCI, kunci_kolom
+from skenario import basis_skenario, delta_dari_suntingan, ipk_skenario
+
+BASELINE = ROOT / "bench" / "hasil" / "pipeline.json"
+BATAS_REGRESI = 1.25  # lebih lambat 25% dari baseline dianggap regresi
+MIN_SELISIH = 0.0005  # ... dan minimal 0,5 ms; tahap sub-milidetik didominasi derau
+
+
+def ukur(fungsi, min_detik=0.2, min_ulang=3, max_ulang=200):
+    """Median dan minimum durasi (detik) dari beberapa pengulangan, setelah satu putaran pemanasan."""
+    fungsi()
+    durasi = []
+    mulai_total = time.perf_counter()
+    while len(durasi) < min_ulang or (time.perf_counter() - mulai_total < min_detik and len(durasi) < max_ulang):
+        mulai = time.perf_counter()
+        fungsi()
+        durasi.append(time.perf_counter() - mulai)
+    return {"median": statistics.median(durasi), "min": min(durasi), "ulang": len(durasi)}
+
+
+def tahap_pipeline(df, kurikulum_df, kbk_df):
+    """Daftar (nama tahap, fungsi tanpa argumen) untuk satu transkrip."""
+    analitik = hitung_analitik(df)
+    df_graded = analitik["graded"]
+    unique_mk_list = analitik["unique_graded"][KOLOM_KUNCI].tolist()
+    df_simulasi = pd.concat([analitik["unique_graded"], analitik["ongoing"]], ignore_index=True).drop(
+        columns=["Bobot_numeric"]
+    )
+    # Seperti grid simulasi di nilai.py: basis sekali per transkrip, lalu IPK per rerun dari suntingan
+    basis = basis_skenario(df_simulasi)
+    suntingan = {pos: {"Nilai": "A"} for pos in range(0, len(df_simulasi), max(1, len(df_simulasi) // 5))}
+
+    def grafik():
+        for fig in (grafik_distribusi_nilai(analitik["unique_graded"]["Nilai"]), grafik_ips(analitik["ips"])):
+            plt.close(fig)
+        create_donut_chart(3.21, "IPK")
+
+    return [
+        ("dedup_retake", lambda: ambil_nilai_terbaik(df_graded)),
+        ("ips_df", lambda: lengkapi_ips(agregasi_ips(df_graded))),
+        ("analitik_penuh", lambda: hitung_analitik(df)),
+        ("smart_find_wajib", lambda: smart_find_taken_courses(kurikulum_df, unique_mk_list)),
+        ("smart_find_kbk", lambda: smart_find_taken_courses(kbk_df, unique_mk_list)),
+        ("basis_skenario", lambda: basis_skenario(df_simulasi)),
+        ("simulasi_ipk", lambda: ipk_skenario(basis, delta_dari_suntingan(basis, suntingan))),
+        ("grafik", grafik),
+    ]
+
+
+def jalankan(ukuran, n_kohort):
+    kurikulum_df, kbk_df = muat_kurikulum()
+    for df in (kurikulum_df, kbk_df):  # seperti kurikulum.muat_program: kunci dihitung sekali saat dimuat
+        df[KOLOM_KUNCI] = kunci_kolom(df["Mata Kuliah"])
+    hasil = {}
+    for n in ukuran:
+        df = buat_transkrip(n_baris=n, seed=n, kurikulum=(kurikulum_df, kbk_df))
+        for nama, fungsi in tahap_pipeline(df, kurikulum_df, kbk_df):
+            hasil[f"{nama}[{n}]"] = ukur(fungsi)
+            print(f"{nama}[{n}]".ljust(28), f"{hasil[f'{nama}[{n}]']['median'] * 1000:10.3f} ms", file=sys.stderr)
+
+    if n_kohort:
+        hasil[f"generator_kohort[{n_kohort}]"] = ukur(
+            lambda: buat_kohort(n_kohort, kurikulum=(kurikulum_df, kbk_df)), min_ulang=1, min_detik=0, max_ulang=1
+        )
+    return hasil
+
+
+def mesin():
+    """Identitas mesin yang disimpan bersama baseline."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "prosesor": platform.processor() or platform.machine(),
+        "cpu": os.cpu_count(),
+    }
+
+
+def bandingkan(hasil, baseline):
+    """Membandingkan durasi minimum (paling tahan derau) dengan baseline."""
+    print(f"\n{'tahap':<28}{'min (ms)':>14}{'baseline (ms)':>16}{'rasio':>8}")
+    regresi = []
+    for nama, h in hasil.items():
+        b = baseline.get(nama)
+        if b is None:
+            print(f"{nama:<28}{h['min'] * 1000:>14.3f}{'-':>16}{'-':>8}")
+            continue
+        rasio = h["min"] / b["min"] if b["min"] else float("inf")
+        tanda = "  REGRESI" if rasio > BATAS_REGRESI and h["min"] - b["min"] > MIN_SELISIH else ""
+        print(f"{nama:<28}{h['min'] * 1000:>14.3f}{b['min'] * 1000:>16.3f}{rasio:>8.2f}{tanda}")
+        if tanda:
+            regresi.append(nama)
+    return regresi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tahap pipeline dashboard")
+    parser.add_argument("--ukuran", default="40,200,1000", help="jumlah baris transkrip, dipisah koma")
+    parser.add_argument("--kohort", type=int, default=0, help="ukur juga generator kohort N mahasiswa")
+    parser.add_argument("--simpan", action="store_true", help="tulis hasil sebagai baseline baru")
+    args = parser.parse_args()
+
+    hasil = jalankan([int(n) for n in args.ukuran.split(",")], args.kohort)
+
+    simpanan = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    baseline = simpanan.get("hasil", {})
+    if baseline and simpanan.get("mesin") != mesin():
+        print(f"\nBaseline dibuat di mesin lain ({simpanan.get('mesin')}); perbandingan dilewati.")
+        baseline = {}
+    regresi = bandingkan(hasil, baseline)
+
+    if args.simpan:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps({
+            "mesin": mesin(),
+            "hasil": hasil,
+        }, indent=2) + "\n")
+        print(f"\nBaseline disimpan ke {BASELINE.relative_to(ROOT)}")
+    elif regresi:
+        sys.exit(f"\n{len(regresi)} tahap lebih lambat dari baseline: {', '.join(regresi)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Generator transkrip dan kurikulum sintetis ala UNAIR untuk benchmark.
+
+- Semester "YYYY/YYYY+1 Ganjil|Genap", semester terakhir berstatus *BT.
+- Nilai E / D diulang di semester berikutnya (retake).
+- Nama mata kuliah di transkrip diberi derau: angka romawi <-> arab,
+  huruf besar/kecil, spasi ganda, singkatan ("Prak.", "Lab.") dan salah ketik.
+- Skala dari satu transkrip 40 baris sampai kohort 10k mahasiswa.
+
+    from generator import buat_transkrip, buat_kohort
+    df = buat_transkrip(n_baris=40, seed=1)
+    kohort = buat_kohort(10_000, seed=1)  # satu DataFrame panjang dengan kolom NIM
+"""
+
+__author__ = "irr"
+
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+
+NILAI = ["A", "AB", "B", "BC", "C", "D", "E"]
+BOBOT = np.array([4.0, 3.5, 3.0, 2.5, 2.0, 1.0, 0.0])
+PELUANG_NILAI = np.array([0.30, 0.22, 0.20, 0.12, 0.09, 0.04, 0.03])
+
+KOLOM_TRANSKRIP = ["Semester", "Kode MA", "Nama Mata Ajar", "SKS", "Nilai", "Bobot"]
+
+ROMAWI = {"I": "1", "II": "2", "III": "3", "IV": "4"}
+SINGKATAN = {"Praktikum": "Prak.", "Laboratorium": "Lab.", "Matematika": "Mat.", "Pengantar": "Peng."}
+
+_TOPIK = ["Fisika", "Kimia", "Biologi", "Matematika", "Statistika", "Elektronika", "Komputasi", "Optika"]
+_SUB = ["Dasar", "Lanjut", "Modern", "Terapan", "Material", "Medis", "Instrumentasi", "Praktikum"]
+
+
+def muat_kurikulum():
+    """Kurikulum Fisika asli dari folder data/ sebagai (wajib_df, kbk_df)."""
+    return pd.read_excel(ROOT / "data" / "mk wajib.xlsx"), pd.read_excel(ROOT / "data" / "mk kbk.xlsx")
+
+
+def buat_kurikulum(n_wajib=54, n_kbk=27, seed=0):
+    """Kurikulum sintetis berformat sama dengan workbook (Semester, Kode, Mata Kuliah, SKS, Prasyarat)."""
+    rng = random.Random(seed)
+    baris = []
+    nama_terpakai = set()
+    for i in range(n_wajib + n_kbk):
+        while True:
+            nama = f"{rng.choice(_TOPIK)} {rng.choice(_SUB)} {rng.choice(list(ROMAWI))}"
+            if nama not in nama_terpakai:
+                break
+            nama = f"{nama} {rng.choice(_SUB)}"
+            if nama not in nama_terpakai:
+                break
+        nama_terpakai.add(nama)
+        prasyarat = rng.sample([b[2] for b in baris], k=min(len(baris), rng.randint(0, 2))) if i > 9 else []
+        baris.append([
+            "Ganjil" if i % 2 == 0 else "Genap",
+            f"SIM{i:03d}",
+            nama,
+            rng.choice([2, 2, 3, 3, 4]),
+            ", ".join(prasyarat) or "-",
+        ])
+    df = pd.DataFrame(baris, columns=["Semester", "Kode", "Mata Kuliah", "SKS", "Prasyarat"])
+    return df.iloc[:n_wajib].reset_index(drop=True), df.iloc[n_wajib:].reset_index(drop=True)
+
+
+def beri_derau(nama, rng, peluang=0.3):
+    """Varian nama seperti yang muncul di transkrip portal."""
+    if rng.random() >= peluang:
+        return nama
+    kata = nama.split()
+    pilihan = rng.randrange(5)
+    if pilihan == 0:  # romawi -> arab
+        kata = [ROMAWI.get(k, k) for k in kata]
+    elif pilihan == 1:  # singkatan
+        kata = [SINGKATAN.get(k, k) for k in kata]
+    elif pilihan == 2:  # spasi ganda
+        return "  ".join(kata)
+    elif pilihan == 3:  # huruf besar semua
+        return nama.upper()
+    else:  # salah ketik: tukar dua huruf
+        if len(nama) > 4:
+            i = rng.randrange(1, len(nama) - 2)
+            return nama[:i] + nama[i + 1] + nama[i] + nama[i + 2:]
+    return " ".join(kata)
+
+
+def buat_transkrip(n_baris=60, seed=0, kurikulum=None, tahun_masuk=2021, per_semester=8, derau=0.3, ongoing=True):
+    """
+    Satu transkrip dengan format st.session_state.df.
+    Baris diambil berurutan dari kurikulum (wajib lalu KBK) dan diulang jika habis.
+    """
+    rng = random.Random(seed)
+    wajib, kbk = kurikulum if kurikulum is not None else muat_kurikulum()
+    mk = pd.concat([wajib, kbk])[["Kode", "Mata Kuliah", "SKS"]].values.tolist()
+    nilai_acak = np.random.default_rng(seed).choice(len(NILAI), size=n_baris, p=PELUANG_NILAI)
+
+    baris, ulang = [], []
+    s, urut = 0, 0
+    while len(baris) < n_baris:
+        tahun = tahun_masuk + s // 2
+        semester = f"{tahun}/{tahun + 1} {'Ganjil' if s % 2 == 0 else 'Genap'}"
+        terakhir = ongoing and len(baris) + per_semester >= n_baris
+        antrean, ulang = ulang, []
+        while len(antrean) < per_semester:
+            antrean.append(mk[urut % len(mk)])
+            urut += 1
+        for kode, nama, sks in antrean[:per_semester]:
+            if len(baris) >= n_baris:
+                break
+            if terakhir:
+                nilai, bobot = "*BT", "*BT"
+            else:
+                idx = nilai_acak[len(baris)]
+                nilai, bobot = NILAI[idx], sks * BOBOT[idx]
+                if nilai in ("E", "D"):
+                    ulang.append((kode, nama, sks))
+            baris.append([semester, kode, beri_derau(nama, rng, derau), sks, nilai, bobot])
+        s += 1
+
+    return pd.DataFrame(baris, columns=KOLOM_TRANSKRIP)
+
+
+def buat_kohort(n_mahasiswa=1000, seed=0, kurikulum=None, baris_min=40, baris_max=80, angkatan=(2019, 2020, 2021, 2022)):
+    """
+    Kohort dalam satu DataFrame panjang: kolom transkrip + NIM.
+    NIM disusun dari angkatan sehingga bisa dipartisi per tahun masuk.
+    """
+    rng = random.Random(seed)
+    kurikulum = kurikulum if kurikulum is not None else muat_kurikulum()
+    bagian = []
+    for i in range(n_mahasiswa):
+        tahun = rng.choice(angkatan)
+        df = buat_transkrip(
+            n_baris=rng.randint(baris_min, baris_max),
+            seed=seed * 1_000_003 + i,
+            kurikulum=kurikulum,
+            tahun_masuk=tahun,
+        )
+        df.insert(0, "NIM", f"08{tahun % 100:02d}11333{i:05d}")
+        bagian.append(df)
+    return pd.concat(bagian, ignore_index=True)
+
+
+def simpan_kohort(kohort, folder):
+    """Menulis satu file xlsx per mahasiswa (format yang sama dengan transkrip hasil login)."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for nim, df in kohort.groupby("NIM"):
+        df.drop(columns="NIM").to_excel(folder / f"{nim}.xlsx", index=False)
@@ -0,0 +1,159 @@
+"""
+Server tiruan portal mahasiswa.unair.ac.id untuk pengukuran lokal.
+
+Menyajikan halaman login (CSRF token + captcha), gambar captcha, POST login,
+halaman transkrip dan biodata dengan latensi dan jumlah baris yang bisa diatur.
+
+    python bench/portal_palsu.py --port 8765 --latensi 0.15 --baris 60
+    PORTAL_BASE_URL=http://127.0.0.1:8765/ streamlit run src/nilai.py
+"""
+
+__author__ = "irr"
+
+import argparse
+import base64
+import gzip
+import html
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+from generator import buat_transkrip
+
+# PNG 1x1 piksel, cukup agar st.image mau menampilkan captcha
+CAPTCHA_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+def baris_transkrip_sintetis(n_baris=60, seed=0, tahun_masuk=2021):
+    """Baris tabel transkrip (teks) dari generator, ditambah baris ringkasan portal."""
+    df = buat_transkrip(n_baris, seed=seed, tahun_masuk=tahun_masuk)
+    baris = df.astype(str).values.tolist()
+    # Baris ringkasan di akhir tabel portal (tersortir ke depan dan dibuang parser)
+    baris += [["Jumlah SKS", "", "", "", "", ""], ["IPK", "", "", "", "", ""], ["Predikat", "", "", "", "", ""]]
+    return baris
+
+
+def buat_html_transkrip(baris, nama="Mahasiswa Uji", nim="081911333001"):
+    header = ["Semester", "Kode MA", "Nama Mata Ajar", "SKS", "Nilai", "Bobot"]
+    th = "".join(f"<th>{h}</th>" for h in header)
+    tr = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>" for row in baris
+    )
+    return (
+        "<html><body><h3>Histori Nilai</h3>"
+        f"<table><tr><td>Nama</td><td>: {nama}</td></tr><tr><td>NIM</td><td>: {nim}</td></tr></table>"
+        f"<table><tr>{th}</tr>{tr}</table>"
+        "</body></html>"
+    )
+
+
+HTML_LOGIN = (
+    "<html><body><form method='post' action='login.php'>"
+    "<input type='hidden' name='csrf_token' value='{token}'/>"
+    "<img alt='captcha' src='captcha.php?t={token}'/>"
+    "</form></body></html>"
+)
+
+HTML_BERANDA = "<html><body><h3>Biodata</h3><a href='modul/mhs/akademik-transkrip.php'>Histori Nilai</a></body></html>"
+
+HTML_BIODATA = (
+    "<html><body><table><tr><td>Nama</td><td>: {nama}</td></tr>"
+    "<tr><td>NIM</td><td>: {nim}</td></tr><tr><td>Program Studi</td><td>: S1 Fisika</td></tr>"
+    "</table></body></html>"
+)
+
+
+def buat_handler(latensi=0.1, jitter=0.0, html_transkrip=None, seed=0):
+    """Handler dengan latensi per request (detik) dan isi transkrip tetap."""
+    html_transkrip = html_transkrip or buat_html_transkrip(baris_transkrip_sintetis(seed=seed))
+    statistik = {"request": 0}
+    kunci = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _tunda(self):
+            with kunci:
+                statistik["request"] += 1
+            if latensi or jitter:
+                time.sleep(latensi + random.uniform(0, jitter))
+
+        def _kirim(self, body, content_type="text/html; charset=utf-8", cookie=None):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            gz = "gzip" in self.headers.get("Accept-Encoding", "") and content_type.startswith("text/")
+            if gz:
+                body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if gz:
+                self.send_header("Content-Encoding", "gzip")
+            if cookie:
+                self.send_header("Set-Cookie", f"PHPSESSID={cookie}; Path=/")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._tunda()
+            path = self.path.split("?")[0]
+            if path == "/":
+                self._kirim(HTML_LOGIN.format(token=f"tok{random.getrandbits(32):08x}"),
+                            cookie=f"s{random.getrandbits(48):012x}")
+            elif path == "/captcha.php":
+                self._kirim(CAPTCHA_PNG, content_type="image/png")
+            elif path.endswith("akademik-transkrip.php"):
+                self._kirim(html_transkrip)
+            elif path.endswith("biodata.php"):
+                self._kirim(HTML_BIODATA.format(nama="Mahasiswa Uji", nim="081911333001"))
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            self._tunda()
+            panjang = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(panjang)
+            if self.path.split("?")[0] == "/login.php":
+                self._kirim(HTML_BERANDA)
+            else:
+                self.send_error(404)
+
+    return Handler, statistik
+
+
+def jalankan_server(port=0, latensi=0.1, jitter=0.0, baris=60, rekaman=None, seed=0):
+    """
+    Menjalankan server di thread latar. Mengembalikan (server, base_url, statistik).
+    rekaman: path HTML transkrip hasil simpan dari portal asli (opsional).
+    """
+    html_transkrip = Path(rekaman).read_text(encoding="utf-8") if rekaman else \
+        buat_html_transkrip(baris_transkrip_sintetis(baris, seed=seed))
+    handler, statistik = buat_handler(latensi, jitter, html_transkrip)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/", statistik
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server tiruan portal UNAIR")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latensi", type=float, default=0.1, help="latensi per request (detik)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="tambahan latensi acak maksimum (detik)")
+    parser.add_argument("--baris", type=int, default=60, help="jumlah baris transkrip sintetis")
+    parser.add_argument("--rekaman", help="file HTML transkrip rekaman")
+    args = parser.parse_args()
+
+    server, url, _ = jalankan_server(args.port, args.latensi, args.jitter, args.baris, args.rekaman)
+    print(f"Portal tiruan berjalan di {url}  (Ctrl+C untuk berhenti)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
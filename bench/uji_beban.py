@@ -0,0 +1,311 @@
+"""
+Uji beban: banyak sesi dashboard serentak dalam satu proses Streamlit.
+
+Setiap sesi adalah AppTest headless di thread sendiri (sama seperti server
+Streamlit yang menjalankan skrip tiap sesi di thread terpisah). Sesi diisi
+transkrip sintetis (atau login ke portal tiruan dengan --login), lalu
+memutar skenario interaksi acak: ganti semester, kembali ke Overview,
+centang "Sertakan mata kuliah yang sedang diambil" (include_ongoing),
+nyalakan simulasi dan ubah nilai di grid simulasi.
+
+Dilaporkan per jumlah sesi: throughput (rerun/detik), p50/p95 latensi rerun
+dan pertumbuhan RSS proses.
+
+    python bench/uji_beban.py --sesi 1,5,10,20 --langkah 30
+    python bench/uji_beban.py --sesi 10 --login --latensi 0.05 --json beban.json
+"""
+
+__author__ = "irr"
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from generator import buat_transkrip, muat_kurikulum
+from bench_e2e import persentil, tunggu_transkrip
+from grid import KOLOM_BARIS
+from normalisasi import KOLOM_KUNCI
+
+NILAI = ["A", "AB", "B", "BC", "C", "D", "E"]
+LABEL_SIMULASI = "Simulasi Perolehan Nilai"
+LABEL_ONGOING = "Sertakan mata kuliah yang sedang diambil"
+
+# Bobot pemilihan aksi (tampilan biasa / mode simulasi)
+AKSI_BIASA = {"semester": 4, "overview": 2, "ongoing": 2, "simulasi_on": 1}
+AKSI_SIMULASI = {"edit_grid": 4, "simulasi_off": 1}
+
+
+# ==============================================================================
+# PENGUKURAN RSS
+# ==============================================================================
+def rss_sekarang():
+    """RSS proses saat ini (byte); jatuh ke ru_maxrss jika /proc tidak ada."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PemantauRSS(threading.Thread):
+    """Mencatat RSS puncak selama uji berjalan."""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.puncak = rss_sekarang()
+        self._berhenti = threading.Event()
+
+    def run(self):
+        while not self._berhenti.wait(self.interval):
+            self.puncak = max(self.puncak, rss_sekarang())
+
+    def stop(self):
+        self._berhenti.set()
+        self.join()
+        return self.puncak
+
+
+# ==============================================================================
+# RUNTIME BERSAMA UNTUK APPTEST PARALEL
+# ==============================================================================
+@contextmanager
+def runtime_bersama():
+    """
+    AppTest dirancang untuk satu sesi; dua hal disesuaikan agar sesi paralel
+    berperilaku seperti di server Streamlit:
+    - AppTest.run() memasang Runtime tiruan lalu mengosongkannya lagi di akhir
+      (Runtime._instance = None), sehingga sesi lain yang sedang berjalan gagal
+      dengan "Runtime hasn't been created!". Runtime.instance() jatuh ke satu
+      Runtime tiruan cadangan saat slot itu sedang kosong.
+    - Setiap AppTest.run() membuat ScriptCache baru dan mem-parse ulang skrip;
+      ast.parse paralel tidak aman di CPython 3.11. Server memakai satu
+      ScriptCache untuk semua sesi, jadi bytecode di sini juga dibagi.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    cadangan = MagicMock(spec=Runtime)
+    cadangan.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    cadangan.cache_storage_manager = MemoryCacheStorageManager()
+
+    asli_instance, asli_exists = Runtime.__dict__["instance"], Runtime.__dict__["exists"]
+    Runtime.instance = classmethod(lambda cls: cls._instance if cls._instance is not None else cadangan)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    asli_bytecode = ScriptCache.get_bytecode
+    bytecode, kunci = {}, threading.Lock()
+
+    def get_bytecode(self, script_path):
+        with kunci:
+            if script_path not in bytecode:
+                bytecode[script_path] = asli_bytecode(self, script_path)
+            return bytecode[script_path]
+
+    ScriptCache.get_bytecode = get_bytecode
+    try:
+        yield
+    finally:
+        Runtime.instance, Runtime.exists = asli_instance, asli_exists
+        ScriptCache.get_bytecode = asli_bytecode
+
+
+# ==============================================================================
+# SATU SESI
+# ==============================================================================
+def _widget(daftar, label):
+    return next((w for w in daftar if w.label == label), None)
+
+
+def buat_sesi(indeks, baris, kurikulum, timeout, login):
+    """AppTest yang sudah berada di dashboard Overview."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "src" / "nilai.py"), default_timeout=timeout)
+    if login:
+        at.run()
+        at.text_input[0].input(f"0819113330{indeks:02d}")
+        at.text_input[1].input("rahasia")
+        at.text_input[2].input("abcd")
+        at.button[0].click().run()
+        tunggu_transkrip(at, timeout)
+        if at.exception or not at.session_state["logged_in"]:
+            raise RuntimeError(f"Login sesi {indeks} gagal: {at.exception or at.error}")
+    else:
+        at.session_state["logged_in"] = True
+        at.session_state["df"] = buat_transkrip(n_baris=baris, seed=indeks, kurikulum=kurikulum)
+        at.session_state["user_info"] = {"Nama Lengkap": f"Mahasiswa {indeks}", "NIM": f"0819113330{indeks:02d}"}
+    at.run()
+    return at
+
+
+def edit_grid(at, rng):
+    """Meniru perubahan satu sel "Indeks Nilai" di AgGrid simulasi lewat nilai komponennya."""
+    kunci = f"transcript_grid_{at.session_state['grid_key_counter']}"
+    nilai_grid = at.session_state[kunci] if kunci in at.session_state else None
+    if nilai_grid and nilai_grid.get("nodes"):
+        baris = [n["data"] for n in nilai_grid["nodes"]]
+    else:
+        analitik = at.session_state["analitik"]
+        baris = (
+            analitik["unique_graded"].drop(columns=["Bobot_numeric", KOLOM_KUNCI]).astype({"Bobot": str}).to_dict("records")
+            + analitik["ongoing"].drop(columns=["Bobot_numeric", KOLOM_KUNCI]).astype({"Bobot": str}).to_dict("records")
+        )
+    baris = [{**b, KOLOM_BARIS: i} for i, b in enumerate(baris)]  # posisi baris untuk grid berhalaman
+    rng.choice(baris)["Nilai"] = rng.choice(NILAI)
+    at.session_state[kunci] = {"nodes": [{"id": str(i), "rowIndex": i, "data": b} for i, b in enumerate(baris)]}
+    at.run()
+
+
+def langkah(at, rng):
+    """Memilih dan menjalankan satu aksi; mengembalikan nama aksi."""
+    simulasi = _widget(at.sidebar.toggle, LABEL_SIMULASI)
+    aksi_pilihan = AKSI_SIMULASI if simulasi.value else AKSI_BIASA
+    aksi = rng.choices(list(aksi_pilihan), weights=list(aksi_pilihan.values()))[0]
+
+    semester = at.sidebar.selectbox[0]
+    if aksi == "semester":
+        semester.set_value(rng.choice(semester.options[1:] or semester.options)).run()
+    elif aksi == "overview":
+        semester.set_value("Overview").run()
+    elif aksi == "ongoing":
+        centang = _widget(at.checkbox, LABEL_ONGOING)
+        if centang is None:  # checkbox hanya ada di Overview
+            semester.set_value("Overview").run()
+            return "overview"
+        centang.set_value(not centang.value).run()
+    elif aksi == "simulasi_on":
+        simulasi.set_value(True).run()
+    elif aksi == "simulasi_off":
+        simulasi.set_value(False).run()
+    else:
+        edit_grid(at, rng)
+    return aksi
+
+
+def putar_skenario(at, n_langkah, seed, catatan, galat):
+    rng = random.Random(seed)
+    for _ in range(n_langkah):
+        mulai = time.perf_counter()
+        try:
+            aksi = langkah(at, rng)
+        except Exception as e:  # satu sesi gagal tidak menghentikan sesi lain
+            galat.append(repr(e))
+            return
+        if at.exception:
+            galat.append(str(at.exception[0].value))
+            return
+        catatan.append((aksi, time.perf_counter() - mulai))
+
+
+# ==============================================================================
+# SATU PUTARAN BEBAN
+# ==============================================================================
+def uji(n_sesi, n_langkah, baris, kurikulum, timeout=120, login=False, seed=0):
+    pemantau = PemantauRSS()
+    pemantau.start()
+    rss_awal = rss_sekarang()
+
+    sesi = [buat_sesi(i, baris, kurikulum, timeout, login) for i in range(n_sesi)]
+    rss_siap = rss_sekarang()
+
+    catatan, galat = [], []
+    thread = [
+        threading.Thread(target=putar_skenario, args=(at, n_langkah, seed * 1000 + i, catatan, galat))
+        for i, at in enumerate(sesi)
+    ]
+    with runtime_bersama():
+        mulai = time.perf_counter()
+        for t in thread:
+            t.start()
+        for t in thread:
+            t.join()
+    dinding = time.perf_counter() - mulai
+
+    rss_akhir = rss_sekarang()
+    latensi = [d for _, d in catatan] or [0.0]
+    per_aksi = {}
+    for aksi, d in catatan:
+        per_aksi.setdefault(aksi, []).append(d)
+    return {
+        "sesi": n_sesi,
+        "rerun": len(catatan),
+        "galat": galat,
+        "dinding": dinding,
+        "throughput": len(catatan) / dinding if dinding else 0.0,
+        "p50": persentil(latensi, 50),
+        "p95": persentil(latensi, 95),
+        "maks": max(latensi),
+        "per_aksi": {a: {"jumlah": len(v), "p50": persentil(v, 50), "p95": persentil(v, 95)} for a, v in per_aksi.items()},
+        "rss_awal": rss_awal,
+        "rss_siap": rss_siap,
+        "rss_akhir": rss_akhir,
+        "rss_puncak": pemantau.stop(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji beban multi-sesi dashboard")
+    parser.add_argument("--sesi", default="1,5,10", help="jumlah sesi serentak, dipisah koma")
+    parser.add_argument("--langkah", type=int, default=20, help="jumlah interaksi per sesi")
+    parser.add_argument("--baris", type=int, default=60, help="jumlah baris transkrip per sesi")
+    parser.add_argument("--login", action="store_true", help="login lewat portal tiruan alih-alih mengisi sesi langsung")
+    parser.add_argument("--latensi", type=float, default=0.05, help="latensi portal tiruan (dengan --login)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    server = None
+    if args.login:
+        from portal_palsu import jalankan_server
+
+        server, base_url, _ = jalankan_server(latensi=args.latensi, baris=args.baris)
+        os.environ["PORTAL_BASE_URL"] = base_url  # sebelum modul portal diimpor oleh aplikasi
+    os.chdir(ROOT)  # aplikasi membaca data/*.xlsx relatif terhadap direktori kerja
+
+    kurikulum = muat_kurikulum()
+    hasil = []
+    for n in [int(x) for x in args.sesi.split(",")]:
+        h = uji(n, args.langkah, args.baris, kurikulum, login=args.login, seed=args.seed)
+        hasil.append(h)
+        print(f"{n} sesi: {h['rerun']} rerun dalam {h['dinding']:.1f} s, {len(h['galat'])} galat", file=sys.stderr)
+        for g in h["galat"][:3]:
+            print(f"  {g}", file=sys.stderr)
+    if server:
+        server.shutdown()
+
+    mb = 1024 * 1024
+    print(f"\n{'sesi':>5}{'rerun/s':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}{'maks (ms)':>11}"
+          f"{'RSS awal':>10}{'+sesi':>8}{'+uji':>8}{'puncak':>9}  (MB)")
+    for h in hasil:
+        print(f"{h['sesi']:>5}{h['throughput']:>10.2f}{h['p50'] * 1000:>11.0f}{h['p95'] * 1000:>11.0f}"
+              f"{h['maks'] * 1000:>11.0f}{h['rss_awal'] / mb:>10.0f}{(h['rss_siap'] - h['rss_awal']) / mb:>8.1f}"
+              f"{(h['rss_akhir'] - h['rss_siap']) / mb:>8.1f}{h['rss_puncak'] / mb:>9.0f}")
+
+    print(f"\n{'aksi':<14}" + "".join(f"{'p95@' + str(h['sesi']):>10}" for h in hasil))
+    for aksi in list(AKSI_BIASA) + list(AKSI_SIMULASI):
+        nilai = [h["per_aksi"].get(aksi, {}).get("p95") for h in hasil]
+        print(f"{aksi:<14}" + "".join(f"{v * 1000:>10.0f}" if v is not None else f"{'-':>10}" for v in nilai))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"argumen": vars(args), "hasil": hasil}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
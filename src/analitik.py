@@ -0,0 +1,284 @@
+
+__author__ = "irr"
+
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from normalisasi import KOLOM_KUNCI, kunci_kolom
+from transkrip import sidik_baris, bandingkan_transkrip
+
+# Mapping nilai huruf ke bobot angka
+NILAI_MAP = {
+    "A": 4.0,
+    "AB": 3.5,
+    "B": 3.0,
+    "BC": 2.5,
+    "C": 2.0,
+    "D": 1.0,
+    "E": 0.0,
+}
+
+# Target SKS mata kuliah KBK (pilihan bidang)
+SKS_TARGET_KBK = 14
+
+
+# ==============================================================================
+# ARITMETIKA SEPERSERATUS
+# ==============================================================================
+# Bobot dan indeks prestasi dijumlahkan sebagai bilangan bulat seperseratus
+# (int64), sehingga IPS/IPK tepat berapa pun jumlah barisnya. Pembulatan resmi
+# (setengah ke atas, dua desimal) dilakukan sekali di bagi_ratus, dan batas
+# jatah SKS dibandingkan pada hasil bulat itu, sehingga mahasiswa di tepi batas
+# selalu masuk kelas yang sama.
+NILAI_RATUS = {huruf: round(indeks * 100) for huruf, indeks in NILAI_MAP.items()}
+
+
+def bobot_ratus(df):
+    """Kolom Bobot_numeric baris bernilai -> Series int64 seperseratus (Bobot portal bertepatan dua desimal)."""
+    return pd.Series(np.rint(df["Bobot_numeric"].to_numpy(float) * 100).astype(np.int64), index=df.index)
+
+
+def bagi_ratus(total_bobot_ratus, total_sks):
+    """
+    Total bobot (seperseratus) / total SKS -> indeks prestasi seperseratus,
+    dibulatkan setengah ke atas: floor((2B + S) / 2S). Skalar atau array; SKS 0 -> 0.
+    """
+    b = np.asarray(total_bobot_ratus, dtype=np.int64)
+    s = np.asarray(total_sks, dtype=np.int64)
+    hasil = np.where(s > 0, (2 * b + s) // np.maximum(2 * s, 1), 0)
+    return hasil if hasil.ndim else int(hasil)
+
+
+def ke_ratus(nilai):
+    """Angka desimal (mis. IPS float dari luar pipeline) -> seperseratus, pembulatan setengah ke atas."""
+    hasil = np.floor(np.asarray(nilai, dtype=float) * 100 + 0.5 + 1e-9).astype(np.int64)
+    return hasil if hasil.ndim else int(hasil)
+
+
+def format_ratus(ratus):
+    """Seperseratus -> teks dua desimal tanpa melewati float ("3.05")."""
+    ratus = int(ratus)
+    return f"{ratus // 100}.{ratus % 100:02d}"
+
+
+def hitung_jatah_sks_ratus(ips_ratus):
+    """Jatah SKS dari IPS seperseratus (skalar atau array): <2,00 -> 15, <=2,50 -> 18, <=3,00 -> 20, lainnya 24."""
+    r = np.asarray(ips_ratus, dtype=np.int64)
+    hasil = np.select([r < 200, r <= 250, r <= 300], [15, 18, 20], 24)
+    return hasil if hasil.ndim else int(hasil)
+
+
+def semester_sort_key(semester_str):
+    """Kunci pengurutan kustom untuk string semester (contoh: '2023/2024 Ganjil')."""
+    if not isinstance(semester_str, str) or "/" not in semester_str:
+        return (9999, 9999)
+    try:
+        year_part = semester_str.split("/")[0].strip()
+        year = int(year_part)
+        order = 0 if "Ganjil" in semester_str else 1
+        return (year, order)
+    except (ValueError, IndexError):
+        return (9999, 9999)
+
+
+def smart_find_taken_courses(kurikulum_df, transkrip_list):
+    """
+    Mencari mata kuliah yang sudah diambil dengan metode 2 tahap:
+    1. Cari kecocokan 100% (exact match) pada kunci kanonik.
+    2. Cari kemiripan nama (similarity match) untuk sisanya.
+    transkrip_list berisi kunci kanonik (kolom Kunci dari siapkan_transkrip);
+    kunci kurikulum diambil dari kolom Kunci jika ada (lihat kurikulum.muat_program).
+    """
+    THRESHOLD = 0.77  # Threshold untuk tahap kedua
+
+    if KOLOM_KUNCI in kurikulum_df.columns:
+        kunci_kurikulum = kurikulum_df[KOLOM_KUNCI]
+    else:
+        kunci_kurikulum = kunci_kolom(kurikulum_df["Mata Kuliah"])
+
+    transkrip_list = [k for k in transkrip_list if k]  # nama kosong tidak dicocokkan
+    taken_indices = []
+
+    # --- Tahap 1: Exact Matching (multiset, tiap MK transkrip dipakai sekali) ---
+    tersedia = Counter(transkrip_list)
+    terpakai = Counter()
+    remaining = []
+    for index, kunci in kunci_kurikulum.items():
+        if not kunci:
+            continue
+        if tersedia[kunci] > terpakai[kunci]:
+            terpakai[kunci] += 1
+            taken_indices.append(index)
+        else:
+            remaining.append((index, kunci))
+
+    # Sisa MK transkrip (urutan asli, kemunculan pertama yang sudah terpakai dibuang)
+    available_transcript_courses = []
+    for kunci in transkrip_list:
+        if terpakai[kunci]:
+            terpakai[kunci] -= 1
+        else:
+            available_transcript_courses.append(kunci)
+
+    # --- Tahap 2: Similarity Matching untuk sisanya ---
+    pembanding = {}  # MK transkrip -> SequenceMatcher (seq2 cukup diindeks sekali)
+    for index, kunci in remaining:
+        if not available_transcript_courses:
+            break  # Hentikan jika semua MK transkrip sudah terpetakan
+
+        best_match, best_score = None, 0
+        for trans_course in available_transcript_courses:
+            matcher = pembanding.get(trans_course)
+            if matcher is None:
+                matcher = pembanding[trans_course] = SequenceMatcher(None, b=trans_course)
+            matcher.set_seq1(kunci)
+            # Batas atas murah dulu; ratio() hanya jika kandidat masih bisa menang
+            if any(batas < THRESHOLD or batas <= best_score
+                   for batas in (matcher.real_quick_ratio(), matcher.quick_ratio())):
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best_score = score
+                best_match = trans_course
+
+        if best_score >= THRESHOLD:
+            taken_indices.append(index)
+            available_transcript_courses.remove(best_match)
+
+    # Kembalikan DataFrame dari kurikulum yang sudah teridentifikasi
+    return kurikulum_df.loc[taken_indices]
+
+
+# ==============================================================================
+# PIPELINE TRANSKRIP -> IPK / IPS
+# ==============================================================================
+def siapkan_transkrip(df):
+    """Merapikan kolom Semester, menambah Bobot_numeric dan Kunci, dan mengindeks baris dengan sidiknya."""
+    transkrip_df = df.copy()
+    transkrip_df["Semester"] = transkrip_df["Semester"].str.split(" - ").str[0]
+    transkrip_df["Bobot_numeric"] = pd.to_numeric(transkrip_df["Bobot"], errors="coerce")  # buang BT
+    transkrip_df[KOLOM_KUNCI] = kunci_kolom(transkrip_df["Nama Mata Ajar"])  # untuk smart_find_taken_courses
+    transkrip_df.index = sidik_baris(transkrip_df).values
+    return transkrip_df
+
+
+def ambil_nilai_terbaik(df_graded):
+    """Ambil hanya mk dengan nilai tertinggi untuk setiap mata kuliah yang diulang."""
+    df_graded_sorted = df_graded.sort_values(
+        by=["Nama Mata Ajar", "Bobot_numeric"], ascending=[True, False]
+    )
+    return df_graded_sorted.drop_duplicates(subset="Nama Mata Ajar", keep="first")
+
+
+def agregasi_ips(df_graded):
+    """Total bobot (seperseratus) dan total SKS per semester (tanpa urutan dan kolom turunan)."""
+    return (
+        df_graded.assign(Bobot_ratus=bobot_ratus(df_graded))
+        .groupby("Semester")
+        .agg(Total_Bobot_Ratus=("Bobot_ratus", "sum"), Total_SKS=("SKS", "sum"))
+        .reset_index()
+    )
+
+
+def lengkapi_ips(ips_df):
+    """Menghitung IPS, label semester, dan jatah SKS dari hasil agregasi_ips."""
+    ips_df = ips_df[["Semester", "Total_Bobot_Ratus", "Total_SKS"]].copy()
+    ips_df["Total_Bobot"] = ips_df["Total_Bobot_Ratus"] / 100
+    ips_df["IPS_Ratus"] = bagi_ratus(ips_df["Total_Bobot_Ratus"], ips_df["Total_SKS"])
+    ips_df["IPS"] = ips_df["IPS_Ratus"] / 100
+    ips_df = ips_df.sort_values(by="Semester", key=lambda s: s.map(semester_sort_key)).reset_index(drop=True)
+    ips_df["SemesterLabel"] = [f"Semester {i+1}" for i in ips_df.index]
+    ips_df["IPS_Lalu"] = ips_df["IPS"].shift(1)
+    jatah = hitung_jatah_sks_ratus(ips_df["IPS_Ratus"].shift(1, fill_value=0))
+    ips_df["Jatah_SKS"] = np.where(ips_df.index > 0, jatah, 0)
+    return ips_df
+
+
+def hitung_analitik(df):
+    """
+    Menjalankan seluruh pipeline dari transkrip mentah (st.session_state.df).
+    Hasilnya dict yang dipakai display_main_app dan bisa diperbarui
+    sebagian lewat perbarui_analitik.
+    """
+    transkrip_df = siapkan_transkrip(df)
+
+    df_graded = transkrip_df[
+        (transkrip_df["Bobot_numeric"].notna()) & (transkrip_df["Nilai"] != "E")
+    ].copy()
+    df_unique_graded = ambil_nilai_terbaik(df_graded)
+
+    df_ongoing = transkrip_df[transkrip_df["Bobot_numeric"].isna()].copy()
+    df_ongoing = df_ongoing[
+        ~df_ongoing["Nama Mata Ajar"].isin(df_unique_graded["Nama Mata Ajar"])
+    ]  # filter untuk hanya mata kuliah yang baru diambil (belum ada nilai)
+
+    return {
+        "transkrip": transkrip_df,
+        "graded": df_graded,
+        "unique_graded": df_unique_graded,
+        "ongoing": df_ongoing,
+        "ips": lengkapi_ips(agregasi_ips(df_graded)),
+    }
+
+
+def perbarui_analitik(analitik, df_baru):
+    """
+    Refresh inkremental: hanya baris yang sidiknya berubah yang diterapkan.
+    IPS dihitung ulang hanya untuk semester terdampak dan pemilihan nilai
+    terbaik hanya untuk mata kuliah terdampak.
+    Mengembalikan (analitik_baru, perbedaan).
+    """
+    lama = analitik["transkrip"]
+    baru = siapkan_transkrip(df_baru)
+    beda = bandingkan_transkrip(lama, baru)
+    if beda["ditambah"].empty and beda["dihapus"].empty:
+        return analitik, beda
+
+    ditambah, dihapus = beda["ditambah"], beda["dihapus"]
+    semester_terdampak, mk_terdampak = beda["semester"], beda["mata_kuliah"]
+
+    transkrip_df = baru
+
+    # 1. Baris bernilai: buang yang dihapus, tambahkan yang baru
+    graded_baru = ditambah[(ditambah["Bobot_numeric"].notna()) & (ditambah["Nilai"] != "E")]
+    df_graded = pd.concat([analitik["graded"].drop(dihapus, errors="ignore"), graded_baru])
+
+    # 2. Nilai terbaik hanya untuk mata kuliah terdampak
+    grup_terdampak = df_graded[df_graded["Nama Mata Ajar"].isin(mk_terdampak)]
+    unique_lama = analitik["unique_graded"]
+    df_unique_graded = pd.concat([
+        unique_lama[~unique_lama["Nama Mata Ajar"].isin(mk_terdampak)],
+        ambil_nilai_terbaik(grup_terdampak),
+    ]).sort_values(by="Nama Mata Ajar", kind="stable")
+
+    # 3. Mata kuliah berjalan (BT) hanya untuk mata kuliah terdampak
+    ongoing_lama = analitik["ongoing"]
+    ongoing_terdampak = transkrip_df[
+        transkrip_df["Bobot_numeric"].isna()
+        & transkrip_df["Nama Mata Ajar"].isin(mk_terdampak)
+        & ~transkrip_df["Nama Mata Ajar"].isin(df_unique_graded["Nama Mata Ajar"])
+    ]
+    df_ongoing = pd.concat([
+        ongoing_lama[~ongoing_lama["Nama Mata Ajar"].isin(mk_terdampak)],
+        ongoing_terdampak,
+    ])
+    df_ongoing = df_ongoing.loc[transkrip_df.index[transkrip_df.index.isin(df_ongoing.index)]]  # urutan transkrip
+
+    # 4. IPS hanya untuk semester terdampak, sisanya diambil dari hasil lama
+    ips_lama = analitik["ips"]
+    ips_terdampak = agregasi_ips(df_graded[df_graded["Semester"].isin(semester_terdampak)])
+    ips_df = lengkapi_ips(pd.concat([
+        ips_lama[~ips_lama["Semester"].isin(semester_terdampak)],
+        ips_terdampak,
+    ]))
+
+    return {
+        "transkrip": transkrip_df,
+        "graded": df_graded,
+        "unique_graded": df_unique_graded,
+        "ongoing": df_ongoing,
+        "ips": ips_df,
+    }, beda
@@ -0,0 +1,163 @@
+
+__author__ = "irr"
+
+import csv
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from analitik import smart_find_taken_courses
+from normalisasi import KOLOM_KUNCI
+
+# ==============================================================================
+# LAPORAN (XLSX / CSV / PARQUET)
+# ==============================================================================
+# Laporan terdiri dari empat lembar dengan skema tetap. Penulis menerima
+# bagian laporan berulang kali (satu per mahasiswa pada mode kohort) dan
+# langsung menuliskannya: XLSX dalam mode write-only openpyxl, CSV per lembar
+# dan Parquet per lembar (bagian kecil ditampung sampai BARIS_PER_POTONG baris
+# per row group), sehingga memori tidak bergantung pada jumlah baris atau mahasiswa.
+KOLOM_KURIKULUM = {"Semester": "string", "Kode": "string", "Mata Kuliah": "string", "SKS": "Int64", "Prasyarat": "string"}
+LEMBAR = {
+    "transkrip": ("Transkrip", {
+        "Semester": "string", "Kode MA": "string", "Nama Mata Ajar": "string",
+        "SKS": "Int64", "Nilai": "string", "Bobot": "Float64",
+    }),
+    "riwayat_ips": ("Riwayat IPS", {
+        "Semester": "string", "SemesterLabel": "string", "Total_SKS": "Int64",
+        "Total_Bobot": "Float64", "IPS": "Float64", "Jatah_SKS": "Int64",
+    }),
+    "mk_wajib_belum": ("MK Wajib Belum", KOLOM_KURIKULUM),
+    "mk_kbk_belum": ("MK KBK Belum", KOLOM_KURIKULUM),
+}
+FORMAT = {"xlsx": "xlsx", "csv": "zip", "parquet": "zip"}  # format -> akhiran berkas unduhan
+MIME = {"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "zip": "application/zip"}
+BARIS_PER_POTONG = 50_000
+
+_PA = {"string": pa.string(), "Int64": pa.int64(), "Float64": pa.float64()}
+
+
+def mk_belum_diambil(kurikulum_df, transkrip_df):
+    """MK kurikulum yang belum pernah muncul di transkrip (termasuk yang sedang diambil)."""
+    terambil = smart_find_taken_courses(kurikulum_df, transkrip_df[KOLOM_KUNCI].tolist())
+    return kurikulum_df[~kurikulum_df["Mata Kuliah"].isin(terambil["Mata Kuliah"])]
+
+
+def bagian_laporan(analitik, wajib_belum, kbk_belum, nim=None):
+    """
+    {lembar: DataFrame} untuk satu mahasiswa dari hasil hitung_analitik:
+    transkrip tanpa duplikasi (nilai terbaik + MK yang sedang diambil), riwayat
+    IPS dengan Jatah_SKS, dan daftar MK wajib/KBK yang belum diambil.
+    """
+    transkrip = pd.concat([analitik["unique_graded"], analitik["ongoing"]], ignore_index=True)
+    bagian = {
+        "transkrip": transkrip.assign(Bobot=transkrip["Bobot_numeric"]),
+        "riwayat_ips": analitik["ips"],
+        "mk_wajib_belum": wajib_belum,
+        "mk_kbk_belum": kbk_belum,
+    }
+    for lembar, df in bagian.items():
+        kolom = LEMBAR[lembar][1]
+        df = df[list(kolom)].astype(kolom)
+        bagian[lembar] = df if nim is None else df.assign(NIM=str(nim))[["NIM", *kolom]]
+    return bagian
+
+
+class PenulisLaporan:
+    """
+    Menulis laporan secara bertahap:
+
+        with PenulisLaporan("laporan.xlsx", "xlsx") as penulis:
+            penulis.tulis(bagian)          # boleh dipanggil berkali-kali
+
+    xlsx menulis satu workbook ke path; csv dan parquet menulis satu berkas
+    per lembar ke folder path.
+    """
+
+    def __init__(self, path, format="xlsx", dengan_nim=False):
+        if format not in FORMAT:
+            raise ValueError(f"format laporan tidak dikenal: {format}")
+        self.path = Path(path)
+        self.format = format
+        self.kolom = {
+            lembar: ({"NIM": "string"} if dengan_nim else {}) | kolom for lembar, (_, kolom) in LEMBAR.items()
+        }
+        self._lembar = {}
+        self._antre = {lembar: [] for lembar in LEMBAR}  # parquet: tabel yang belum jadi row group
+        if format == "xlsx":
+            self._wb = Workbook(write_only=True)
+            for lembar, (judul, _) in LEMBAR.items():
+                ws = self._lembar[lembar] = self._wb.create_sheet(judul)
+                ws.append(list(self.kolom[lembar]))
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            for lembar in LEMBAR:
+                if format == "csv":
+                    berkas = open(self.path / f"{lembar}.csv", "w", newline="", encoding="utf-8")
+                    csv.writer(berkas).writerow(list(self.kolom[lembar]))
+                    self._lembar[lembar] = berkas
+                else:
+                    skema = pa.schema([(k, _PA[t]) for k, t in self.kolom[lembar].items()])
+                    self._lembar[lembar] = pq.ParquetWriter(self.path / f"{lembar}.parquet", skema)
+
+    def tulis(self, bagian):
+        for lembar, df in bagian.items():
+            for awal in range(0, len(df), BARIS_PER_POTONG):
+                self._tulis_potongan(lembar, df.iloc[awal:awal + BARIS_PER_POTONG])
+
+    def _tulis_potongan(self, lembar, df):
+        tujuan = self._lembar[lembar]
+        if self.format == "xlsx":
+            # openpyxl tidak menerima pd.NA
+            for baris in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+                tujuan.append(baris)
+        elif self.format == "csv":
+            df.to_csv(tujuan, header=False, index=False)
+        else:
+            antre = self._antre[lembar]
+            antre.append(pa.Table.from_pandas(df, schema=tujuan.schema, preserve_index=False))
+            if sum(t.num_rows for t in antre) >= BARIS_PER_POTONG:
+                self._kosongkan(lembar)
+
+    def _kosongkan(self, lembar):
+        if self._antre[lembar]:
+            self._lembar[lembar].write_table(pa.concat_tables(self._antre[lembar]))
+            self._antre[lembar] = []
+
+    def tutup(self):
+        if self.format == "xlsx":
+            self._wb.save(self.path)
+            return
+        for lembar, tujuan in self._lembar.items():
+            if self.format == "parquet":
+                self._kosongkan(lembar)
+            tujuan.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.tutup()
+
+
+def laporan_bytes(bagian, format="xlsx"):
+    """Isi berkas unduhan (xlsx, atau zip berisi csv/parquet per lembar) untuk st.download_button."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if format == "xlsx":
+            path = tmp / "laporan.xlsx"
+            with PenulisLaporan(path, format) as penulis:
+                penulis.tulis(bagian)
+        else:
+            with PenulisLaporan(tmp / "laporan", format) as penulis:
+                penulis.tulis(bagian)
+            path = tmp / "laporan.zip"
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+                for berkas in sorted((tmp / "laporan").iterdir()):
+                    zf.write(berkas, berkas.name)
+        return path.read_bytes()
@@ -0,0 +1,143 @@
+
+__author__ = "irr"
+
+import matplotlib.pyplot as plt
+import numpy as np
+import plotly.graph_objects as go
+
+from analitik import NILAI_MAP
+
+
+def create_donut_chart(value, title):
+    """Membuat grafik donat untuk menampilkan IPK."""
+    if value < 2:
+        primary_color = "#FF4136"  # Merah
+    elif 2 <= value < 3:
+        primary_color = "#FFDC00"  # Kuning
+    else:
+        primary_color = "#2ECC40"  # Hijau
+
+    fig = go.Figure(
+        go.Pie(
+            values=[value, 4.0 - value],
+            labels=[title, "Sisa"],
+            hole=0.7,
+            marker_colors=[primary_color, "rgba(0,0,0,0.1)"],
+            textinfo="none",
+            hoverinfo="none",
+            sort=False,
+            direction="clockwise",
+        )
+    )
+    fig.update_layout(
+        height=300,
+        margin=dict(l=20, r=20, t=20, b=20),
+        showlegend=False,
+        annotations=[
+            dict(
+                text=f"<b>{title}</b>",
+                x=0.5,
+                y=0.60,
+                font_size=20,
+                showarrow=False,
+                font=dict(color="grey"),
+            ),
+            dict(
+                text=f"<b>{value:.2f}</b>",
+                x=0.5,
+                y=0.45,
+                font_size=40,
+                showarrow=False,
+                font=dict(color=primary_color),
+            ),
+        ],
+    )
+    return fig
+
+
+def grafik_distribusi_nilai(nilai_series):
+    """Grafik batang jumlah mata kuliah per huruf nilai."""
+    return grafik_hitungan_nilai(nilai_series.value_counts().reindex(list(NILAI_MAP.keys()), fill_value=0))
+
+
+def grafik_hitungan_nilai(nilai_counts):
+    """Grafik batang dari jumlah per huruf nilai (Series berindeks huruf NILAI_MAP)."""
+    fig, ax = plt.subplots()
+    bars = ax.bar(nilai_counts.index, nilai_counts.values, color="#0074D9")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.set_ylim(0, nilai_counts.max() + 1.5)
+    for bar in bars:
+        height = bar.get_height()
+        ax.annotate(
+            f"{int(height)}",
+            xy=(bar.get_x() + bar.get_width() / 2, height),
+            xytext=(0, 3),
+            textcoords="offset points",
+            ha="center",
+            va="bottom",
+        )
+    return fig
+
+
+def grafik_ips(ips_df):
+    """Grafik garis IPS per semester."""
+    x = ips_df.index + 1
+    y = ips_df["IPS"]
+
+    fig, ax = plt.subplots()
+    ax.plot(x, y, marker="o", markersize=8, color="#2ECC40", linewidth=2)
+    for i, val in enumerate(y):
+        ax.text(x[i], val + 0.05, f"{val:.2f}", ha="center", va="bottom", fontsize=10, color="#333")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.set_ylim(1, 4.1)
+    ax.set_xlim(0.5, len(x) + 0.5)
+    ax.set_xticks(x)
+    ax.set_xticklabels(ips_df["SemesterLabel"], rotation=45, ha="right")
+    return fig
+
+
+def grafik_tren_mk(tren_df):
+    """Rata-rata bobot dan persentase lulus satu mata kuliah per tahun akademik."""
+    fig, ax = plt.subplots()
+    ax.plot(tren_df["Tahun"], tren_df["Rata Bobot"], marker="o", color="#0074D9", linewidth=2, label="Rata-rata bobot")
+    ax.set_ylim(0, 4.1)
+    ax.set_ylabel("Rata-rata bobot")
+    ax.spines["top"].set_visible(False)
+    ax.tick_params(axis="x", rotation=45)
+
+    ax2 = ax.twinx()
+    ax2.plot(tren_df["Tahun"], tren_df["% Lulus"], marker="s", color="#2ECC40", linewidth=2, label="% lulus")
+    ax2.set_ylim(0, 105)
+    ax2.set_ylabel("% lulus")
+    ax2.spines["top"].set_visible(False)
+    fig.legend(loc="lower left", frameon=False)
+    return fig
+
+
+def grafik_proyeksi_ipk(ipk):
+    """Histogram IPK akhir hasil proyeksi, dengan garis median."""
+    fig, ax = plt.subplots()
+    ax.hist(ipk, bins=40, color="#0074D9", alpha=0.85)
+    median = float(np.median(ipk))
+    ax.axvline(median, color="#FF851B", linewidth=2, label=f"Median {median:.2f}")
+    ax.set_xlabel("IPK akhir")
+    ax.set_ylabel("Jumlah lintasan")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.legend(frameon=False)
+    return fig
+
+
+def grafik_peluang_lulus(peluang_lulus):
+    """Peluang kumulatif sudah lulus per semester (Series semester ke- -> peluang)."""
+    fig, ax = plt.subplots()
+    ax.step(peluang_lulus.index, 100 * peluang_lulus.values, where="post", color="#2ECC40", linewidth=2)
+    ax.set_ylim(0, 105)
+    ax.set_xticks(peluang_lulus.index)
+    ax.set_xlabel("Semester ke-")
+    ax.set_ylabel("% sudah lulus")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    return fig
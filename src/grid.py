@@ -0,0 +1,234 @@
+
+__author__ = "irr"
+
+import copy
+import json
+import math
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
+from st_aggrid.shared import JsCodeEncoder
+from streamlit import dataframe_util
+
+from analitik import NILAI_MAP
+from metrik import catat_cache, catat_payload
+
+# ==============================================================================
+# GRID AGGRID: OPSI TERSIMPAN + PAGINASI DI SERVER
+# ==============================================================================
+# AgGrid mengirim seluruh DataFrame (Arrow) dan gridOptions ke browser setiap
+# rerun. Di sini gridOptions dibangun sekali per proses per (grid, susunan
+# kolom), dan yang dikirim hanya potongan halaman yang sedang dilihat; halaman
+# dipilih di server. Ukuran payload tiap grid dicatat ke metrik dan dijumlahkan
+# per rerun di st.session_state.payload_rerun.
+UKURAN_HALAMAN = int(os.environ.get("DASHBOARD_GRID_HALAMAN", "50") or 50)
+KOLOM_BARIS = "_baris"  # posisi baris di tabel penuh (kolom tersembunyi grid simulasi)
+
+BOBOT_JS = JsCode(
+    """
+    function(params) {
+        if (params.data.Nilai === '*BT' || !params.data.Nilai) return 0;
+        const map = {"A":4.0,"AB":3.5,"B":3.0,"BC":2.5,"C":2.0,"D":1.0,"E":0.0};
+        const idx = map[params.data.Nilai] || 0;
+        const sks = Number(params.data.SKS) || 0;
+        return sks * idx;
+    }
+    """
+)
+FORMAT_BOBOT_JS = JsCode("function(params){ return Number(params.value || 0).toFixed(2); }")
+
+
+# ==============================================================================
+# KONFIGURASI KOLOM PER GRID
+# ==============================================================================
+def _tengah(gb, *kolom):
+    for k in kolom:
+        gb.configure_column(k, width=100, cellStyle={"text-align": "center"})
+
+
+def _atur_simulasi(gb, kolom):
+    gb.configure_default_column(headerClass="ag-left-aligned-header")
+    gb.configure_column("Nama Mata Ajar", editable=False, width=300, cellStyle={"text-align": "left"})
+    gb.configure_column("SKS", editable=False, width=80, cellStyle={"text-align": "center"})
+    gb.configure_column(
+        "Nilai",
+        header_name="Indeks Nilai",
+        editable=True,
+        cellEditor="agSelectCellEditor",
+        cellEditorParams={"values": list(NILAI_MAP.keys())},
+        width=100,
+        cellStyle={"text-align": "center"},
+    )
+    gb.configure_column(
+        "Bobot",
+        editable=False,
+        width=100,
+        cellStyle={"text-align": "center"},
+        valueGetter=BOBOT_JS,
+        valueFormatter=FORMAT_BOBOT_JS,
+    )
+    for k in ("Kode MA", "Semester", "Indeks", KOLOM_BARIS):
+        if k in kolom:
+            gb.configure_column(k, editable=False, hide=True)
+
+
+def _atur_transkrip(gb, kolom):
+    gb.configure_default_column(editable=False, headerClass="ag-left-aligned-header")
+    gb.configure_column("Nama Mata Ajar", width=400)
+    _tengah(gb, "SKS", "Nilai", "Bobot")
+
+
+def _atur_belum_diambil(gb, kolom):
+    gb.configure_column("Mata Kuliah", width=400)
+    _tengah(gb, "SKS")
+
+
+def _atur_terkunci(gb, kolom):
+    gb.configure_column("Mata Kuliah", width=300)
+    gb.configure_column("Kurang", header_name="Prasyarat belum terpenuhi", width=350)
+    _tengah(gb, "SKS")
+
+
+def _atur_semester(gb, kolom):
+    gb.configure_column("Nama Mata Ajar", width=400)
+    _tengah(gb, "SKS", "Nilai", "Bobot")
+
+
+ATUR = {
+    "simulasi": _atur_simulasi,
+    "transkrip": _atur_transkrip,
+    "wajib": _atur_belum_diambil,
+    "kbk": _atur_belum_diambil,
+    "wajib_terkunci": _atur_terkunci,
+    "kbk_terkunci": _atur_terkunci,
+    "semester": _atur_semester,
+}
+
+_opsi = {}  # (grid, ((kolom, dtype), ...)) -> gridOptions
+_kunci = threading.Lock()
+
+
+def opsi_grid(nama, df):
+    """gridOptions grid `nama` untuk kolom df; dibangun sekali per proses per susunan kolom."""
+    kunci = (nama, tuple(zip(df.columns, map(str, df.dtypes))))
+    with _kunci:
+        opsi = _opsi.get(kunci)
+    catat_cache("grid_opsi", opsi is not None)
+    if opsi is None:
+        gb = GridOptionsBuilder.from_dataframe(df)
+        ATUR[nama](gb, df.columns)
+        opsi = gb.build()
+        with _kunci:
+            _opsi[kunci] = opsi
+    # AgGrid mengubah gridOptions di tempat (JsCode, autoSizeStrategy), jadi salinan yang diberikan
+    return copy.deepcopy(opsi)
+
+
+# ==============================================================================
+# PAYLOAD
+# ==============================================================================
+def ukuran_payload(df, opsi):
+    """Perkiraan byte yang dikirim ke browser: data Arrow IPC + gridOptions JSON."""
+    try:
+        tabel = pa.Table.from_pandas(df)
+    except (pa.ArrowTypeError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Kolom campuran (mis. Bobot berisi "*BT") diubah Streamlit menjadi string
+        tabel = pa.Table.from_pandas(dataframe_util.fix_arrow_incompatible_column_types(df))
+    data = len(dataframe_util.convert_arrow_table_to_arrow_bytes(tabel))
+    return data + len(json.dumps(opsi, cls=JsCodeEncoder))
+
+
+def _render(nama, potongan, **kwargs):
+    opsi = opsi_grid(nama, potongan)
+    nbytes = ukuran_payload(potongan, opsi)
+    catat_payload(nama, nbytes)
+    st.session_state.payload_rerun = st.session_state.get("payload_rerun", 0) + nbytes
+    # Salinan: AgGrid menambahkan kolom ::auto_unique_id:: ke DataFrame yang diberikan
+    return AgGrid(potongan.copy(), gridOptions=opsi, fit_columns_on_grid_load=True, theme="balham", **kwargs)
+
+
+# ==============================================================================
+# PAGINASI DI SERVER
+# ==============================================================================
+def _halaman(key, n, ukuran):
+    """(awal, akhir) baris yang terlihat; kontrol halaman hanya muncul jika n > ukuran."""
+    if n <= ukuran:
+        return 0, n
+    jumlah = math.ceil(n / ukuran)
+    kunci = f"{key}_halaman"
+    if st.session_state.get(kunci, 1) > jumlah:  # tabel mengecil sejak rerun terakhir
+        st.session_state[kunci] = jumlah
+    col1, col2 = st.columns([1, 4], vertical_alignment="bottom")
+    with col1:
+        halaman = st.number_input("Halaman", min_value=1, max_value=jumlah, step=1, key=kunci)
+    awal = (halaman - 1) * ukuran
+    akhir = min(awal + ukuran, n)
+    with col2:
+        st.caption(f"Baris {awal + 1}–{akhir} dari {n}")
+    return awal, akhir
+
+
+def tampilkan_grid(nama, df, key=None, ukuran=UKURAN_HALAMAN, **kwargs):
+    """AgGrid hanya-baca yang menerima satu halaman df. Mengembalikan respons AgGrid."""
+    key = key or f"grid_{nama}"
+    awal, akhir = _halaman(key, len(df), ukuran)
+    return _render(nama, df.iloc[awal:akhir], key=key, **kwargs)
+
+
+def _terapkan(df, baris):
+    """Menerapkan suntingan {posisi: {kolom: nilai}} ke baris df yang ada di potongan ini."""
+    ada = [pos for pos in baris if pos in df.index]
+    if not ada:
+        return df
+    df = df.copy()
+    for pos in ada:
+        for kolom, nilai in baris[pos].items():
+            df.at[pos, kolom] = nilai
+    return df
+
+
+def _sidik(penuh):
+    return int(pd.util.hash_pandas_object(penuh.astype(str), index=False).sum())
+
+
+def atur_suntingan(key, df, baris):
+    """Mengganti suntingan grid key dengan {posisi: {kolom: nilai}} (mis. dari skenario tersimpan)."""
+    st.session_state[f"{key}_suntingan"] = {"sidik": _sidik(df.reset_index(drop=True)), "baris": dict(baris)}
+
+
+def grid_suntingan(nama, df, key, kolom_sunting=("Nilai",), ukuran=UKURAN_HALAMAN, **kwargs):
+    """
+    Grid yang bisa diedit dengan paginasi di server. Suntingan disimpan di
+    session_state per key (posisi baris -> nilai) sehingga tetap berlaku saat
+    pindah halaman. Mengembalikan df penuh dengan semua suntingan diterapkan.
+    """
+    penuh = df.reset_index(drop=True)
+    kolom_sunting = list(kolom_sunting)
+
+    # Suntingan dibuang jika isi tabel asal berubah (mis. setelah Perbarui Nilai)
+    sidik = _sidik(penuh)
+    simpanan = st.session_state.get(f"{key}_suntingan")
+    if simpanan is None or simpanan["sidik"] != sidik:
+        simpanan = st.session_state[f"{key}_suntingan"] = {"sidik": sidik, "baris": {}}
+    suntingan = simpanan["baris"]
+
+    awal, akhir = _halaman(key, len(penuh), ukuran)
+    potongan = _terapkan(penuh.iloc[awal:akhir], suntingan).assign(**{KOLOM_BARIS: range(awal, akhir)})
+    respons = _render(nama, potongan, key=key, **kwargs)
+
+    # Respons bisa berasal dari halaman lain (nilai komponen terakhir); posisi tetap benar lewat KOLOM_BARIS
+    data = pd.DataFrame(respons["data"])
+    if KOLOM_BARIS in data.columns:
+        asli = penuh[kolom_sunting]
+        for pos, nilai in zip(data[KOLOM_BARIS].astype(int), data[kolom_sunting].itertuples(index=False)):
+            if not 0 <= pos < len(penuh):
+                continue
+            if all(a == b or (pd.isna(a) and pd.isna(b)) for a, b in zip(nilai, asli.iloc[pos])):
+                suntingan.pop(pos, None)
+            else:
+                suntingan[pos] = dict(zip(kolom_sunting, nilai))
+    return _terapkan(penuh, suntingan)
@@ -0,0 +1,357 @@
+
+__author__ = "irr"
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from analitik import NILAI_MAP, hitung_analitik, semester_sort_key
+
+# ==============================================================================
+# GUDANG KOHORT (Parquet, dipartisi angkatan / semester)
+# ==============================================================================
+# Tata letak:
+#   <root>/manifest.json
+#   <root>/baris/angkatan=2021/semester=2023%2F2024%20Ganjil/b000007.parquet
+#
+# Setiap baris = satu baris transkrip ditambah NIM, angkatan dan penanda dari
+# pipeline satu mahasiswa (hitung_analitik): dinilai (bernilai dan bukan E),
+# terbaik (baris nilai terbaik untuk MK yang diulang) dan berjalan (*BT).
+# manifest.json berisi versi gudang, daftar berkas beserta Kode MA / NIM di
+# dalamnya (indeks), batch terakhir tiap NIM, dan riwayat jenis tiap batch
+# (tambah / ganti / kompaksi) untuk pembaca yang memperbarui diri secara
+# inkremental. Menambahkan ulang NIM yang sama menggantikan baris lamanya
+# (baris batch lama diabaikan saat dibaca dan dibuang saat kompaksi).
+# Gudang mengasumsikan satu penulis.
+GUDANG_ROOT = os.environ.get("DASHBOARD_GUDANG", "data/gudang")
+UKURAN_ROW_GROUP = 4096
+
+SKEMA = pa.schema([
+    ("NIM", pa.string()),
+    ("angkatan", pa.int16()),
+    ("Semester", pa.string()),
+    ("Kode MA", pa.string()),
+    ("Nama Mata Ajar", pa.string()),
+    ("SKS", pa.int16()),
+    ("Nilai", pa.string()),
+    ("Bobot_numeric", pa.float64()),
+    ("dinilai", pa.bool_()),
+    ("terbaik", pa.bool_()),
+    ("berjalan", pa.bool_()),
+    ("batch", pa.int32()),
+])
+KOLOM_TRANSKRIP = ["Semester", "Kode MA", "Nama Mata Ajar", "SKS", "Nilai", "Bobot"]
+
+
+def tahun_angkatan(semester):
+    """Tahun masuk = tahun semester paling awal di transkrip."""
+    tahun = min(semester_sort_key(s)[0] for s in semester)
+    return None if tahun == 9999 else tahun
+
+
+def baris_gudang(nim, df):
+    """Baris transkrip satu mahasiswa dalam skema gudang (tanpa kolom batch)."""
+    analitik = hitung_analitik(df)
+    transkrip = analitik["transkrip"]
+    baris = pd.DataFrame({
+        "NIM": str(nim),
+        "angkatan": tahun_angkatan(transkrip["Semester"]),
+        "Semester": transkrip["Semester"].astype(str),
+        "Kode MA": transkrip["Kode MA"].astype(str),
+        "Nama Mata Ajar": transkrip["Nama Mata Ajar"].astype(str),
+        "SKS": pd.to_numeric(transkrip["SKS"], errors="coerce").fillna(0).astype("int16"),
+        "Nilai": transkrip["Nilai"].astype(str),
+        "Bobot_numeric": transkrip["Bobot_numeric"].astype(float),
+        "dinilai": transkrip.index.isin(analitik["graded"].index),
+        "terbaik": transkrip.index.isin(analitik["unique_graded"].index),
+        "berjalan": transkrip.index.isin(analitik["ongoing"].index),
+    })
+    return baris.reset_index(drop=True)
+
+
+def _siapkan_dari_file(path):
+    from kohort import baca_transkrip
+
+    nim, df = baca_transkrip(path)
+    return baris_gudang(nim, df)
+
+
+class Gudang:
+    """Penyimpanan kohort berbasis Parquet dengan indeks Kode MA dan NIM."""
+
+    def __init__(self, root=GUDANG_ROOT):
+        self.root = Path(root)
+        self._kunci = threading.Lock()
+        self._muat_manifest()
+
+    # --------------------------------------------------------------------------
+    # Manifest dan indeks
+    # --------------------------------------------------------------------------
+    def _muat_manifest(self):
+        path = self.root / "manifest.json"
+        self._mtime = path.stat().st_mtime_ns if path.exists() else None
+        self.manifest = json.loads(path.read_text()) if path.exists() else {"versi": 0, "berkas": {}, "nim": {}}
+        self.manifest.setdefault("riwayat", {})
+        self._indeks_kode, self._indeks_nim = {}, {}
+        for berkas, info in self.manifest["berkas"].items():
+            for kode in info["kode"]:
+                self._indeks_kode.setdefault(kode, set()).add(berkas)
+            for nim in info["nim"]:
+                self._indeks_nim.setdefault(nim, set()).add(berkas)
+
+    def _simpan_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        sementara = self.root / f"manifest.json.{os.getpid()}.tmp"
+        sementara.write_text(json.dumps(self.manifest))
+        os.replace(sementara, self.root / "manifest.json")
+        self._mtime = (self.root / "manifest.json").stat().st_mtime_ns
+
+    def muat_ulang(self):
+        """Membaca ulang manifest jika diubah proses lain (mis. CLI tambah); True jika berubah."""
+        path = self.root / "manifest.json"
+        mtime = path.stat().st_mtime_ns if path.exists() else None
+        if mtime == self._mtime:
+            return False
+        with self._kunci:
+            self._muat_manifest()
+        return True
+
+    @property
+    def versi(self):
+        """Naik setiap kali isi gudang berubah; dipakai sebagai kunci cache analitik kohort."""
+        return self.manifest["versi"]
+
+    def daftar_nim(self, angkatan=None):
+        return sorted(
+            nim for nim, info in self.manifest["nim"].items()
+            if angkatan is None or info["angkatan"] == angkatan
+        )
+
+    # --------------------------------------------------------------------------
+    # Penulisan
+    # --------------------------------------------------------------------------
+    def tambah(self, bagian):
+        """
+        Menambahkan baris hasil baris_gudang (satu DataFrame atau daftar
+        DataFrame) sebagai satu batch. Mengembalikan jumlah mahasiswa.
+        """
+        baris = pd.concat(bagian, ignore_index=True) if isinstance(bagian, (list, tuple)) else bagian
+        if baris.empty:
+            return 0
+
+        with self._kunci:
+            batch = self.manifest["versi"] + 1
+            baris = baris.assign(batch=batch)
+            berkas_nim = {}
+            for (angkatan, semester), grup in baris.groupby(["angkatan", "Semester"], dropna=False, sort=False):
+                relatif = (
+                    f"baris/angkatan={'' if pd.isna(angkatan) else int(angkatan)}"
+                    f"/semester={quote(str(semester), safe='')}/b{batch:06d}.parquet"
+                )
+                path = self.root / relatif
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Urut Kode MA lalu NIM agar statistik row group bisa memangkas pembacaan per MK
+                grup = grup.sort_values(["Kode MA", "NIM"], kind="stable")
+                pq.write_table(
+                    pa.Table.from_pandas(grup, schema=SKEMA, preserve_index=False),
+                    path,
+                    row_group_size=UKURAN_ROW_GROUP,
+                )
+                kode, nim = sorted(grup["Kode MA"].unique()), sorted(grup["NIM"].unique())
+                self.manifest["berkas"][relatif] = {"kode": kode, "nim": nim, "baris": len(grup)}
+                for k in kode:
+                    self._indeks_kode.setdefault(k, set()).add(relatif)
+                for n in nim:
+                    berkas_nim.setdefault(n, set()).add(relatif)
+
+            per_nim = baris.groupby("NIM")["angkatan"].first()
+            diganti = any(nim in self.manifest["nim"] for nim in per_nim.index)
+            self.manifest["riwayat"][str(batch)] = "ganti" if diganti else "tambah"
+            for nim, angkatan in per_nim.items():
+                self._indeks_nim[nim] = berkas_nim[nim]  # berkas batch lama untuk NIM ini tidak lagi relevan
+                self.manifest["nim"][nim] = {
+                    "angkatan": None if pd.isna(angkatan) else int(angkatan),
+                    "batch": batch,
+                }
+            self.manifest["versi"] = batch
+            self._simpan_manifest()
+        return len(per_nim)
+
+    def tambah_transkrip(self, transkrip):
+        """transkrip: dict {nim: df} atau iterable (nim, df) dengan format st.session_state.df."""
+        items = transkrip.items() if isinstance(transkrip, dict) else transkrip
+        return self.tambah([baris_gudang(nim, df) for nim, df in items])
+
+    def tambah_kohort(self, kohort):
+        """DataFrame panjang berkolom NIM + kolom transkrip (format generator.buat_kohort)."""
+        return self.tambah_transkrip((nim, df.drop(columns="NIM")) for nim, df in kohort.groupby("NIM", sort=False))
+
+    def tambah_folder(self, paths, proses=None):
+        """Membaca file transkrip secara paralel lalu menambahkannya sebagai satu batch."""
+        with ProcessPoolExecutor(max_workers=proses) as executor:
+            bagian = list(executor.map(_siapkan_dari_file, paths, chunksize=max(1, len(paths) // 64)))
+        return self.tambah(bagian)
+
+    def kompaksi(self):
+        """Menggabungkan berkas per partisi menjadi satu dan membuang baris batch lama."""
+        with self._kunci:
+            per_partisi = {}
+            for relatif in self.manifest["berkas"]:
+                per_partisi.setdefault(relatif.rsplit("/", 1)[0], []).append(relatif)
+
+            batch = self.manifest["versi"] + 1
+            berkas_baru = {}
+            for partisi, daftar in per_partisi.items():
+                df = self._saring_batch(ds.dataset([str(self.root / b) for b in daftar], schema=SKEMA).to_table().to_pandas())
+                if len(df):
+                    df = df.sort_values(["Kode MA", "NIM"], kind="stable")
+                    relatif = f"{partisi}/b{batch:06d}.parquet"
+                    pq.write_table(
+                        pa.Table.from_pandas(df, schema=SKEMA, preserve_index=False),
+                        self.root / relatif,
+                        row_group_size=UKURAN_ROW_GROUP,
+                    )
+                    berkas_baru[relatif] = {
+                        "kode": sorted(df["Kode MA"].unique()),
+                        "nim": sorted(df["NIM"].unique()),
+                        "baris": len(df),
+                    }
+
+            lama = list(self.manifest["berkas"])
+            self.manifest["berkas"] = berkas_baru
+            self.manifest["riwayat"][str(batch)] = "kompaksi"
+            self.manifest["versi"] = batch
+            self._simpan_manifest()
+            for relatif in lama:
+                (self.root / relatif).unlink(missing_ok=True)
+            self._muat_manifest()
+
+    # --------------------------------------------------------------------------
+    # Pembacaan
+    # --------------------------------------------------------------------------
+    def _berkas(self, kode=None, nim=None, angkatan=None, semester=None):
+        """Berkas kandidat dari indeks dan partisi, tanpa membuka Parquet."""
+        kandidat = set(self.manifest["berkas"])
+        if kode is not None:
+            kandidat &= set().union(*(self._indeks_kode.get(k, set()) for k in _daftar(kode)))
+        if nim is not None:
+            kandidat &= set().union(*(self._indeks_nim.get(n, set()) for n in _daftar(nim)))
+        if angkatan is not None:
+            awalan = tuple(f"baris/angkatan={a}/" for a in _daftar(angkatan))
+            kandidat = {b for b in kandidat if b.startswith(awalan)}
+        if semester is not None:
+            segmen = tuple(f"/semester={quote(s, safe='')}/" for s in _daftar(semester))
+            kandidat = {b for b in kandidat if any(s in b for s in segmen)}
+        return sorted(kandidat)
+
+    def _saring_batch(self, df):
+        """Membuang baris dari batch lama milik NIM yang sudah ditambahkan ulang."""
+        if df.empty:
+            return df
+        terbaru = df["NIM"].map({nim: info["batch"] for nim, info in self.manifest["nim"].items()})
+        return df[df["batch"] == terbaru].reset_index(drop=True)
+
+    def baca(self, kode=None, nim=None, angkatan=None, semester=None, kolom=None, filter_tambahan=None):
+        """Baris gudang yang cocok; hanya berkas dari indeks/partisi yang dibuka."""
+        berkas = self._berkas(kode, nim, angkatan, semester)
+        kolom_baca = None if kolom is None else list(dict.fromkeys([*kolom, "NIM", "batch"]))
+        if not berkas:
+            return SKEMA.empty_table().to_pandas()[kolom] if kolom else SKEMA.empty_table().to_pandas()
+
+        saring = None
+        for nama, nilai in (("Kode MA", kode), ("NIM", nim), ("Semester", semester)):
+            if nilai is not None:
+                f = ds.field(nama).isin(_daftar(nilai))
+                saring = f if saring is None else saring & f
+        if filter_tambahan is not None:
+            saring = filter_tambahan if saring is None else saring & filter_tambahan
+
+        tabel = ds.dataset([str(self.root / b) for b in berkas], schema=SKEMA).to_table(
+            columns=kolom_baca, filter=saring
+        )
+        df = self._saring_batch(tabel.to_pandas())
+        return df[kolom] if kolom else df
+
+    def riwayat_sejak(self, versi):
+        """[(batch, jenis)] untuk batch setelah versi tertentu, urut naik."""
+        return sorted(
+            (int(b), jenis) for b, jenis in self.manifest["riwayat"].items() if int(b) > versi
+        )
+
+    def baca_batch(self, batch, kolom=None):
+        """Semua baris yang ditulis oleh satu batch (tanpa penyaringan batch lama)."""
+        berkas = [b for b in self.manifest["berkas"] if b.endswith(f"/b{batch:06d}.parquet")]
+        if not berkas:
+            return SKEMA.empty_table().to_pandas()[kolom] if kolom else SKEMA.empty_table().to_pandas()
+        return ds.dataset([str(self.root / b) for b in berkas], schema=SKEMA).to_table(columns=kolom).to_pandas()
+
+    def transkrip(self, nim):
+        """Transkrip satu mahasiswa dalam format st.session_state.df."""
+        df = self.baca(nim=nim)
+        df = df.sort_values("Semester", key=lambda s: s.map(semester_sort_key), kind="stable")
+        df["Bobot"] = df["Bobot_numeric"].astype(object).where(df["Bobot_numeric"].notna(), "*BT")
+        return df[KOLOM_TRANSKRIP].reset_index(drop=True)
+
+    def distribusi_nilai(self, kode, semester=None, angkatan=None):
+        """Jumlah tiap huruf NILAI_MAP untuk satu MK (semua percobaan di semester tsb.)."""
+        df = self.baca(kode=kode, semester=semester, angkatan=angkatan, kolom=["Nilai"])
+        return df["Nilai"].value_counts().reindex(list(NILAI_MAP), fill_value=0)
+
+    def belum_lulus(self, kode, angkatan=None):
+        """NIM yang belum lulus MK tsb. (belum pernah dinilai selain E)."""
+        lulus = self.baca(kode=kode, angkatan=angkatan, kolom=["NIM"], filter_tambahan=ds.field("dinilai"))
+        return sorted(set(self.daftar_nim(angkatan)) - set(lulus["NIM"]))
+
+
+def _daftar(nilai):
+    return list(nilai) if isinstance(nilai, (list, tuple, set, frozenset)) else [nilai]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gudang kohort Parquet")
+    parser.add_argument("--root", default=GUDANG_ROOT)
+    sub = parser.add_subparsers(dest="perintah", required=True)
+
+    p = sub.add_parser("tambah", help="menambahkan folder transkrip (.xlsx/.csv/.html)")
+    p.add_argument("folder")
+    p.add_argument("--proses", type=int, default=None)
+    sub.add_parser("kompaksi", help="menggabungkan berkas dan membuang baris lama")
+    p = sub.add_parser("distribusi", help="distribusi nilai satu MK")
+    p.add_argument("kode")
+    p.add_argument("--semester")
+    p.add_argument("--angkatan", type=int)
+    p = sub.add_parser("belum-lulus", help="NIM yang belum lulus satu MK")
+    p.add_argument("kode")
+    p.add_argument("--angkatan", type=int)
+    args = parser.parse_args(argv)
+
+    gudang = Gudang(args.root)
+    mulai = time.perf_counter()
+    if args.perintah == "tambah":
+        from kohort import cari_transkrip
+
+        jumlah = gudang.tambah_folder(cari_transkrip(args.folder), args.proses)
+        print(f"{jumlah} mahasiswa ditambahkan (versi {gudang.versi})", file=sys.stderr)
+    elif args.perintah == "kompaksi":
+        gudang.kompaksi()
+        print(f"{len(gudang.manifest['berkas'])} berkas setelah kompaksi", file=sys.stderr)
+    elif args.perintah == "distribusi":
+        print(gudang.distribusi_nilai(args.kode, args.semester, args.angkatan).to_string())
+    else:
+        print("\n".join(gudang.belum_lulus(args.kode, args.angkatan)))
+    print(f"({(time.perf_counter() - mulai) * 1000:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
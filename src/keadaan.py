@@ -0,0 +1,426 @@
+
+__author__ = "irr"
+
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from analitik import hitung_analitik
+from metrik import catat_cache
+
+try:
+    import redis
+except ImportError:  # opsional: hanya untuk DASHBOARD_STATE=redis://...
+    redis = None
+
+# ==============================================================================
+# BACKEND STATE KLIEN
+# ==============================================================================
+# Bagian st.session_state yang menentukan tampilan (status login, transkrip,
+# suntingan simulasi, target sniper, ...) disalin ke backend bersama dengan
+# kunci id klien dari cookie HttpOnly COOKIE_KLIEN. Cookie itu diterbitkan oleh
+# reverse proxy di depan aplikasi (mis. modul userid nginx) sehingga tidak
+# pernah muncul di URL; backend hanya melihat hash-nya. Proses mana pun yang
+# menerima klien itu, termasuk setelah muat ulang halaman atau koneksi pindah
+# node di belakang load balancer biasa, memulihkan state dari backend sebelum
+# skrip membacanya. Tanpa cookie itu tidak ada yang disalin.
+#
+#   DASHBOARD_STATE=memori                  bawaan; satu proses, tanpa salinan
+#   DASHBOARD_STATE=sqlite:/path/state.db   beberapa proses di satu node
+#   DASHBOARD_STATE=redis://host:6379/0     beberapa node (paket redis, atau
+#                                           server lain yang kompatibel Redis)
+#
+# Backend memori tidak menyalin state klien: session_state proses ini sudah
+# memegangnya, dan salinan kedua hanya menambah memori di luar anggaran sesi
+# (sesi.py). Isi backend memori yang tersisa (hasil analitik bersama) ikut
+# dihitung dalam anggaran itu lewat ukuran_backend().
+#
+# Cookie portal, token login dan captcha tidak pernah disalin; klien yang
+# dipulihkan di proses lain login ulang ke portal sebelum memakai portal
+# (Perbarui Nilai, KRS Sniper).
+#
+# DataFrame disimpan sebagai Arrow IPC (zstd), nilai kecil lain di-pickle.
+# Hasil hitung_analitik disimpan sekali per sidik transkrip
+# (analitik_transkrip), sehingga proses lain memakai ulang hasilnya.
+STATE = os.environ.get("DASHBOARD_STATE", "memori")
+TTL = int(os.environ.get("DASHBOARD_STATE_TTL", "86400") or 86400)  # detik sejak tulis terakhir
+COOKIE_KLIEN = os.environ.get("DASHBOARD_STATE_COOKIE", "dashboard_sid")
+MAKS_BERKAS_MEMORI = 64  # hasil analitik yang disimpan backend memori (LRU)
+
+KUNCI_SINKRON = (
+    "logged_in", "df", "user_info", "trans_url", "program", "grid_key_counter",
+    "sniper_targets", "sniper_interval",
+)
+POLA_SINKRON = re.compile(r"^transcript_grid_\d+_suntingan$")  # suntingan grid simulasi
+KUNCI_KLIEN = "_klien"  # {"sid", "versi", "penanda"} milik proses ini
+VERSI = "_versi"  # entri backend yang berubah di setiap penulisan
+
+_POLA_COOKIE = re.compile(r"^[A-Za-z0-9_=+/.-]{16,256}$")
+
+
+# ==============================================================================
+# SERIALISASI
+# ==============================================================================
+def ke_bytes(nilai):
+    """Satu nilai session_state -> bytes berawalan penanda jenis (A: Arrow, P: pickle)."""
+    if isinstance(nilai, pd.DataFrame):
+        try:
+            tabel = pa.Table.from_pandas(nilai, preserve_index=True)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, tabel.schema, options=pa.ipc.IpcWriteOptions(compression="zstd")) as w:
+                w.write_table(tabel)
+            return b"A" + sink.getvalue().to_pybytes()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass  # kolom campuran (mis. Bobot angka + "*BT"): disimpan apa adanya
+    return b"P" + pickle.dumps(nilai, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def dari_bytes(data):
+    jenis, isi = data[:1], data[1:]
+    if jenis == b"A":
+        tabel = pa.ipc.open_stream(isi).read_all()
+        df = tabel.to_pandas()
+        # Kolom object berisi angka saja kembali jadi float64; dtype asal ada di metadata pandas
+        asal = {k["name"]: k["numpy_type"] for k in tabel.schema.pandas_metadata["columns"]}
+        objek = [k for k in df.columns if asal.get(k) == "object" and df[k].dtype != object]
+        return df.astype(dict.fromkeys(objek, object)) if objek else df
+    return pickle.loads(isi)
+
+
+def _penanda(nilai, data=None):
+    """Penanda perubahan: identitas objek untuk DataFrame (diganti, tidak dimutasi), selain itu hash isi."""
+    if isinstance(nilai, pd.DataFrame):
+        return f"id:{id(nilai)}:{len(nilai)}"
+    return hashlib.blake2b(data if data is not None else ke_bytes(nilai), digest_size=16).hexdigest()
+
+
+def sidik_transkrip(df):
+    """Sidik isi transkrip (kolom + nilai, tanpa indeks) sebagai kunci hasil analitik."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update("\x1f".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# ==============================================================================
+# BACKEND
+# ==============================================================================
+# Antarmuka yang sama untuk ketiganya:
+#   baca_sesi(sid) -> {kunci: bytes}      tulis_sesi(sid, {kunci: bytes})
+#   baca_versi(sid) -> bytes | None       hapus_sesi(sid)
+#   baca(kunci) -> bytes | None           tulis(kunci, bytes)
+#   baca_tetap(kunci) -> bytes | None     tulis_tetap(kunci, bytes)
+# baca/tulis adalah cache (LRU di memori, TTL di sqlite/redis); *_tetap untuk
+# data milik pengguna (skenario simulasi) yang tidak boleh digusur atau kedaluwarsa.
+class BackendMemori:
+    def __init__(self):
+        self._sesi = {}  # sid -> ({kunci: bytes}, kedaluwarsa)
+        self._berkas = OrderedDict()
+        self._tetap = {}
+        self._kunci = threading.Lock()
+        self._disapu = 0.0
+
+    def baca_sesi(self, sid):
+        with self._kunci:
+            isi, kedaluwarsa = self._sesi.get(sid, ({}, 0))
+            if kedaluwarsa < time.time():
+                self._sesi.pop(sid, None)
+                return {}
+            return dict(isi)
+
+    def baca_versi(self, sid):
+        return self.baca_sesi(sid).get(VERSI)
+
+    def tulis_sesi(self, sid, isi):
+        sekarang = time.time()
+        with self._kunci:
+            lama, _ = self._sesi.get(sid, ({}, 0))
+            self._sesi[sid] = ({**lama, **isi}, sekarang + TTL)
+            if sekarang - self._disapu > 60:  # klien yang tidak kembali dibuang setelah TTL
+                self._disapu = sekarang
+                for s in [s for s, (_, kedaluwarsa) in self._sesi.items() if kedaluwarsa < sekarang]:
+                    del self._sesi[s]
+
+    def hapus_sesi(self, sid):
+        with self._kunci:
+            self._sesi.pop(sid, None)
+
+    def baca(self, kunci):
+        with self._kunci:
+            if kunci in self._berkas:
+                self._berkas.move_to_end(kunci)
+            return self._berkas.get(kunci)
+
+    def tulis(self, kunci, data):
+        with self._kunci:
+            self._berkas[kunci] = data
+            self._berkas.move_to_end(kunci)
+            while len(self._berkas) > MAKS_BERKAS_MEMORI:
+                self._berkas.popitem(last=False)
+
+    def baca_tetap(self, kunci):
+        with self._kunci:
+            return self._tetap.get(kunci)
+
+    def tulis_tetap(self, kunci, data):
+        with self._kunci:
+            self._tetap[kunci] = data
+
+    def ukuran(self):
+        """Perkiraan byte yang dipegang backend ini."""
+        with self._kunci:
+            return sum(len(d) for d in self._berkas.values()) + sum(len(d) for d in self._tetap.values()) + sum(
+                len(d) for isi, _ in self._sesi.values() for d in isi.values()
+            )
+
+
+class BackendSqlite:
+    """Satu berkas SQLite (mode WAL) yang dibagi semua proses di satu node; satu koneksi per thread."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lokal = threading.local()
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sesi (sid TEXT, kunci TEXT, data BLOB, kedaluwarsa REAL,"
+                " PRIMARY KEY (sid, kunci))"
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS berkas (kunci TEXT PRIMARY KEY, data BLOB, kedaluwarsa REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS tetap (kunci TEXT PRIMARY KEY, data BLOB)")
+
+    def _db(self):
+        db = getattr(self._lokal, "db", None)
+        if db is None:
+            db = self._lokal.db = sqlite3.connect(self.path, timeout=10)
+        return db
+
+    def baca_sesi(self, sid):
+        baris = self._db().execute(
+            "SELECT kunci, data FROM sesi WHERE sid = ? AND kedaluwarsa >= ?", (sid, time.time())
+        ).fetchall()
+        return dict(baris)
+
+    def baca_versi(self, sid):
+        baris = self._db().execute(
+            "SELECT data FROM sesi WHERE sid = ? AND kunci = ? AND kedaluwarsa >= ?", (sid, VERSI, time.time())
+        ).fetchone()
+        return baris[0] if baris else None
+
+    def tulis_sesi(self, sid, isi):
+        kedaluwarsa = time.time() + TTL
+        with self._db() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO sesi VALUES (?, ?, ?, ?)",
+                [(sid, kunci, data, kedaluwarsa) for kunci, data in isi.items()],
+            )
+            db.execute("UPDATE sesi SET kedaluwarsa = ? WHERE sid = ?", (kedaluwarsa, sid))
+            db.execute("DELETE FROM sesi WHERE kedaluwarsa < ?", (time.time(),))
+
+    def hapus_sesi(self, sid):
+        with self._db() as db:
+            db.execute("DELETE FROM sesi WHERE sid = ?", (sid,))
+
+    def baca(self, kunci):
+        baris = self._db().execute(
+            "SELECT data FROM berkas WHERE kunci = ? AND kedaluwarsa >= ?", (kunci, time.time())
+        ).fetchone()
+        return baris[0] if baris else None
+
+    def tulis(self, kunci, data):
+        with self._db() as db:
+            db.execute("INSERT OR REPLACE INTO berkas VALUES (?, ?, ?)", (kunci, data, time.time() + TTL))
+            db.execute("DELETE FROM berkas WHERE kedaluwarsa < ?", (time.time(),))
+
+    def baca_tetap(self, kunci):
+        baris = self._db().execute("SELECT data FROM tetap WHERE kunci = ?", (kunci,)).fetchone()
+        return baris[0] if baris else None
+
+    def tulis_tetap(self, kunci, data):
+        with self._db() as db:
+            db.execute("INSERT OR REPLACE INTO tetap VALUES (?, ?)", (kunci, data))
+
+
+class BackendRedis:
+    """Hash per klien (dashboard:sesi:<sid>) dan string per hasil analitik dengan TTL; dashboard:tetap:* tanpa TTL."""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("DASHBOARD_STATE=redis://... membutuhkan paket redis (pip install redis)")
+        self._r = redis.Redis.from_url(url)
+
+    def baca_sesi(self, sid):
+        return {k.decode(): v for k, v in self._r.hgetall(f"dashboard:sesi:{sid}").items()}
+
+    def baca_versi(self, sid):
+        return self._r.hget(f"dashboard:sesi:{sid}", VERSI)
+
+    def tulis_sesi(self, sid, isi):
+        with self._r.pipeline() as p:
+            p.hset(f"dashboard:sesi:{sid}", mapping=isi)
+            p.expire(f"dashboard:sesi:{sid}", TTL)
+            p.execute()
+
+    def hapus_sesi(self, sid):
+        self._r.delete(f"dashboard:sesi:{sid}")
+
+    def baca(self, kunci):
+        return self._r.get(f"dashboard:berkas:{kunci}")
+
+    def tulis(self, kunci, data):
+        self._r.set(f"dashboard:berkas:{kunci}", data, ex=TTL)
+
+    def baca_tetap(self, kunci):
+        return self._r.get(f"dashboard:tetap:{kunci}")
+
+    def tulis_tetap(self, kunci, data):
+        self._r.set(f"dashboard:tetap:{kunci}", data)
+
+
+def buat_backend(spesifikasi=STATE):
+    """Backend dari string DASHBOARD_STATE."""
+    if spesifikasi.startswith("sqlite:"):
+        return BackendSqlite(spesifikasi[len("sqlite:"):])
+    if spesifikasi.startswith(("redis://", "rediss://", "unix://")):
+        return BackendRedis(spesifikasi)
+    if spesifikasi in ("", "memori"):
+        return BackendMemori()
+    raise ValueError(f"DASHBOARD_STATE tidak dikenal: {spesifikasi!r}")
+
+
+_backend = None
+_kunci_backend = threading.Lock()
+
+
+def backend():
+    """Backend bersama per proses (dibuat saat pertama dipakai)."""
+    global _backend
+    if _backend is None:
+        with _kunci_backend:
+            if _backend is None:
+                _backend = buat_backend()
+    return _backend
+
+
+def ukuran_backend():
+    """Byte yang dipegang backend di memori proses ini (0 untuk sqlite/redis)."""
+    return _backend.ukuran() if isinstance(_backend, BackendMemori) else 0
+
+
+# ==============================================================================
+# ANALITIK BERSAMA PER SIDIK TRANSKRIP
+# ==============================================================================
+def _analitik_ke_bytes(analitik):
+    return pickle.dumps({nama: ke_bytes(df) for nama, df in analitik.items()}, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _analitik_dari_bytes(data):
+    return {nama: dari_bytes(isi) for nama, isi in pickle.loads(data).items()}
+
+
+def simpan_analitik(df, analitik):
+    backend().tulis(f"analitik:{sidik_transkrip(df)}", _analitik_ke_bytes(analitik))
+
+
+def analitik_transkrip(df):
+    """hitung_analitik(df) lewat backend: dipakai ulang jika proses mana pun sudah menghitungnya."""
+    data = backend().baca(f"analitik:{sidik_transkrip(df)}")
+    catat_cache("analitik_bersama", data is not None)
+    if data is not None:
+        return _analitik_dari_bytes(data)
+    analitik = hitung_analitik(df)
+    simpan_analitik(df, analitik)
+    return analitik
+
+
+# ==============================================================================
+# SINKRONISASI SESSION_STATE
+# ==============================================================================
+def _kunci_tersinkron(state):
+    return [k for k in list(state.keys()) if k in KUNCI_SINKRON or POLA_SINKRON.match(k)]
+
+
+def id_klien():
+    """
+    Id klien di backend: hash cookie COOKIE_KLIEN yang diterbitkan server, atau
+    None jika cookie itu tidak ada atau backend-nya memori, sehingga tidak ada
+    state yang disalin.
+    """
+    if isinstance(backend(), BackendMemori):
+        return None
+    token = st.context.cookies.get(COOKIE_KLIEN)
+    if not token or not _POLA_COOKIE.match(token):
+        return None
+    return hashlib.blake2b(token.encode(), digest_size=20, person=b"dashboard-klien").hexdigest()
+
+
+def pulihkan_klien():
+    """
+    Dipanggil di awal setiap rerun: memuat state dari backend jika proses ini
+    belum punya state klien itu atau proses lain sudah menulis versi yang
+    lebih baru.
+    """
+    sid = id_klien()
+    if sid is None:
+        st.session_state.pop(KUNCI_KLIEN, None)
+        return
+
+    klien = st.session_state.get(KUNCI_KLIEN)
+    if klien is not None and klien["sid"] == sid and backend().baca_versi(sid) == klien["versi"]:
+        return
+    isi = backend().baca_sesi(sid)
+    versi = isi.pop(VERSI, None)
+    penanda = {}
+    for kunci in _kunci_tersinkron(isi):  # entri lama di luar KUNCI_SINKRON (mis. cookie portal) diabaikan
+        data = isi[kunci]
+        st.session_state[kunci] = nilai = dari_bytes(data)
+        penanda[kunci] = _penanda(nilai, data if data[:1] == b"P" else None)
+    st.session_state[KUNCI_KLIEN] = {"sid": sid, "versi": versi, "penanda": penanda}
+    if isi:
+        st.session_state.pop("analitik", None)  # dihitung ulang (atau diambil dari backend) untuk transkrip ini
+
+
+def simpan_klien():
+    """
+    Dipanggil di akhir rerun: menulis kunci tersinkron yang berubah sejak
+    penulisan terakhir. Dilewati selama transkrip masih dimuat di latar
+    (lihat latar.py); klien yang pindah proses saat itu kembali ke form login.
+    """
+    klien = st.session_state.get(KUNCI_KLIEN)
+    if klien is None or "muat" in st.session_state:
+        return
+    berubah = {}
+    for kunci in _kunci_tersinkron(st.session_state):
+        nilai = st.session_state[kunci]
+        if isinstance(nilai, pd.DataFrame):
+            penanda = _penanda(nilai)
+            if klien["penanda"].get(kunci) != penanda:
+                berubah[kunci] = ke_bytes(nilai)
+        else:
+            data = ke_bytes(nilai)
+            penanda = _penanda(nilai, data)
+            if klien["penanda"].get(kunci) != penanda:
+                berubah[kunci] = data
+        klien["penanda"][kunci] = penanda
+    if berubah:
+        klien["versi"] = berubah[VERSI] = uuid.uuid4().bytes
+        backend().tulis_sesi(klien["sid"], berubah)
+
+
+def hapus_klien():
+    """Logout: state klien di backend dihapus agar tidak dipulihkan lagi."""
+    klien = st.session_state.get(KUNCI_KLIEN)
+    if klien is not None:
+        backend().hapus_sesi(klien["sid"])
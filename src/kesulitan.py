@@ -0,0 +1,179 @@
+
+__author__ = "irr"
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from analitik import NILAI_MAP
+from gudang import Gudang, GUDANG_ROOT, SKEMA
+
+# ==============================================================================
+# KESULITAN & KELULUSAN MATA KULIAH (seluruh gudang kohort)
+# ==============================================================================
+# Agregasi dibagi per (angkatan, pecahan NIM): semua semester seorang mahasiswa
+# ada di angkatan yang sama, sehingga hitungan pengulangan bisa diselesaikan di
+# dalam satu tugas. Tiap tugas mengembalikan hitungan parsial yang kemudian
+# dijumlahkan, jadi skalanya linear terhadap jumlah mahasiswa dan core.
+# Pool proses hanya dipakai dari CLI (main) dan selalu dengan start method
+# "spawn": fork dari server Streamlit yang multithread bisa mewarisi lock
+# yang sedang dipegang thread lain. Di dalam server (kesulitan_gudang)
+# agregasi berjalan di thread pemanggil.
+HURUF = list(NILAI_MAP)
+KOLOM = ["NIM", "Semester", "Kode MA", "Nilai", "batch"]
+MIN_NIM_PER_TUGAS = 2000
+
+
+def _agregasi_tugas(berkas, nim_batch):
+    """
+    Hitungan parsial untuk satu tugas:
+    - (Kode MA, Tahun, Nilai) -> jumlah percobaan
+    - Kode MA -> jumlah mahasiswa dan jumlah yang mengulang (>1 percobaan bernilai)
+    """
+    df = ds.dataset(berkas, schema=SKEMA).to_table(
+        columns=KOLOM, filter=ds.field("NIM").isin(list(nim_batch))
+    ).to_pandas()
+    df = df[df["batch"] == df["NIM"].map(nim_batch)]  # baris batch lama diabaikan
+    df = df[df["Nilai"].isin(HURUF)]
+
+    df["Tahun"] = df["Semester"].str.split(" ").str[0]
+    hitungan = df.groupby(["Kode MA", "Tahun", "Nilai"]).size().rename("jumlah").reset_index()
+
+    percobaan = df.groupby(["Kode MA", "NIM"]).size()
+    ulang = (
+        percobaan.groupby(level="Kode MA")
+        .agg(mahasiswa="size", mengulang=lambda s: int((s > 1).sum()))
+        .reset_index()
+    )
+    return hitungan, ulang
+
+
+def bagi_tugas(gudang, proses):
+    """[(berkas, {nim: batch})] per angkatan, dipecah lagi menurut NIM bila angkatan besar."""
+    per_angkatan = {}
+    for nim, info in gudang.manifest["nim"].items():
+        per_angkatan.setdefault(info["angkatan"], {})[nim] = info["batch"]
+
+    tugas = []
+    for angkatan, nim_batch in per_angkatan.items():
+        awalan = f"baris/angkatan={'' if angkatan is None else angkatan}/"
+        berkas = [str(gudang.root / b) for b in gudang.manifest["berkas"] if b.startswith(awalan)]
+        nim = sorted(nim_batch)
+        pecahan = max(1, min(proses, len(nim) // MIN_NIM_PER_TUGAS))
+        for i in range(pecahan):
+            tugas.append((berkas, {n: nim_batch[n] for n in nim[i::pecahan]}))
+    return tugas
+
+
+def hitung_kesulitan(gudang, kurikulum_df, kbk_df, proses=None):
+    """
+    Laporan per mata kuliah kurikulum (wajib + KBK) dan tren per tahun akademik.
+    Mengembalikan (ringkasan_df, tren_df).
+    """
+    proses = proses or os.cpu_count() or 1
+    tugas = bagi_tugas(gudang, proses)
+    if len(tugas) <= 1 or proses == 1:
+        parsial = [_agregasi_tugas(*t) for t in tugas]
+    else:
+        konteks = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(proses, len(tugas)), mp_context=konteks) as executor:
+            parsial = list(executor.map(_agregasi_tugas, *zip(*tugas)))
+
+    kosong = (pd.DataFrame(columns=["Kode MA", "Tahun", "Nilai", "jumlah"]),
+              pd.DataFrame(columns=["Kode MA", "mahasiswa", "mengulang"]))
+    hitungan = pd.concat([p[0] for p in parsial] or [kosong[0]]).groupby(["Kode MA", "Tahun", "Nilai"])["jumlah"].sum()
+    ulang = pd.concat([p[1] for p in parsial] or [kosong[1]]).groupby("Kode MA")[["mahasiswa", "mengulang"]].sum()
+
+    # Distribusi huruf per MK (semua tahun)
+    distribusi = hitungan.groupby(level=["Kode MA", "Nilai"]).sum().unstack("Nilai").reindex(columns=HURUF).fillna(0)
+    percobaan = distribusi.sum(axis=1)
+    bobot = pd.Series(NILAI_MAP)
+
+    kurikulum = pd.concat([
+        kurikulum_df[["Kode", "Mata Kuliah", "SKS"]].assign(Jenis="Wajib"),
+        kbk_df[["Kode", "Mata Kuliah", "SKS"]].assign(Jenis="KBK"),
+    ]).rename(columns={"Kode": "Kode MA"})  # MK tanpa kode ("-") tidak bisa dicocokkan dan tetap kosong
+
+    ringkasan = kurikulum.set_index("Kode MA")
+    ringkasan["Percobaan"] = percobaan.reindex(ringkasan.index).fillna(0).astype(int)
+    ringkasan["Mahasiswa"] = ulang["mahasiswa"].reindex(ringkasan.index).fillna(0).astype(int)
+    for h in HURUF:
+        ringkasan[f"% {h}"] = (100 * distribusi[h] / percobaan).reindex(ringkasan.index)
+    ringkasan["% Mengulang"] = (100 * ulang["mengulang"] / ulang["mahasiswa"]).reindex(ringkasan.index)
+    # Rata-rata bobot per SKS (indeks NILAI_MAP) dari semua percobaan
+    ringkasan["Rata Bobot"] = ((distribusi * bobot[HURUF]).sum(axis=1) / percobaan).reindex(ringkasan.index)
+    ringkasan = ringkasan.reset_index()
+
+    # Tren per tahun akademik
+    per_tahun = hitungan.unstack("Nilai").reindex(columns=HURUF).fillna(0)
+    n = per_tahun.sum(axis=1)
+    tren = pd.DataFrame({
+        "Percobaan": n.astype(int),
+        "Rata Bobot": (per_tahun * bobot[HURUF]).sum(axis=1) / n,
+        "% Lulus": 100 * (n - per_tahun[HURUF[-1]]) / n,
+    }).reset_index()
+    return ringkasan, tren
+
+
+# ==============================================================================
+# CACHE PER PROSES (berlaku sampai isi gudang berubah)
+# ==============================================================================
+_cache = {}  # (root, program) -> {"versi": int, "hasil": (ringkasan, tren)}
+_kunci = threading.Lock()
+
+
+def kesulitan_gudang(gudang, kurikulum_df, kbk_df, program=None):
+    """
+    Hasil hitung_kesulitan yang disimpan per proses dan per program studi.
+    Dihitung ulang hanya jika ada batch tambah/ganti sejak perhitungan terakhir
+    (kompaksi tidak mengubah isi). Perhitungan berjalan tanpa pool proses dan
+    di luar _kunci; dua permintaan serentak paling buruk menghitung dua kali.
+    """
+    gudang.muat_ulang()
+    kunci = (str(gudang.root), program)
+    versi = gudang.versi
+    with _kunci:
+        simpanan = _cache.get(kunci)
+        if simpanan is not None:
+            berubah = [j for _, j in gudang.riwayat_sejak(simpanan["versi"]) if j != "kompaksi"]
+            if not berubah:
+                simpanan["versi"] = versi
+                return simpanan["hasil"]
+    hasil = hitung_kesulitan(gudang, kurikulum_df, kbk_df, proses=1)
+    with _kunci:
+        _cache[kunci] = {"versi": versi, "hasil": hasil}
+    return hasil
+
+
+def main(argv=None):
+    from kurikulum import muat_program
+
+    parser = argparse.ArgumentParser(description="Kesulitan & kelulusan MK untuk seluruh gudang kohort")
+    parser.add_argument("--root", default=GUDANG_ROOT)
+    parser.add_argument("--program", default=None, help="kode program di registri kurikulum (bawaan: program bawaan)")
+    parser.add_argument("--proses", type=int, default=None, help="jumlah proses (bawaan: jumlah core)")
+    parser.add_argument("--keluaran", default=None, help="file ringkasan (.parquet atau .csv); bawaan: cetak")
+    args = parser.parse_args(argv)
+
+    gudang = Gudang(args.root)
+    if not gudang.manifest["nim"]:
+        sys.exit(f"Gudang {args.root} belum ada")
+    program = muat_program(args.program)
+    mulai = time.perf_counter()
+    ringkasan, _ = hitung_kesulitan(gudang, program["wajib"], program["kbk"], args.proses)
+    print(f"{len(gudang.manifest['nim'])} mahasiswa dalam {time.perf_counter() - mulai:.2f} s", file=sys.stderr)
+    if args.keluaran:
+        (ringkasan.to_csv if args.keluaran.lower().endswith(".csv") else ringkasan.to_parquet)(args.keluaran)
+    else:
+        print(ringkasan.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+
+__author__ = "irr"
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from analitik import bagi_ratus, bobot_ratus, hitung_analitik, smart_find_taken_courses, SKS_TARGET_KBK
+from ekspor import PenulisLaporan, bagian_laporan, mk_belum_diambil
+from kurikulum import muat_program
+from normalisasi import KOLOM_KUNCI
+from transkrip import parse_transkrip_html
+
+# ==============================================================================
+# ANALITIK KOHORT (CLI)
+# ==============================================================================
+# Analisis yang sama dengan display_main_app untuk satu folder transkrip sekaligus:
+#
+#   python src/kohort.py data/angkatan2021 --keluaran kohort.parquet --proses 8
+#
+# Transkrip boleh berupa .xlsx / .csv (kolom sama dengan st.session_state.df,
+# NIM dari nama file) atau .html halaman "Histori Nilai" portal (NIM dari tabel biodata).
+EKSTENSI = {".xlsx", ".xls", ".csv", ".html", ".htm"}
+KOLOM_BULAT = [
+    "jumlah_semester", "sks_lulus", "sks_berjalan", "sks_wajib",
+    "sks_wajib_total", "sks_kbk", "sks_kbk_target", "jumlah_mk_wajib_belum",
+]
+
+# Jumlah file per gelombang saat menulis laporan; membatasi hasil yang menunggu ditulis
+JENDELA_LAPORAN = 64
+
+# Kurikulum per proses pekerja, diisi sekali lewat initializer pool
+_kurikulum = {}
+
+
+def baca_transkrip(path):
+    """(nim, df) dari satu file transkrip."""
+    path = Path(path)
+    akhiran = path.suffix.lower()
+    if akhiran in (".html", ".htm"):
+        user_info, df = parse_transkrip_html(path.read_text(encoding="utf-8", errors="replace"))
+        if df is None:
+            raise ValueError("tabel nilai tidak ditemukan")
+        return user_info.get("NIM") or path.stem, df
+    if akhiran == ".csv":
+        return path.stem, pd.read_csv(path, dtype={"Semester": str, "Kode MA": str, "Nilai": str})
+    return path.stem, pd.read_excel(path, dtype={"Semester": str, "Kode MA": str, "Nilai": str})
+
+
+def analisis_mahasiswa(df, kurikulum_df, kbk_df, analitik=None, sks_kbk_target=SKS_TARGET_KBK):
+    """Ringkasan satu mahasiswa: IPK, SKS, kemajuan wajib/KBK dan MK wajib yang belum lulus."""
+    analitik = analitik or hitung_analitik(df)
+    unique_graded = analitik["unique_graded"]
+    ips_df = analitik["ips"]
+
+    total_sks = unique_graded["SKS"].sum()
+    ipk = bagi_ratus(bobot_ratus(unique_graded).sum(), total_sks) / 100
+
+    unique_mk_list = unique_graded[KOLOM_KUNCI].tolist()
+    wajib_terambil = smart_find_taken_courses(kurikulum_df, unique_mk_list)
+    kbk_terambil = smart_find_taken_courses(kbk_df, unique_mk_list)
+    wajib_belum = kurikulum_df[~kurikulum_df["Mata Kuliah"].isin(wajib_terambil["Mata Kuliah"])]
+
+    sks_wajib_total = int(kurikulum_df["SKS"].sum())
+    sks_wajib = int(wajib_terambil["SKS"].sum())
+    return {
+        "jumlah_semester": len(ips_df),
+        "sks_lulus": int(total_sks),
+        "sks_berjalan": int(analitik["ongoing"]["SKS"].sum()),
+        "ipk": float(ipk),
+        "ips_terakhir": float(ips_df["IPS"].iloc[-1]) if len(ips_df) else None,
+        "sks_wajib": sks_wajib,
+        "sks_wajib_total": sks_wajib_total,
+        "persen_wajib": sks_wajib / sks_wajib_total if sks_wajib_total else 0.0,
+        "sks_kbk": int(kbk_terambil["SKS"].sum()),
+        "sks_kbk_target": sks_kbk_target,
+        "jumlah_mk_wajib_belum": len(wajib_belum),
+        "mk_wajib_belum": wajib_belum["Mata Kuliah"].tolist(),
+    }
+
+
+def _siapkan_pekerja(kurikulum_df, kbk_df, sks_kbk=SKS_TARGET_KBK):
+    _kurikulum["wajib"], _kurikulum["kbk"], _kurikulum["sks_kbk"] = kurikulum_df, kbk_df, sks_kbk
+
+
+def proses_file(path, laporan=False):
+    """
+    Dijalankan di proses pekerja; galat satu file dicatat, tidak menghentikan kohort.
+    Dengan laporan=True mengembalikan (ringkasan, bagian_laporan atau None).
+    """
+    hasil = {"nim": Path(path).stem, "file": str(path), "galat": None}
+    bagian = None
+    try:
+        hasil["nim"], df = baca_transkrip(path)
+        analitik = hitung_analitik(df)
+        hasil.update(analisis_mahasiswa(df, _kurikulum["wajib"], _kurikulum["kbk"], analitik, _kurikulum["sks_kbk"]))
+        if laporan:
+            transkrip = analitik["transkrip"]
+            bagian = bagian_laporan(
+                analitik,
+                mk_belum_diambil(_kurikulum["wajib"], transkrip),
+                mk_belum_diambil(_kurikulum["kbk"], transkrip),
+                nim=hasil["nim"],
+            )
+    except Exception as e:
+        hasil["galat"] = f"{type(e).__name__}: {e}"
+    return (hasil, bagian) if laporan else hasil
+
+
+def _proses_laporan(path):
+    return proses_file(path, laporan=True)
+
+
+def cari_transkrip(folder, pola="*"):
+    return sorted(p for p in Path(folder).rglob(pola) if p.is_file() and p.suffix.lower() in EKSTENSI)
+
+
+def _laporan_bergelombang(paths, kurikulum_df, kbk_df, proses, sks_kbk):
+    """(ringkasan, bagian) per file, sesuai urutan paths."""
+    if proses == 1:
+        _siapkan_pekerja(kurikulum_df, kbk_df, sks_kbk)
+        yield from map(_proses_laporan, paths)
+        return
+    with ProcessPoolExecutor(
+        max_workers=proses, initializer=_siapkan_pekerja, initargs=(kurikulum_df, kbk_df, sks_kbk)
+    ) as executor:
+        for awal in range(0, len(paths), JENDELA_LAPORAN):
+            yield from executor.map(_proses_laporan, paths[awal:awal + JENDELA_LAPORAN])
+
+
+def analisis_kohort(paths, kurikulum_df, kbk_df, proses=None, penulis=None, sks_kbk=SKS_TARGET_KBK):
+    """
+    Menyebar file ke ProcessPoolExecutor; hasil berupa satu DataFrame per mahasiswa.
+    Jika penulis (PenulisLaporan) diberikan, laporan tiap mahasiswa langsung
+    ditulis per gelombang JENDELA_LAPORAN file sehingga memori tetap terbatas.
+    """
+    proses = proses or os.cpu_count() or 1
+    if penulis is not None:
+        baris = []
+        for ringkasan, bagian in _laporan_bergelombang(paths, kurikulum_df, kbk_df, proses, sks_kbk):
+            baris.append(ringkasan)
+            if bagian is not None:
+                penulis.tulis(bagian)
+    elif proses == 1:
+        _siapkan_pekerja(kurikulum_df, kbk_df, sks_kbk)
+        baris = [proses_file(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=proses, initializer=_siapkan_pekerja, initargs=(kurikulum_df, kbk_df, sks_kbk)
+        ) as executor:
+            # chunksize besar mengurangi overhead IPC; file transkrip kecil dan seragam
+            baris = list(executor.map(proses_file, paths, chunksize=max(1, len(paths) // (proses * 4))))
+    hasil = pd.DataFrame(baris)
+    # Int64 (nullable) agar baris gagal tidak mengubah kolom bulat menjadi float
+    return hasil.astype({k: "Int64" for k in KOLOM_BULAT if k in hasil.columns})
+
+
+def simpan(hasil, path):
+    """Parquet (kolom daftar MK tetap berupa list); .csv menggabungkan daftar dengan '; '."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        hasil.assign(mk_wajib_belum=hasil["mk_wajib_belum"].map(
+            lambda x: "; ".join(x) if isinstance(x, list) else "")
+        ).to_csv(path, index=False)
+    else:
+        hasil.to_parquet(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analitik IPK/IPS dan kemajuan SKS untuk satu folder transkrip")
+    parser.add_argument("folder", help="folder berisi transkrip .xlsx/.csv/.html (dicari rekursif)")
+    parser.add_argument("--program", default=None, help="kode program di registri kurikulum (bawaan: program bawaan)")
+    parser.add_argument("--wajib", default=None, help="workbook kurikulum mata kuliah wajib (menimpa --program)")
+    parser.add_argument("--kbk", default=None, help="workbook kurikulum mata kuliah KBK (menimpa --program)")
+    parser.add_argument("--keluaran", default="kohort.parquet", help="file hasil (.parquet atau .csv)")
+    parser.add_argument("--proses", type=int, default=None, help="jumlah proses pekerja (bawaan: jumlah core)")
+    parser.add_argument("--pola", default="*", help="pola glob nama file, contoh '0821*'")
+    parser.add_argument("--laporan", default=None,
+                        help="juga menulis laporan per mahasiswa (transkrip, riwayat IPS, MK belum diambil): "
+                             "berkas .xlsx, atau folder untuk csv/parquet")
+    parser.add_argument("--format-laporan", choices=["xlsx", "csv", "parquet"], default=None,
+                        help="bawaan: xlsx jika --laporan berakhiran .xlsx, selain itu parquet")
+    args = parser.parse_args(argv)
+
+    paths = cari_transkrip(args.folder, args.pola)
+    if not paths:
+        sys.exit(f"Tidak ada transkrip di {args.folder}")
+
+    mulai = time.perf_counter()
+    program = muat_program(args.program)
+    kurikulum_df = pd.read_excel(args.wajib) if args.wajib else program["wajib"]
+    kbk_df = pd.read_excel(args.kbk) if args.kbk else program["kbk"]
+    if args.laporan:
+        format_laporan = args.format_laporan or ("xlsx" if args.laporan.lower().endswith(".xlsx") else "parquet")
+        with PenulisLaporan(args.laporan, format_laporan, dengan_nim=True) as penulis:
+            hasil = analisis_kohort(paths, kurikulum_df, kbk_df, args.proses, penulis, program["sks_kbk"])
+    else:
+        hasil = analisis_kohort(paths, kurikulum_df, kbk_df, args.proses, sks_kbk=program["sks_kbk"])
+    simpan(hasil, args.keluaran)
+    detik = time.perf_counter() - mulai
+
+    gagal = hasil["galat"].notna().sum()
+    print(
+        f"{len(hasil)} transkrip ({gagal} gagal) dalam {detik:.1f} s "
+        f"({detik / len(hasil) * 1000:.1f} ms/mahasiswa) -> {args.keluaran}",
+        file=sys.stderr,
+    )
+    for _, b in hasil[hasil["galat"].notna()].head(10).iterrows():
+        print(f"  {b['file']}: {b['galat']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+
+__author__ = "irr"
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+import pandas as pd
+from cachetools import LRUCache
+
+from metrik import catat_cache
+from normalisasi import KOLOM_KUNCI, kunci_kolom
+
+# ==============================================================================
+# REGISTRI PROGRAM STUDI
+# ==============================================================================
+# data/program.json memetakan kode program ke kurikulumnya:
+#
+#   {"FIS": {"nama": "S1 Fisika", "alias": ["fisika"], "wajib": "data/mk wajib.xlsx",
+#            "kbk": "data/mk kbk.xlsx", "sks_lulus": 144, "sks_kbk": 14, "awalan_kode": ["FI"]}}
+#
+# Workbook satu program baru dibaca saat program itu pertama kali dipakai, lalu
+# disimpan di LRU berukuran MAKS_PROGRAM per proses (dibaca ulang jika mtime
+# berubah). DataFrame hasil dipakai bersama: pemanggil tidak boleh mengubahnya.
+PATH_PROGRAM = os.environ.get("DASHBOARD_PROGRAM", "data/program.json")
+MAKS_PROGRAM = int(os.environ.get("DASHBOARD_MAKS_PROGRAM", "4") or 4)
+PATH_WAJIB = "data/mk wajib.xlsx"
+PATH_KBK = "data/mk kbk.xlsx"
+
+# Dipakai jika registri belum ada (deployment lama: hanya Fisika)
+REGISTRI_BAWAAN = {
+    "FIS": {
+        "nama": "S1 Fisika", "alias": ["fisika"], "wajib": PATH_WAJIB, "kbk": PATH_KBK,
+        "sks_lulus": 144, "sks_kbk": 14, "awalan_kode": ["FI"],
+    }
+}
+PROGRAM_BAWAAN = os.environ.get("DASHBOARD_PROGRAM_BAWAAN", "")
+
+_registri = {"mtime": None, "isi": REGISTRI_BAWAAN}
+_program = LRUCache(maxsize=MAKS_PROGRAM)  # kode -> (mtime wajib, mtime kbk, program)
+_kunci = threading.Lock()
+
+
+def daftar_program():
+    """{kode: konfigurasi} dari PATH_PROGRAM (dibaca ulang jika berubah)."""
+    try:
+        mtime = os.path.getmtime(PATH_PROGRAM)
+    except OSError:
+        return REGISTRI_BAWAAN
+    with _kunci:
+        if _registri["mtime"] != mtime:
+            with open(PATH_PROGRAM, encoding="utf-8") as f:
+                _registri["isi"] = json.load(f)
+            _registri["mtime"] = mtime
+        return _registri["isi"]
+
+
+def program_bawaan():
+    registri = daftar_program()
+    return PROGRAM_BAWAAN if PROGRAM_BAWAAN in registri else next(iter(registri))
+
+
+def _baca_kurikulum(path):
+    """Workbook kurikulum beserta kunci kanonik nama MK (dihitung sekali saat dimuat)."""
+    df = pd.read_excel(path)
+    df[KOLOM_KUNCI] = kunci_kolom(df["Mata Kuliah"])
+    return df
+
+
+def muat_program(kode=None):
+    """
+    Program studi siap pakai: {"kode", "nama", "wajib", "kbk", "sks_lulus", "sks_kbk"}.
+    kode None berarti program bawaan.
+    """
+    registri = daftar_program()
+    kode = kode or program_bawaan()
+    if kode not in registri:
+        raise KeyError(f"program tidak terdaftar: {kode}")
+    konfigurasi = registri[kode]
+    mtime = (os.path.getmtime(konfigurasi["wajib"]), os.path.getmtime(konfigurasi["kbk"]))
+
+    with _kunci:
+        simpanan = _program.get(kode)
+    if simpanan is not None and simpanan[0] == mtime:
+        catat_cache("kurikulum", True)
+        return simpanan[1]
+
+    catat_cache("kurikulum", False)
+    program = {
+        "kode": kode,
+        "nama": konfigurasi.get("nama", kode),
+        "wajib": _baca_kurikulum(konfigurasi["wajib"]),
+        "kbk": _baca_kurikulum(konfigurasi["kbk"]),
+        "sks_lulus": int(konfigurasi.get("sks_lulus", 144)),
+        "sks_kbk": int(konfigurasi.get("sks_kbk", 14)),
+    }
+    with _kunci:
+        _program[kode] = (mtime, program)
+    return program
+
+
+def muat_kurikulum(kode=None):
+    """(wajib_df, kbk_df) program dari cache proses."""
+    program = muat_program(kode)
+    return program["wajib"], program["kbk"]
+
+
+# ==============================================================================
+# DETEKSI PROGRAM MAHASISWA
+# ==============================================================================
+def _normal(teks):
+    return re.sub(r"[^a-z0-9 ]", " ", str(teks).lower()).split()
+
+
+def deteksi_program(user_info=None, transkrip_df=None):
+    """
+    Kode program untuk seorang mahasiswa, tanpa membaca workbook kurikulum:
+    1. "Program Studi" di biodata dicocokkan dengan nama/alias program,
+    2. awalan Kode MA terbanyak di transkrip dicocokkan dengan awalan_kode,
+    3. program bawaan.
+    """
+    registri = daftar_program()
+
+    prodi = (user_info or {}).get("Program Studi")
+    if prodi:
+        # Nama terpanjang yang cocok menang ("S1 Fisika Medis" tidak jatuh ke "Fisika")
+        kata = set(_normal(prodi))
+        cocok = [
+            (len(_normal(nama)), kode)
+            for kode, konfigurasi in registri.items()
+            for nama in [konfigurasi.get("nama", ""), *konfigurasi.get("alias", [])]
+            if _normal(nama) and set(_normal(nama)) <= kata
+        ]
+        if cocok:
+            return max(cocok)[1]
+
+    if transkrip_df is not None and "Kode MA" in transkrip_df:
+        kode_mk = transkrip_df["Kode MA"].dropna().astype(str).str.upper()
+        skor = Counter()
+        for kode, konfigurasi in registri.items():
+            for awalan in konfigurasi.get("awalan_kode", []):
+                skor[kode] += int(kode_mk.str.startswith(awalan.upper()).sum())
+        if skor and skor.most_common(1)[0][1] > 0:
+            return skor.most_common(1)[0][0]
+
+    return program_bawaan()
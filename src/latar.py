@@ -0,0 +1,128 @@
+
+__author__ = "irr"
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+
+from keadaan import analitik_transkrip
+from metrik import BUCKET_PORTAL, amati, daftarkan_gauge
+from portal import ambil_halaman_paralel
+from transkrip import ambil_user_info, parse_transkrip_html
+
+# ==============================================================================
+# PEMUATAN TRANSKRIP DI LATAR
+# ==============================================================================
+# Setelah POST login berhasil, pengambilan transkrip + biodata, parsing dan
+# analitik berjalan di pool thread per proses, bukan di thread skrip
+# Streamlit. Sesi hanya menyimpan pegangan (dict dari mulai_muat) yang diisi
+# bertahap oleh pekerja: user_info begitu biodata atau transkrip ter-parse,
+# lalu df + analitik sekaligus. nilai.py merender kerangka dashboard segera
+# dan memantau pegangan lewat fragment (run_every=INTERVAL_PANTAU); setiap
+# kali "versi" naik, aplikasi dirender ulang dengan data yang sudah ada.
+MAKS_PEKERJA = int(os.environ.get("DASHBOARD_PEKERJA_MUAT", "8"))
+INTERVAL_PANTAU = 0.5  # detik
+
+FASE = {
+    "mengambil": "Mengambil transkrip dan biodata dari portal...",
+    "memproses": "Membaca tabel nilai...",
+    "menganalisis": "Menghitung IPK, IPS dan kemajuan SKS...",
+    "selesai": "Selesai",
+    "gagal": "Gagal",
+}
+
+_pool = None
+_kunci = threading.Lock()
+_berjalan = 0
+
+
+def _pool_pekerja():
+    global _pool
+    with _kunci:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAKS_PEKERJA, thread_name_prefix="muat")
+        return _pool
+
+
+def _terbitkan(pegangan, **isi):
+    """Memperbarui pegangan secara utuh (satu kunci) dan menaikkan versinya."""
+    with _kunci:
+        pegangan.update(isi)
+        pegangan["versi"] += 1
+
+
+def _muat(pegangan, session, trans_url, biodata_url):
+    global _berjalan
+    mulai = time.perf_counter()
+    info_biodata = {}
+
+    def saat_tiba(nama, hasil):
+        # Biodata sering tiba lebih dulu: kartu profil bisa tampil sebelum transkrip selesai
+        if nama == "biodata" and not isinstance(hasil, Exception) and hasil.ok:
+            info_biodata.update(ambil_user_info(BeautifulSoup(hasil.text, "html.parser").find_all("table")))
+            if pegangan["user_info"] is None:
+                _terbitkan(pegangan, user_info=dict(info_biodata))
+
+    try:
+        halaman, waktu = ambil_halaman_paralel(
+            session, {"transkrip": trans_url, "biodata": biodata_url}, saat_tiba=saat_tiba
+        )
+        pegangan["waktu"]["pasca_login"] = waktu
+        transkrip_resp = halaman["transkrip"]
+        if isinstance(transkrip_resp, requests.exceptions.RequestException):
+            raise transkrip_resp
+        if "Histori Nilai" not in transkrip_resp.text:
+            _terbitkan(pegangan, fase="gagal", galat="Gagal menarik data transkrip. Sesi mungkin berakhir.")
+            return
+
+        _terbitkan(pegangan, fase="memproses")
+        mulai_tahap = time.perf_counter()
+        user_info, df = parse_transkrip_html(transkrip_resp.text)
+        for key, value in info_biodata.items():  # biodata hanya melengkapi kunci yang tidak ada
+            user_info.setdefault(key, value)
+        pegangan["waktu"]["parse_transkrip"] = time.perf_counter() - mulai_tahap
+        if df is None:
+            _terbitkan(pegangan, fase="gagal", user_info=user_info, galat="Tabel nilai tidak ditemukan.")
+            return
+
+        _terbitkan(pegangan, fase="menganalisis", user_info=user_info, jumlah_baris=len(df))
+        mulai_tahap = time.perf_counter()
+        analitik = analitik_transkrip(df)
+        pegangan["waktu"]["analitik"] = time.perf_counter() - mulai_tahap
+        _terbitkan(pegangan, fase="selesai", df=df, analitik=analitik)
+    except requests.exceptions.RequestException as e:
+        _terbitkan(pegangan, fase="gagal", galat=f"Terjadi kesalahan koneksi: {e}")
+    except Exception as e:  # pekerja tidak boleh mati diam-diam; galat ditampilkan di form login
+        _terbitkan(pegangan, fase="gagal", galat=f"Gagal memproses transkrip: {type(e).__name__}: {e}")
+    finally:
+        amati("dashboard_background_load_seconds", time.perf_counter() - mulai, BUCKET_PORTAL, hasil=pegangan["fase"])
+        with _kunci:
+            _berjalan -= 1
+
+
+def mulai_muat(session, trans_url, biodata_url):
+    """
+    Menjadwalkan pengambilan dan analisis transkrip di latar; langsung kembali.
+    Mengembalikan pegangan berisi fase, versi, user_info, df, analitik, galat
+    dan waktu (detik per tahap) yang diisi bertahap oleh pekerja.
+    """
+    global _berjalan
+    pegangan = {
+        "fase": "mengambil", "versi": 0, "user_info": None, "df": None, "analitik": None,
+        "jumlah_baris": None, "galat": None, "waktu": {}, "mulai": time.time(),
+    }
+    with _kunci:
+        _berjalan += 1
+    _pool_pekerja().submit(_muat, pegangan, session, trans_url, biodata_url)
+    return pegangan
+
+
+def selesai(pegangan):
+    return pegangan["fase"] in ("selesai", "gagal")
+
+
+daftarkan_gauge("dashboard_background_loads", lambda: [({}, _berjalan)])
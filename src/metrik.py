@@ -0,0 +1,201 @@
+
+__author__ = "irr"
+
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from portal import PENGAMAT
+
+# ==============================================================================
+# REGISTRI METRIK (format teks Prometheus)
+# ==============================================================================
+# DASHBOARD_METRICS_FILE=/tmp/dashboard.prom  -> ditulis ulang paling sering tiap METRICS_INTERVAL detik
+# DASHBOARD_METRICS_PORT=9108                 -> endpoint lokal http://127.0.0.1:9108/metrics
+METRICS_FILE = os.environ.get("DASHBOARD_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("DASHBOARD_METRICS_PORT", "0") or 0)
+METRICS_INTERVAL = 5.0
+
+BUCKET_RERUN = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKET_PORTAL = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0)
+BUCKET_PAYLOAD = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HELP = {
+    "dashboard_rerun_seconds": ("histogram", "Durasi satu rerun skrip per tampilan"),
+    "dashboard_portal_fetch_seconds": ("histogram", "Latensi request ke portal per path"),
+    "dashboard_portal_errors_total": ("counter", "Request portal gagal per kelas galat"),
+    "dashboard_cache_total": ("counter", "Hit/miss cache kurikulum, analitik dan opsi grid"),
+    "dashboard_grid_payload_bytes": ("histogram", "Ukuran data + gridOptions yang dikirim satu AgGrid"),
+    "dashboard_rerun_payload_bytes": ("histogram", "Total payload AgGrid dalam satu rerun per tampilan"),
+    "dashboard_sessions": ("gauge", "Jumlah sesi Streamlit yang hidup"),
+    "dashboard_session_memory_bytes": ("gauge", "Perkiraan total memori st.session_state semua sesi"),
+    "dashboard_session_memory_max_bytes": ("gauge", "Perkiraan memori st.session_state sesi terbesar"),
+    "dashboard_sessions_spilled": ("gauge", "Jumlah sesi diam yang isinya sedang ditumpahkan ke disk"),
+    "dashboard_session_evictions_total": ("counter", "Penggusuran (tumpah) dan pemulihan (pulih) sesi"),
+    "dashboard_warmup_seconds": ("gauge", "Durasi tiap langkah pemanasan saat server mulai"),
+    "dashboard_background_load_seconds": ("histogram", "Durasi pemuatan transkrip di latar setelah login per hasil"),
+    "dashboard_background_loads": ("gauge", "Jumlah pemuatan transkrip latar yang sedang berjalan"),
+}
+
+_kunci = threading.Lock()
+_histogram = {}  # (nama, label) -> {"bucket": [...], "sum": float, "count": int, "batas": tuple}
+_counter = {}  # (nama, label) -> float
+_gauge = {}  # nama -> fungsi tanpa argumen yang mengembalikan [(label_dict, nilai)]
+_server = None
+_terakhir_tulis = 0.0
+
+
+def _label(label):
+    return tuple(sorted(label.items()))
+
+
+def amati(nama, nilai, bucket, **label):
+    """Menambah satu observasi ke histogram."""
+    kunci = (nama, _label(label))
+    with _kunci:
+        h = _histogram.get(kunci)
+        if h is None:
+            h = _histogram[kunci] = {"bucket": [0] * len(bucket), "sum": 0.0, "count": 0, "batas": bucket}
+        for i, batas in enumerate(bucket):
+            if nilai <= batas:
+                h["bucket"][i] += 1
+        h["sum"] += nilai
+        h["count"] += 1
+
+
+def tambah(nama, jumlah=1, **label):
+    """Menaikkan counter."""
+    kunci = (nama, _label(label))
+    with _kunci:
+        _counter[kunci] = _counter.get(kunci, 0) + jumlah
+
+
+def daftarkan_gauge(nama, fungsi):
+    """Gauge dihitung saat ekspor lewat fungsi yang mengembalikan [(label_dict, nilai)]."""
+    _gauge[nama] = fungsi
+
+
+def catat_rerun(view, detik):
+    amati("dashboard_rerun_seconds", detik, BUCKET_RERUN, view=view)
+
+
+def catat_cache(nama, hit):
+    tambah("dashboard_cache_total", cache=nama, hasil="hit" if hit else "miss")
+
+
+def catat_payload(grid, nbytes):
+    amati("dashboard_grid_payload_bytes", nbytes, BUCKET_PAYLOAD, grid=grid)
+
+
+def catat_payload_rerun(view, nbytes):
+    amati("dashboard_rerun_payload_bytes", nbytes, BUCKET_PAYLOAD, view=view)
+
+
+def catat_portal(catatan):
+    """Pengamat untuk portal.PortalSession (satu catatan per request)."""
+    amati("dashboard_portal_fetch_seconds", catatan["detik"], BUCKET_PORTAL,
+          metode=catatan["metode"], path=catatan["path"])
+    if catatan["galat"]:
+        tambah("dashboard_portal_errors_total", kelas=catatan["galat"])
+    elif (catatan["status"] or 0) >= 500:
+        tambah("dashboard_portal_errors_total", kelas=f"HTTP{catatan['status']}")
+
+
+if catat_portal not in PENGAMAT:
+    PENGAMAT.append(catat_portal)
+
+
+# ==============================================================================
+# EKSPOR
+# ==============================================================================
+def _fmt_label(label, tambahan=()):
+    pasangan = list(label) + list(tambahan)
+    if not pasangan:
+        return ""
+    isi = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pasangan)
+    return "{" + isi + "}"
+
+
+def render():
+    """Semua metrik dalam format teks Prometheus (exposition format 0.0.4)."""
+    with _kunci:
+        histogram = {k: {**v, "bucket": list(v["bucket"])} for k, v in _histogram.items()}
+        counter = dict(_counter)
+
+    gauge = {}
+    for nama, fungsi in list(_gauge.items()):
+        try:
+            gauge[nama] = [(_label(label), nilai) for label, nilai in fungsi()]
+        except Exception:
+            gauge[nama] = []
+
+    baris = []
+    nama_semua = sorted({k[0] for k in histogram} | {k[0] for k in counter} | set(gauge))
+    for nama in nama_semua:
+        jenis, teks = HELP.get(nama, ("untyped", nama))
+        baris.append(f"# HELP {nama} {teks}")
+        baris.append(f"# TYPE {nama} {jenis}")
+        for (n, label), h in sorted(histogram.items()):
+            if n != nama:
+                continue
+            for batas, jumlah in zip(h["batas"], h["bucket"]):
+                baris.append(f"{nama}_bucket{_fmt_label(label, [('le', batas)])} {jumlah}")
+            baris.append(f"{nama}_bucket{_fmt_label(label, [('le', '+Inf')])} {h['count']}")
+            baris.append(f"{nama}_sum{_fmt_label(label)} {h['sum']}")
+            baris.append(f"{nama}_count{_fmt_label(label)} {h['count']}")
+        for (n, label), nilai in sorted(counter.items()):
+            if n == nama:
+                baris.append(f"{nama}{_fmt_label(label)} {nilai}")
+        for label, nilai in gauge.get(nama, []):
+            baris.append(f"{nama}{_fmt_label(label)} {nilai}")
+    return "\n".join(baris) + "\n"
+
+
+def tulis_file(path=None, paksa=False):
+    """Menulis metrik ke file secara atomik (untuk textfile collector node_exporter)."""
+    global _terakhir_tulis
+    path = path or METRICS_FILE
+    if not path or (not paksa and time.monotonic() - _terakhir_tulis < METRICS_INTERVAL):
+        return
+    _terakhir_tulis = time.monotonic()
+    sementara = f"{path}.{os.getpid()}.tmp"
+    with open(sementara, "w") as f:
+        f.write(render())
+    os.replace(sementara, path)
+
+
+def mulai_server(port=None):
+    """Endpoint /metrics lokal di thread latar; hanya dijalankan sekali per proses."""
+    global _server
+    port = port or METRICS_PORT
+    if not port or _server is not None:
+        return _server
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    with _kunci:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def ekspor():
+    """Dipanggil di akhir setiap rerun: menyalakan endpoint dan/atau menulis file jika dikonfigurasi."""
+    mulai_server()
+    tulis_file()
@@ -6,35 +6,68 @@ import re
 import time
 import requests
 from bs4 import BeautifulSoup
-from openpyxl import Workbook
-from io import BytesIO
-from decimal import Decimal, ROUND_HALF_UP
-from difflib import SequenceMatcher
 from streamlit_option_menu import option_menu
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-import plotly.express as px
-import altair as alt
-from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
+import numpy as np
+
+from analitik import (
+    bagi_ratus,
+    bobot_ratus,
+    format_ratus,
+    hitung_jatah_sks_ratus,
+    semester_sort_key,
+    smart_find_taken_courses,
+    perbarui_analitik,
+)
+from grafik import (
+    create_donut_chart,
+    grafik_distribusi_nilai,
+    grafik_ips,
+    grafik_hitungan_nilai,
+    grafik_tren_mk,
+    grafik_proyeksi_ipk,
+    grafik_peluang_lulus,
+)
+from profil import tahap, mulai_rerun, panel_admin
+from metrik import catat_rerun, catat_cache, catat_payload_rerun, ekspor as ekspor_metrik
+from sesi import catat_sesi, pulihkan_sesi
+from kurikulum import muat_program, deteksi_program
+from normalisasi import KOLOM_KUNCI
+from grid import tampilkan_grid, grid_suntingan, atur_suntingan
+from ekspor import bagian_laporan, laporan_bytes, FORMAT as FORMAT_LAPORAN, MIME as MIME_LAPORAN
+from gudang import Gudang, GUDANG_ROOT, tahun_angkatan
+from kesulitan import kesulitan_gudang, HURUF as HURUF_NILAI
+from peringkat import peringkat_gudang
+from peringatan import TINGKAT, alasan_risiko, fitur_analitik, peringatan_gudang, skor_risiko
+from prasyarat import (
+    bitset,
+    kelayakan_mahasiswa,
+    kompilasi_program,
+    permintaan_gudang,
+    posisi_kurikulum,
+    tandai_kelayakan,
+)
+from proyeksi import mk_tersisa, proyeksi, N_LINTASAN, SEMESTER_TEPAT_WAKTU
+from transkrip import parse_transkrip_html
+from pemanasan import panaskan_latar
+from portal import BASE_URL, PATH_BIODATA, buat_session, ambil_data_keamanan
+from keadaan import analitik_transkrip, hapus_klien, pulihkan_klien, simpan_analitik, simpan_klien
+from skenario import (
+    basis_skenario,
+    delta_dari_suntingan,
+    ipk_skenario,
+    muat_skenario,
+    simpan_skenario,
+    suntingan_dari_delta,
+)
+from latar import FASE as FASE_MUAT, INTERVAL_PANTAU, mulai_muat, selesai as muat_selesai
 
 # ==============================================================================
 # KONFIGURASI DAN FUNGSI BANTUAN
 # ==============================================================================
 
-# Mapping nilai huruf ke bobot angka
-NILAI_MAP = {
-    "A": 4.0,
-    "AB": 3.5,
-    "B": 3.0,
-    "BC": 2.5,
-    "C": 2.0,
-    "D": 1.0,
-    "E": 0.0,
-}
-
 def local_css():
     st.markdown("""
     <style>
@@ -62,116 +95,6 @@ def local_css():
     """, unsafe_allow_html=True)
 
 def display_main_app():
-    def hitung_jatah_sks(ips):
-        if ips < 2:
-            return 15
-        elif 2 <= ips <= 2.5:
-            return 18
-        elif 2.51 <= ips <= 3:
-            return 20
-        else:  # ips > 3
-            return 24
-
-    def semester_sort_key(semester_str):
-        """Kunci pengurutan kustom untuk string semester (contoh: '2023/2024 Ganjil')."""
-        if not isinstance(semester_str, str) or "/" not in semester_str:
-            return (9999, 9999)
-        try:
-            year_part = semester_str.split("/")[0].strip()
-            year = int(year_part)
-            order = 0 if "Ganjil" in semester_str else 1
-            return (year, order)
-        except (ValueError, IndexError):
-            return (9999, 9999)
-
-    def smart_find_taken_courses(kurikulum_df, transkrip_list):
-        """
-        Mencari mata kuliah yang sudah diambil dengan metode 2 tahap:
-        1. Cari kecocokan 100% (exact match).
-        2. Cari kemiripan nama (similarity match) untuk sisanya.
-        """
-        THRESHOLD = 0.77  # Threshold untuk tahap kedua
-
-        # Buat salinan agar daftar asli tidak berubah
-        available_transcript_courses = [name.lower() for name in transkrip_list]
-        kurikulum_courses = kurikulum_df.copy()
-        kurikulum_courses["lower_name"] = kurikulum_courses["Mata Kuliah"].str.lower()
-
-        taken_indices = []
-
-        # --- Tahap 1: Exact Matching ---
-        for index, row in kurikulum_courses.iterrows():
-            if row["lower_name"] in available_transcript_courses:
-                taken_indices.append(index)
-                available_transcript_courses.remove(row["lower_name"])
-
-        # --- Tahap 2: Similarity Matching untuk sisanya ---
-        remaining_kurikulum = kurikulum_courses.drop(taken_indices)
-
-        for index, row in remaining_kurikulum.iterrows():
-            if not available_transcript_courses:
-                break  # Hentikan jika semua MK transkrip sudah terpetakan
-
-            best_match, best_score = None, 0
-            for trans_course in available_transcript_courses:
-                score = SequenceMatcher(None, row["lower_name"], trans_course).ratio()
-                if score > best_score:
-                    best_score = score
-                    best_match = trans_course
-
-            if best_score >= THRESHOLD:
-                taken_indices.append(index)
-                available_transcript_courses.remove(best_match)
-
-        # Kembalikan DataFrame dari kurikulum yang sudah teridentifikasi
-        return kurikulum_df.loc[taken_indices]
-
-    def create_donut_chart(value, title):
-        """Membuat grafik donat untuk menampilkan IPK."""
-        if value < 2:
-            primary_color = "#FF4136"  # Merah
-        elif 2 <= value < 3:
-            primary_color = "#FFDC00"  # Kuning
-        else:
-            primary_color = "#2ECC40"  # Hijau
-
-        fig = go.Figure(
-            go.Pie(
-                values=[value, 4.0 - value],
-                labels=[title, "Sisa"],
-                hole=0.7,
-                marker_colors=[primary_color, "rgba(0,0,0,0.1)"],
-                textinfo="none",
-                hoverinfo="none",
-                sort=False,
-                direction="clockwise",
-            )
-        )
-        fig.update_layout(
-            height=300,
-            margin=dict(l=20, r=20, t=20, b=20),
-            showlegend=False,
-            annotations=[
-                dict(
-                    text=f"<b>{title}</b>",
-                    x=0.5,
-                    y=0.60,
-                    font_size=20,
-                    showarrow=False,
-                    font=dict(color="grey"),
-                ),
-                dict(
-                    text=f"<b>{value:.2f}</b>",
-                    x=0.5,
-                    y=0.45,
-                    font_size=40,
-                    showarrow=False,
-                    font=dict(color=primary_color),
-                ),
-            ],
-        )
-        return fig
-
     def styled_progress_bar(value, total, color, label):
         """
         Membuat progress bar kustom dengan teks dan warna yang bisa diubah.
@@ -180,7 +103,7 @@ def display_main_app():
 
         # Logika untuk menampilkan status "Target Terpenuhi"
         if percentage >= 1.0:
-            if value >= 144:
+            if value >= sks_lulus:
                 status_text = "<span style='color:green; font-weight:bold;'>S.Si.</span>"
                 bar_color = "green"
             else:
@@ -206,69 +129,52 @@ def display_main_app():
     # PEMUATAN DATA
     # ==============================================================================
     try:
-        transkrip_df = st.session_state.df.copy()
-        transkrip_df["Semester"] = transkrip_df["Semester"].str.split(" - ").str[0]
-        transkrip_ori = transkrip_df.copy()
-        transkrip_ori["Semester"] = transkrip_ori["Semester"].str.split(" - ").str[0]
-
-        # import file mk wajib dan kbk
-        kurikulum_df = pd.read_excel("data/mk wajib.xlsx")
-        kbk_df = pd.read_excel("data/mk kbk.xlsx")
+        # Program studi dideteksi sekali per sesi; kurikulumnya dimuat malas dari registri
+        if "program" not in st.session_state:
+            st.session_state.program = deteksi_program(st.session_state.get("user_info"), st.session_state.df)
+        with tahap("muat_kurikulum"):
+            program = muat_program(st.session_state.program)
+        kurikulum_df, kbk_df = program["wajib"], program["kbk"]
+        sks_lulus, sks_kbk = program["sks_lulus"], program["sks_kbk"]
     except FileNotFoundError:
         st.error("Pastikan semua file (transkrip, mk wajib, mk kbk) telah diunggah.")
         st.stop()
 
-    # 1. Proses Transkrip & Atasi Duplikasi
-    transkrip_df["Bobot_numeric"] = pd.to_numeric(transkrip_df["Bobot"], errors="coerce")  # buang BT
-    df_graded = transkrip_df[
-        (transkrip_df["Bobot_numeric"].notna()) & (transkrip_df["Nilai"] != "E")
-    ].copy()
-    df_graded_sorted = df_graded.sort_values(
-        by=["Nama Mata Ajar", "Bobot_numeric"], ascending=[True, False]
-    )
-    df_unique_graded = df_graded_sorted.drop_duplicates(
-        subset="Nama Mata Ajar", keep="first"
-    )  # ambil hanya mk dengan niai tertinggi (tanpa ada mk BT)
+    # 1. Proses Transkrip & Atasi Duplikasi (disimpan per sesi, diperbarui inkremental saat refresh)
+    catat_cache("analitik", st.session_state.get("analitik") is not None)
+    if st.session_state.get("analitik") is None:
+        with tahap("analitik"):
+            st.session_state.analitik = analitik_transkrip(st.session_state.df)
+    analitik = st.session_state.analitik
 
-    df_ongoing = transkrip_df[transkrip_df["Bobot_numeric"].isna()].copy()
-    df_ongoing = df_ongoing[
-        ~df_ongoing["Nama Mata Ajar"].isin(df_unique_graded["Nama Mata Ajar"])
-    ]  # filter untuk hanya mata kuliah yang baru diambil (belum ada nilai)
+    transkrip_df = analitik["transkrip"]
+    transkrip_ori = transkrip_df
+    df_graded = analitik["graded"]
+    df_unique_graded = analitik["unique_graded"]  # ambil hanya mk dengan niai tertinggi (tanpa ada mk BT)
+    df_ongoing = analitik["ongoing"]  # hanya mata kuliah yang baru diambil (belum ada nilai)
 
     # 2. Hitung IPK & total SKS lulus
     total_sks_graded = df_unique_graded["SKS"].sum()  # hitung total sks mk tanpa BT dan tanpa mk dobel
-    total_bobot_graded = df_unique_graded["Bobot_numeric"].sum()  # hitung total bobot mk tanpa BT
-    ipk_awal = (
-        total_bobot_graded / total_sks_graded if total_sks_graded > 0 else 0.0
-    )  # ipk -> tanpa BT dan hanya nilai tertinggi
+    total_bobot_graded = bobot_ratus(df_unique_graded).sum()  # total bobot mk tanpa BT (seperseratus)
+    ipk_awal = bagi_ratus(total_bobot_graded, total_sks_graded) / 100  # ipk -> tanpa BT dan hanya nilai tertinggi
 
     total_sks_ongoing = df_ongoing["SKS"].sum()  # hitung sks mk BT
 
-    # 3. Hitung IPS per semester
-    ips_df = (
-        df_graded.groupby("Semester")
-        .agg(Total_Bobot=("Bobot_numeric", "sum"), Total_SKS=("SKS", "sum"))
-        .reset_index()
-    )
-
-    ips_df["IPS"] = ips_df["Total_Bobot"] / ips_df["Total_SKS"]
-    ips_df = ips_df.sort_values(by="Semester", key=lambda s: s.map(semester_sort_key)).reset_index(drop=True)
-    ips_df["Semester"] = ips_df["Semester"].str.split(" - ").str[0]
-    ips_df["SemesterLabel"] = [f"Semester {i+1}" for i in ips_df.index]
-    ips_df["IPS_Lalu"] = ips_df["IPS"].shift(1)
-    ips_df["Jatah_SKS"] = ips_df["IPS_Lalu"].apply(lambda x: None if pd.isna(x) else hitung_jatah_sks(x))
-    ips_df["Jatah_SKS"] = ips_df["Jatah_SKS"].fillna(0).astype(int)
+    # 3. IPS per semester
+    ips_df = analitik["ips"]
 
     # 3. Logika Pencocokan Berdasarkan NAMA
     kurikulum_mk_list = kurikulum_df["Mata Kuliah"].dropna().tolist()
     kbk_mk_list = kbk_df["Mata Kuliah"].dropna().tolist()
-    unique_mk_list = df_unique_graded["Nama Mata Ajar"].dropna().tolist()
+    unique_mk_list = df_unique_graded[KOLOM_KUNCI].tolist()
     transkrip_mk_list = transkrip_df["Nama Mata Ajar"].tolist()
 
     # 3. Identifikasi MK yang Sudah dan Belum Diambil (Menggunakan Fungsi Baru)
     # HANYA MATKUL YANG TELAH DIAMBIL, BUKAN MATKUL BT
-    df_wajib_terambil = smart_find_taken_courses(kurikulum_df, unique_mk_list)
-    df_kbk_terambil = smart_find_taken_courses(kbk_df, unique_mk_list)
+    with tahap("pencocokan_wajib"):
+        df_wajib_terambil = smart_find_taken_courses(kurikulum_df, unique_mk_list)
+    with tahap("pencocokan_kbk"):
+        df_kbk_terambil = smart_find_taken_courses(kbk_df, unique_mk_list)
 
     # Cari MK yang belum diambil dengan membandingkan DataFrame
     df_wajib_belum_terambil = kurikulum_df[
@@ -282,8 +188,10 @@ def display_main_app():
     sks_kbk_terambil = df_kbk_terambil["SKS"].sum()
 
     # UNTUK SEMUA MATKUL YANG ADA DI TRANSKRIP -> TERMASUK MATKUL BT
-    df_wajib_transkrip = smart_find_taken_courses(kurikulum_df, transkrip_ori["Nama Mata Ajar"].to_list())
-    df_kbk_transkrip = smart_find_taken_courses(kbk_df, transkrip_ori["Nama Mata Ajar"].to_list())
+    with tahap("pencocokan_wajib_transkrip"):
+        df_wajib_transkrip = smart_find_taken_courses(kurikulum_df, transkrip_ori[KOLOM_KUNCI].to_list())
+    with tahap("pencocokan_kbk_transkrip"):
+        df_kbk_transkrip = smart_find_taken_courses(kbk_df, transkrip_ori[KOLOM_KUNCI].to_list())
 
     # Cari MK yang belum diambil dengan membandingkan DataFrame -> untuk tabel cek
     df_wajib_BT = kurikulum_df[~kurikulum_df["Mata Kuliah"].isin(df_wajib_transkrip["Mata Kuliah"])]
@@ -294,7 +202,6 @@ def display_main_app():
 
     # Tetapkan total SKS Wajib & target KBK
     total_sks_wajib = kurikulum_df["SKS"].sum()
-    SKS_TARGET_KBK = 14
 
     # Pembagian semester
     list_semester = sorted(transkrip_ori["Semester"].dropna().unique(), key=semester_sort_key)
@@ -328,105 +235,123 @@ def display_main_app():
     #     st.rerun()
 
     st.sidebar.write("")
+    st.sidebar.caption(f"Kurikulum: {program['nama']}")
     pilihan_semester = st.sidebar.selectbox("Pilih Semester:", options=list_semester)
 
-    if st.sidebar.toggle("Simulasi Perolehan Nilai"):
+    simulasi = st.sidebar.toggle("Simulasi Perolehan Nilai")
+
+    # Laporan dibuat hanya saat diminta dan dibuang dari sesi setelah diunduh
+    with st.sidebar.expander("📥 Unduh Laporan"):
+        format_laporan = st.radio("Format", list(FORMAT_LAPORAN), horizontal=True, key="format_laporan")
+        if st.button("Siapkan laporan", use_container_width=True):
+            with tahap("ekspor_laporan"):
+                st.session_state.laporan = {
+                    "format": format_laporan,
+                    "data": laporan_bytes(bagian_laporan(analitik, df_wajib_BT, df_kbk_BT), format_laporan),
+                }
+        laporan = st.session_state.get("laporan")
+        if laporan and laporan["format"] == format_laporan:
+            akhiran = FORMAT_LAPORAN[format_laporan]
+            nim = (st.session_state.get("user_info") or {}).get("NIM", "transkrip")
+            st.download_button(
+                f"Unduh laporan .{akhiran}",
+                data=laporan["data"],
+                file_name=f"laporan_{nim}_{format_laporan}.{akhiran}",
+                mime=MIME_LAPORAN[akhiran],
+                on_click=buang_laporan,
+                use_container_width=True,
+            )
+    st.session_state.view_metrik = (
+        "simulasi" if simulasi else "overview" if pilihan_semester == "Overview" else "semester"
+    )
+    if simulasi:
+        # 4. Tentukan dataframe mana yang akan ditampilkan di tabel berdasarkan checkbox
+        df_display = pd.concat([df_unique_graded, df_ongoing], ignore_index=True).drop(columns=["Bobot_numeric", KOLOM_KUNCI])
+        kunci_grid = f"transcript_grid_{st.session_state.grid_key_counter}"
+
+        # Ringkasan transkrip untuk IPK skenario dihitung sekali per transkrip
+        basis = st.session_state.get("basis_skenario")
+        if basis is None or basis["kunci"] != tuple(transkrip_ori.index):
+            basis = st.session_state.basis_skenario = {"kunci": tuple(transkrip_ori.index), **basis_skenario(df_display)}
+        nim = str((st.session_state.get("user_info") or {}).get("NIM") or "").strip()
+        if st.session_state.get("skenario_nim") != nim:  # NIM bisa tiba belakangan (pemuatan latar)
+            st.session_state.skenario = muat_skenario(nim) if nim else {}
+            st.session_state.skenario_nim = nim
+        skenario = st.session_state.skenario
+
         if st.sidebar.button("Reset"):
+            st.session_state.pop(f"{kunci_grid}_suntingan", None)
             st.session_state.grid_key_counter += 1
             st.rerun()
+
+        # Skenario bernama: disimpan sebagai delta {Kode MA: nilai}, dimuat ke grid baru
+        with st.sidebar.expander("💾 Skenario Simulasi"):
+            if not nim:
+                st.caption("Skenario disimpan per NIM; NIM belum tersedia.")
+            nama_skenario = st.text_input("Nama skenario", key="nama_skenario", disabled=not nim)
+            if st.button("Simpan suntingan saat ini", use_container_width=True, disabled=not (nim and nama_skenario)):
+                suntingan = st.session_state.get(f"{kunci_grid}_suntingan", {}).get("baris", {})
+                skenario.pop(nama_skenario, None)  # nama yang sama ditimpa dan jadi yang terbaru
+                skenario[nama_skenario] = delta_dari_suntingan(basis, suntingan)
+                st.session_state.skenario = simpan_skenario(nim, skenario)
+                st.toast(f"Skenario '{nama_skenario}' disimpan", icon="💾")
+            if skenario:
+                pilihan_skenario = st.selectbox("Skenario tersimpan", list(skenario), key="pilihan_skenario")
+                kol_muat, kol_hapus = st.columns(2)
+                if kol_muat.button("Muat", use_container_width=True):
+                    st.session_state.pop(f"{kunci_grid}_suntingan", None)
+                    st.session_state.grid_key_counter += 1
+                    atur_suntingan(
+                        f"transcript_grid_{st.session_state.grid_key_counter}",
+                        df_display,
+                        suntingan_dari_delta(basis, skenario[pilihan_skenario]),
+                    )
+                    st.rerun()
+                if kol_hapus.button("Hapus", use_container_width=True):
+                    del skenario[pilihan_skenario]
+                    st.session_state.skenario = simpan_skenario(nim, skenario)
+                    st.rerun()
+
         st.title("Simulasi Perolehan Nilai", help="Ubah nilai pada Indeks Nilai")
         st.markdown("---")
 
         col1, col2 = st.columns(2)
 
-        # 4. Tentukan dataframe mana yang akan ditampilkan di tabel berdasarkan checkbox
-        df_display = pd.concat([df_unique_graded, df_ongoing], ignore_index=True).drop(columns=["Bobot_numeric"])
-
         st.markdown("---")
-        # --- Konfigurasi AgGrid (tidak ada perubahan) ---
-        gb = GridOptionsBuilder.from_dataframe(df_display)
-        gb.configure_default_column(headerClass="ag-left-aligned-header")
-        gb.configure_column("Nama Mata Ajar", editable=False, width=300, cellStyle={"text-align": "left"})
-        gb.configure_column("SKS", editable=False, width=80, cellStyle={"text-align": "center"})
-        gb.configure_column(
-            "Nilai",
-            header_name="Indeks Nilai",
-            editable=True,
-            cellEditor="agSelectCellEditor",
-            cellEditorParams={"values": list(NILAI_MAP.keys())},
-            width=100,
-            cellStyle={"text-align": "center"},
-        )
-        gb.configure_column(
-            "Bobot",
-            editable=False,
-            width=100,
-            cellStyle={"text-align": "center"},
-            valueGetter=JsCode(
-                """
-                function(params) {
-                    if (params.data.Nilai === '*BT' || !params.data.Nilai) return 0;
-                    const map = {"A":4.0,"AB":3.5,"B":3.0,"BC":2.5,"C":2.0,"D":1.0,"E":0.0};
-                    const idx = map[params.data.Nilai] || 0;
-                    const sks = Number(params.data.SKS) || 0;
-                    return sks * idx;
-                }
-                """
-            ),
-            valueFormatter=JsCode("function(params){ return Number(params.value || 0).toFixed(2); }"),
-        )
-        gb.configure_column("Kode MA", editable=False, hide=True)
-        gb.configure_column("Semester", editable=False, hide=True)
-        if "Indeks" in df_display.columns:
-            gb.configure_column("Indeks", hide=True)
-        grid_options = gb.build()
-
-        # Gunakan kunci dinamis untuk AgGrid agar bisa di-reset
-        grid_response = AgGrid(
-            df_display,
-            gridOptions=grid_options,
-            update_mode="VALUE_CHANGED",
-            fit_columns_on_grid_load=True,
-            allow_unsafe_jscode=True,
-            key=f"transcript_grid_{st.session_state.grid_key_counter}",
-            theme="balham",
-        )
-        edited_df = pd.DataFrame(grid_response["data"])
-
-        # --- Perhitungan ulang IPK di backend ---
-        edited_df["Indeks"] = edited_df["Nilai"].map(NILAI_MAP)
-        edited_df["SKS"] = pd.to_numeric(edited_df["SKS"], errors="coerce")
-        edited_df["Bobot"] = edited_df["Indeks"] * edited_df["SKS"]
-        edited_filter = edited_df.dropna(subset=["Bobot"])
-        edited_sorted = edited_filter.sort_values(by=["Kode MA", "Bobot"], ascending=[True, False])
-        edited_unique = edited_sorted.drop_duplicates(subset="Kode MA", keep="first")
-        total_sks_edited = edited_unique["SKS"].sum()
-        total_bobot_edited = edited_unique["Bobot"].sum()
-        ipk_akhir = total_bobot_edited / total_sks_edited if total_sks_edited > 0 else 0.0
+        # Grid simulasi: hanya halaman yang terlihat dikirim, suntingan disimpan di server
+        with tahap("render_grid_simulasi"):
+            edited_df = grid_suntingan(
+                "simulasi",
+                df_display,
+                key=kunci_grid,
+                update_mode="VALUE_CHANGED",
+                allow_unsafe_jscode=True,
+            )
+
+        # --- Perhitungan ulang IPK di backend: hanya dari MK yang diubah ---
+        with tahap("simulasi_ipk"):
+            delta = delta_dari_suntingan(basis, st.session_state[f"{kunci_grid}_suntingan"]["baris"])
+            ipk_akhir = ipk_skenario(basis, delta)
 
         with col1:
             st.plotly_chart(create_donut_chart(ipk_akhir, "IPK"), use_container_width=True)
 
         with col2:
             st.write("")
-            nilai_counts = edited_df["Nilai"].value_counts().reindex(list(NILAI_MAP.keys()), fill_value=0)
-
-            fig, ax = plt.subplots()
-            bars = ax.bar(nilai_counts.index, nilai_counts.values, color="#0074D9")
-            ax.spines["top"].set_visible(False)
-            ax.spines["right"].set_visible(False)
-            ax.set_ylim(0, nilai_counts.max() + 1.5)
-            for bar in bars:
-                height = bar.get_height()
-                ax.annotate(
-                    f"{int(height)}",
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha="center",
-                    va="bottom",
-                )
-            st.pyplot(fig)
+            with tahap("grafik_distribusi"):
+                st.pyplot(grafik_distribusi_nilai(edited_df["Nilai"]))
+
+        if skenario:
+            st.markdown("---")
+            st.subheader("Perbandingan Skenario")
+            dibandingkan = st.multiselect("Skenario", list(skenario), default=list(skenario)[-3:], key="banding_skenario")
+            ipk_transkrip = ipk_skenario(basis, {})
+            kolom = st.columns(len(dibandingkan) + 2)
+            kolom[0].metric("Transkrip", f"{ipk_transkrip:.2f}")
+            kolom[1].metric("Suntingan saat ini", f"{ipk_akhir:.2f}", f"{ipk_akhir - ipk_transkrip:+.2f}", help=f"{len(delta)} MK diubah")
+            for kol, nama in zip(kolom[2:], dibandingkan):
+                ipk = ipk_skenario(basis, skenario[nama])
+                kol.metric(nama, f"{ipk:.2f}", f"{ipk - ipk_transkrip:+.2f}", help=f"{len(skenario[nama])} MK diubah")
 
     else:
         if pilihan_semester == "Overview":
@@ -439,6 +364,22 @@ def display_main_app():
             with col1:
                 st.plotly_chart(create_donut_chart(ipk_awal, "IPK"), use_container_width=True)
 
+                # Posisi dalam angkatan (hanya jika gudang kohort tersedia)
+                with tahap("persentil"):
+                    peringkat = peringkat_gudang()
+                    angkatan = tahun_angkatan(transkrip_ori["Semester"])
+                    persen, n_kohort = peringkat.persentil_ipk(ipk_awal, angkatan) if peringkat else (None, 0)
+                if persen is not None:
+                    st.caption(f"Persentil IPK angkatan {angkatan}: **{persen:.0f}** dari {n_kohort} mahasiswa")
+                    with st.expander("Persentil per mata kuliah"):
+                        st.dataframe(
+                            peringkat.persentil_transkrip(
+                                df_unique_graded[["Kode MA", "Nama Mata Ajar", "Nilai"]], angkatan
+                            ),
+                            column_config={"Persentil": st.column_config.NumberColumn(format="%.0f")},
+                            hide_index=True,
+                        )
+
             with col2:
                 include_ongoing = st.checkbox(
                     "Sertakan mata kuliah yang sedang diambil",
@@ -449,7 +390,7 @@ def display_main_app():
                     # --- Progress Total SKS (Warna Biru) ---
                     styled_progress_bar(
                         value=total_sks_graded + total_sks_ongoing,
-                        total=144,
+                        total=sks_lulus,
                         color="#007bff",
                         label="SKS Terambil",
                     )
@@ -465,14 +406,14 @@ def display_main_app():
                     # --- Progress MK Pilihan (KBK) (Warna Ungu) ---
                     styled_progress_bar(
                         value=sks_kbk_transkrip,
-                        total=SKS_TARGET_KBK,
+                        total=sks_kbk,
                         color="#e4de1c",
                         label="MK Pilihan (KBK)",
                     )
                 else:
                     # --- Progress Total SKS (Warna Biru) ---
                     styled_progress_bar(
-                        value=total_sks_graded, total=144, color="#007bff", label="SKS Terambil"
+                        value=total_sks_graded, total=sks_lulus, color="#007bff", label="SKS Terambil"
                     )
 
                     # --- Progress MK Wajib (Warna Oranye) ---
@@ -486,11 +427,22 @@ def display_main_app():
                     # --- Progress MK Pilihan (KBK) (Warna Ungu) ---
                     styled_progress_bar(
                         value=sks_kbk_terambil,
-                        total=SKS_TARGET_KBK,
+                        total=sks_kbk,
                         color="#e4de1c",
                         label="MK Pilihan (KBK)",
                     )
 
+                # Peringatan dini dari sinyal yang sama dengan skor kohort (peringatan.py)
+                with tahap("peringatan_dini"):
+                    risiko = skor_risiko(fitur_analitik(analitik, sks_wajib_terambil), total_sks_wajib).iloc[0]
+                if risiko["tingkat"] == "Rendah":
+                    st.caption(f"Peringatan dini: risiko rendah (skor {risiko['skor']}/100)")
+                else:
+                    (st.error if risiko["tingkat"] == "Tinggi" else st.warning)(
+                        f"Peringatan dini: risiko **{risiko['tingkat'].lower()}** (skor {risiko['skor']}/100)\n\n"
+                        + "\n".join(f"- {a}" for a in alasan_risiko(risiko))
+                    )
+
             st.markdown("---")
             st.write("")
             st.write("")
@@ -498,41 +450,41 @@ def display_main_app():
 
             with col_grafik1:
                 st.subheader("Distribusi Nilai")
-                nilai_counts = df_unique_graded["Nilai"].value_counts().reindex(list(NILAI_MAP.keys()), fill_value=0)
-
-                fig, ax = plt.subplots()
-                bars = ax.bar(nilai_counts.index, nilai_counts.values, color="#0074D9")
-                ax.spines["top"].set_visible(False)
-                ax.spines["right"].set_visible(False)
-                ax.set_ylim(0, nilai_counts.max() + 1.5)
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.annotate(
-                        f"{int(height)}",
-                        xy=(bar.get_x() + bar.get_width() / 2, height),
-                        xytext=(0, 3),
-                        textcoords="offset points",
-                        ha="center",
-                        va="bottom",
-                    )
-                st.pyplot(fig)
+                with tahap("grafik_distribusi"):
+                    st.pyplot(grafik_distribusi_nilai(df_unique_graded["Nilai"]))
 
             with col_grafik2:
                 st.subheader("Grafik IPS")
-                x = ips_df.index + 1
-                y = ips_df["IPS"]
-
-                fig, ax = plt.subplots()
-                ax.plot(x, y, marker="o", markersize=8, color="#2ECC40", linewidth=2)
-                for i, val in enumerate(y):
-                    ax.text(x[i], val + 0.05, f"{val:.2f}", ha="center", va="bottom", fontsize=10, color="#333")
-                ax.spines["top"].set_visible(False)
-                ax.spines["right"].set_visible(False)
-                ax.set_ylim(1, 4.1)
-                ax.set_xlim(0.5, len(x) + 0.5)
-                ax.set_xticks(x)
-                ax.set_xticklabels(ips_df["SemesterLabel"], rotation=45, ha="right")
-                st.pyplot(fig)
+                with tahap("grafik_ips"):
+                    st.pyplot(grafik_ips(ips_df))
+
+            # Proyeksi Monte Carlo; disimpan per sesi sampai transkrip atau gudang berubah
+            with st.expander("🎲 Proyeksi IPK Akhir & Kelulusan"):
+                kunci_proyeksi = (tuple(transkrip_ori.index), program["kode"], peringkat.versi if peringkat else None)
+                simpanan = st.session_state.get("proyeksi")
+                if simpanan is None or simpanan["kunci"] != kunci_proyeksi:
+                    with tahap("proyeksi"):
+                        mk_df = mk_tersisa(analitik, df_wajib_BT, df_kbk_BT, sks_lulus, sks_kbk, sks_kbk_transkrip)
+                        simpanan = st.session_state.proyeksi = {
+                            "kunci": kunci_proyeksi,
+                            "hasil": proyeksi(analitik, mk_df, peringkat.distribusi_mk if peringkat else None),
+                        }
+                hasil = simpanan["hasil"]
+                p10, p50, p90 = np.percentile(hasil["ipk"], [10, 50, 90])
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Median IPK akhir", f"{p50:.2f}")
+                m2.metric("Rentang 80%", f"{p10:.2f} – {p90:.2f}")
+                m3.metric(f"Lulus ≤ semester {SEMESTER_TEPAT_WAKTU}", f"{100 * hasil['tepat_waktu']:.0f}%")
+                col_p1, col_p2 = st.columns(2)
+                with col_p1:
+                    st.pyplot(grafik_proyeksi_ipk(hasil["ipk"]))
+                with col_p2:
+                    st.pyplot(grafik_peluang_lulus(hasil["peluang_lulus"]))
+                st.caption(
+                    f"{N_LINTASAN:,} lintasan. Nilai diundi dari distribusi nilai Anda"
+                    + (", atau distribusi angkatan per mata kuliah bila tersedia" if peringkat else "")
+                    + "; jatah SKS tiap semester mengikuti IPS semester sebelumnya."
+                )
 
             st.markdown("---")
 
@@ -540,48 +492,55 @@ def display_main_app():
             st.header("Transkrip Nilai", help="Tabel ini hanya menampilkan nilai terbaik jika ada mata kuliah yang diulang.")
 
             if include_ongoing:
-                df_display = pd.concat([df_unique_graded, df_ongoing], ignore_index=True).drop(columns=["Bobot_numeric"])
+                df_display = pd.concat([df_unique_graded, df_ongoing], ignore_index=True).drop(columns=["Bobot_numeric", KOLOM_KUNCI])
             else:
-                df_display = df_unique_graded.drop(columns=["Bobot_numeric"])
-
-            # Konfigurasi AgGrid untuk Transkrip
-            gb_transkrip = GridOptionsBuilder.from_dataframe(df_display[["Semester", "Nama Mata Ajar", "SKS", "Nilai", "Bobot"]])
-            gb_transkrip.configure_default_column(editable=False, headerClass="ag-left-aligned-header")
-            gb_transkrip.configure_column("Nama Mata Ajar", width=400)
-            gb_transkrip.configure_column("SKS", width=100, cellStyle={"text-align": "center"})
-            gb_transkrip.configure_column("Nilai", width=100, cellStyle={"text-align": "center"})
-            gb_transkrip.configure_column("Bobot", width=100, cellStyle={"text-align": "center"})
-            grid_options_transkrip = gb_transkrip.build()
-
-            AgGrid(
-                df_display,
-                gridOptions=grid_options_transkrip,
-                fit_columns_on_grid_load=True,
-                theme="balham",
-                allow_unsafe_jscode=True,
-            )
+                df_display = df_unique_graded.drop(columns=["Bobot_numeric", KOLOM_KUNCI])
+
+            with tahap("render_grid_transkrip"):
+                tampilkan_grid("transkrip", df_display[["Semester", "Nama Mata Ajar", "SKS", "Nilai", "Bobot"]])
 
             st.markdown("<br>", unsafe_allow_html=True)
             st.markdown("---")
 
             # --- BAGIAN MATA KULIAH BELUM DIAMBIL ---
             st.header("Mata Kuliah Belum Diambil")
+            st.caption("Dipisah menurut prasyarat semester depan, dengan anggapan MK yang sedang diambil lulus")
+
+            # Bitset MK selesai (lulus + sedang diambil) terhadap kurikulum terkompilasi
+            with tahap("prasyarat"):
+                kompilasi = kompilasi_program(program)
+                kunci_berjalan = df_ongoing[KOLOM_KUNCI].tolist()
+                selesai = bitset(kompilasi, np.concatenate([
+                    posisi_kurikulum(kompilasi, df_wajib_terambil, "Wajib"),
+                    posisi_kurikulum(kompilasi, df_kbk_terambil, "KBK"),
+                    posisi_kurikulum(kompilasi, smart_find_taken_courses(kurikulum_df, kunci_berjalan), "Wajib"),
+                    posisi_kurikulum(kompilasi, smart_find_taken_courses(kbk_df, kunci_berjalan), "KBK"),
+                ]))
+                kelayakan = kelayakan_mahasiswa(
+                    kompilasi, selesai, total_sks_graded + total_sks_ongoing, bagi_ratus(total_bobot_graded, total_sks_graded)
+                )
+                wajib_BT = tandai_kelayakan(kompilasi, kelayakan, df_wajib_BT, "Wajib")
+                kbk_BT = tandai_kelayakan(kompilasi, kelayakan, df_kbk_BT, "KBK")
 
             # Tabel untuk Mata Kuliah Wajib
             st.subheader("MK Wajib")
-            gb_wajib = GridOptionsBuilder.from_dataframe(df_wajib_BT[["Semester", "Mata Kuliah", "SKS", "Prasyarat"]])
-            gb_wajib.configure_column("Mata Kuliah", width=400)
-            gb_wajib.configure_column("SKS", width=100, cellStyle={"text-align": "center"})
-            grid_options_wajib = gb_wajib.build()
-            AgGrid(df_wajib_BT, gridOptions=grid_options_wajib, fit_columns_on_grid_load=True, theme="balham")
+            tab_bisa, tab_terkunci = st.tabs(
+                [f"Bisa diambil ({wajib_BT['Layak'].sum()})", f"Terkunci prasyarat ({(~wajib_BT['Layak']).sum()})"]
+            )
+            with tab_bisa, tahap("render_grid_wajib"):
+                tampilkan_grid("wajib", wajib_BT.loc[wajib_BT["Layak"], ["Semester", "Mata Kuliah", "SKS", "Prasyarat"]], key="grid_wajib")
+            with tab_terkunci:
+                tampilkan_grid("wajib_terkunci", wajib_BT.loc[~wajib_BT["Layak"], ["Semester", "Mata Kuliah", "SKS", "Kurang"]], key="grid_wajib_terkunci")
 
             # Tabel untuk Mata Kuliah Pilihan (KBK)
             st.subheader("MK Pilihan (KBK)")
-            gb_kbk = GridOptionsBuilder.from_dataframe(df_kbk_BT[["Semester", "Mata Kuliah", "SKS", "Prasyarat"]])
-            gb_kbk.configure_column("Mata Kuliah", width=400)
-            gb_kbk.configure_column("SKS", width=100, cellStyle={"text-align": "center"})
-            grid_options_kbk = gb_kbk.build()
-            AgGrid(df_kbk_BT, gridOptions=grid_options_kbk, fit_columns_on_grid_load=True, theme="balham")
+            tab_bisa, tab_terkunci = st.tabs(
+                [f"Bisa diambil ({kbk_BT['Layak'].sum()})", f"Terkunci prasyarat ({(~kbk_BT['Layak']).sum()})"]
+            )
+            with tab_bisa, tahap("render_grid_kbk"):
+                tampilkan_grid("kbk", kbk_BT.loc[kbk_BT["Layak"], ["Semester", "Mata Kuliah", "SKS", "Prasyarat"]], key="grid_kbk")
+            with tab_terkunci:
+                tampilkan_grid("kbk_terkunci", kbk_BT.loc[~kbk_BT["Layak"], ["Semester", "Mata Kuliah", "SKS", "Kurang"]], key="grid_kbk_terkunci")
 
         else:
             for sem in list_semester:
@@ -610,13 +569,7 @@ def display_main_app():
                         st.warning("Nilai anda belum keluar")
                         st.markdown("---")
 
-                        gb_wajib = GridOptionsBuilder.from_dataframe(df_sem[["Nama Mata Ajar", "SKS", "Nilai", "Bobot"]])
-                        gb_wajib.configure_column("Nama Mata Ajar", width=400)
-                        gb_wajib.configure_column("SKS", width=100, cellStyle={"text-align": "center"})
-                        gb_wajib.configure_column("Nilai", width=100, cellStyle={"text-align": "center"})
-                        gb_wajib.configure_column("Bobot", width=100, cellStyle={"text-align": "center"})
-                        grid_options_wajib = gb_wajib.build()
-                        AgGrid(df_sem, gridOptions=grid_options_wajib, fit_columns_on_grid_load=True, theme="balham")
+                        tampilkan_grid("semester", df_sem)
 
                     else:  # tampilan untuk semester sebelumnya
                         st.title(f"Semester {sem}")
@@ -626,7 +579,7 @@ def display_main_app():
 
                         with col1:
                             ips_value = ips_df.loc[ips_df["Semester"] == pilihan_semester, "IPS"].values[0]
-                            ips = Decimal(ips_value)
+                            ips_ratus = ips_df.loc[ips_df["Semester"] == pilihan_semester, "IPS_Ratus"].values[0]
                             st.plotly_chart(create_donut_chart(ips_value, "IPS"), use_container_width=True)
 
                         with col2:
@@ -648,18 +601,97 @@ def display_main_app():
                             )
 
                         st.info(
-                            f"IPS anda {ips.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)}, "
-                            f"Jatah SKS anda semester depan adalah {hitung_jatah_sks(ips_value)} SKS"
+                            f"IPS anda {format_ratus(ips_ratus)}, "
+                            f"Jatah SKS anda semester depan adalah {hitung_jatah_sks_ratus(ips_ratus)} SKS"
                         )
                         st.markdown("---")
 
-                        gb_wajib = GridOptionsBuilder.from_dataframe(df_sem[["Nama Mata Ajar", "SKS", "Nilai", "Bobot"]])
-                        gb_wajib.configure_column("Nama Mata Ajar", width=400)
-                        gb_wajib.configure_column("SKS", width=100, cellStyle={"text-align": "center"})
-                        gb_wajib.configure_column("Nilai", width=100, cellStyle={"text-align": "center"})
-                        gb_wajib.configure_column("Bobot", width=100, cellStyle={"text-align": "center"})
-                        grid_options_wajib = gb_wajib.build()
-                        AgGrid(df_sem, gridOptions=grid_options_wajib, fit_columns_on_grid_load=True, theme="balham")
+                        tampilkan_grid("semester", df_sem)
+
+def display_analitik_mk():
+    """Tingkat kesulitan dan kelulusan mata kuliah dari gudang kohort."""
+    st.title("Analitik Mata Kuliah")
+    st.markdown("---")
+
+    gudang = Gudang(GUDANG_ROOT)
+    if not gudang.manifest["nim"]:
+        st.info("Gudang kohort belum tersedia. Isi dulu dengan `python src/gudang.py tambah <folder transkrip>`.")
+        return
+
+    with tahap("kesulitan_mk"):
+        program = muat_program(st.session_state.get("program"))
+        ringkasan, tren = kesulitan_gudang(gudang, program["wajib"], program["kbk"], program["kode"])
+    st.caption(f"Dari {len(gudang.manifest['nim'])} mahasiswa di gudang kohort")
+
+    # Skor risiko seluruh gudang; hanya mahasiswa dari batch baru yang dihitung ulang
+    with st.expander("⚠️ Peringatan Dini Kohort"):
+        with tahap("peringatan_kohort"):
+            peringatan = peringatan_gudang(program)
+        tabel = peringatan.tabel
+        daftar_angkatan = sorted(tabel["angkatan"].dropna().astype(int).unique())
+        angkatan = st.selectbox("Angkatan", ["Semua", *daftar_angkatan], key="angkatan_peringatan")
+        angkatan = None if angkatan == "Semua" else angkatan
+        if angkatan is not None:
+            tabel = tabel[tabel["angkatan"] == angkatan]
+        for kol, (tingkat, jumlah) in zip(st.columns(len(TINGKAT)), peringatan.ringkasan(angkatan).items()):
+            kol.metric(f"Risiko {tingkat.lower()}", int(jumlah))
+        st.dataframe(
+            tabel[tabel["tingkat"] != "Rendah"].sort_values("skor", ascending=False)[[
+                "angkatan", "jumlah_semester", "ips_terakhir", "tren_ips", "jatah_sks",
+                "mk_e", "kurang_wajib", "skor", "tingkat", "percobaan", "terlambat",
+            ]].assign(ips_terakhir=lambda d: d["ips_terakhir"] / 100),
+            column_config={
+                "angkatan": st.column_config.NumberColumn(format="%d"),
+                "ips_terakhir": st.column_config.NumberColumn("IPS terakhir", format="%.2f"),
+                "tren_ips": st.column_config.NumberColumn("Tren IPS", format="%+.2f"),
+            },
+            use_container_width=True,
+        )
+
+    # Jumlah mahasiswa yang memenuhi prasyarat tiap MK semester depan (bitset prasyarat.py)
+    with st.expander("📅 Perkiraan Peminat Semester Depan"):
+        kol_paritas, kol_angkatan = st.columns(2)
+        paritas = kol_paritas.selectbox("Semester", ["Ganjil", "Genap", "Semua"], key="paritas_permintaan")
+        angkatan = kol_angkatan.selectbox("Angkatan", ["Semua", *daftar_angkatan], key="angkatan_permintaan")
+        with tahap("permintaan_mk"):
+            permintaan = permintaan_gudang(
+                program, None if angkatan == "Semua" else angkatan, None if paritas == "Semua" else paritas
+            )
+        st.caption("Layak: semua prasyarat lulus atau sedang diambil, dan MK belum pernah diambil")
+        st.dataframe(
+            permintaan.sort_values(["Layak", "Terkunci"], ascending=False),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    kolom_persen = [f"% {h}" for h in HURUF_NILAI] + ["% Mengulang"]
+    st.dataframe(
+        ringkasan.sort_values("Rata Bobot", na_position="last"),
+        column_config={
+            **{k: st.column_config.NumberColumn(format="%.1f") for k in kolom_persen},
+            "Rata Bobot": st.column_config.NumberColumn(format="%.2f"),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    ada_data = ringkasan[ringkasan["Percobaan"] > 0]
+    if ada_data.empty:
+        return
+    label = ada_data["Kode MA"] + " - " + ada_data["Mata Kuliah"]
+    pilihan = st.selectbox("Pilih Mata Kuliah:", options=label.tolist())
+    baris = ada_data[label == pilihan].iloc[0]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("##### Distribusi Nilai")
+        hitungan = pd.Series(
+            [round(baris[f"% {h}"] * baris["Percobaan"] / 100) for h in HURUF_NILAI], index=HURUF_NILAI
+        )
+        st.pyplot(grafik_hitungan_nilai(hitungan))
+    with col2:
+        st.markdown("##### Tren per Tahun Akademik")
+        st.pyplot(grafik_tren_mk(tren[tren["Kode MA"] == baris["Kode MA"]]))
 
 def display_sniper_page():
     # Konfigurasi Batas Log
@@ -935,10 +967,10 @@ def eksekusi_sniper_otomatis(target_matkul, target_kelas):
     # Update header wajib untuk KRS agar tombol muncul
     session.headers.update({
         "X-Requested-With": "XMLHttpRequest",
-        "Referer": "https://mahasiswa.unair.ac.id/modul/mhs/akademik-krs.php"
+        "Referer": BASE_URL + "modul/mhs/akademik-krs.php"
     })
 
-    base_url = "https://mahasiswa.unair.ac.id/"
+    base_url = BASE_URL
     url_krs = base_url + "modul/mhs/proses/_akademik-krs_ditambah.php"
     
     try:
@@ -973,7 +1005,7 @@ def eksekusi_sniper_otomatis(target_matkul, target_kelas):
                     ids = re.findall(r'\d+', tombol['onclick'])
                     if len(ids) >= 2:
                         payload = {'aksi': 'input', 'kelas': ids[0], 'id_kur_mk': ids[1], 'sid': sid}
-                        res = session.post(url_krs, data=payload)
+                        res = session.post(url_krs, data=payload, timeout=15)
                         if "berhasil" in res.text.lower():
                             return True, "BERHASIL"
                         return False, f"Gagal Simpan: {res.text[:30]}"
@@ -993,36 +1025,17 @@ def eksekusi_sniper_otomatis(target_matkul, target_kelas):
 def display_login_form():
     # 1. Pastikan Session tetap hidup dan tidak berubah
     if 'session' not in st.session_state:
-        st.session_state.session = requests.Session()
-        st.session_state.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Referer": "https://mahasiswa.unair.ac.id/"
-        })
+        st.session_state.session = buat_session()
     
     session = st.session_state.session
-    base_url = "https://mahasiswa.unair.ac.id/"
+    base_url = BASE_URL
 
     # 2. Fungsi untuk mengambil Token & Captcha (Hanya dipanggil jika belum ada)
     def fetch_security_data():
         try:
-            resp = session.get(base_url, timeout=15)
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            # Ambil CSRF Token (Sesuai HTML: name="csrf_token")
-            token_el = soup.find("input", {"name": "csrf_token"})
-            token = token_el.get("value", "") if token_el else ""
-            
-            # Ambil URL Gambar Captcha (Sesuai HTML: alt="captcha")
-            img_tag = soup.find("img", {"alt": "captcha"})
-            captcha_bytes = None
-            if img_tag:
-                c_src = img_tag.get("src")
-                c_url = base_url + c_src if not c_src.startswith("http") else c_src
-                # Header Accept agar server tahu kita minta gambar
-                c_resp = session.get(c_url, headers={"Accept": "image/*"}, timeout=10)
-                if "image" in c_resp.headers.get("Content-Type", ""):
-                    captcha_bytes = c_resp.content
-            
+            # Captcha diunduh paralel dengan parsing token
+            token, captcha_bytes, waktu = ambil_data_keamanan(session, base_url)
+            st.session_state.setdefault("waktu_fetch", {})["keamanan"] = waktu
             return token, captcha_bytes
         except Exception as e:
             st.error(f"Gagal menghubungi server Unair: {e}")
@@ -1030,7 +1043,8 @@ def display_login_form():
 
     # Inisialisasi data keamanan jika belum ada
     if 'login_token' not in st.session_state or st.session_state.login_token == "":
-        t, c = fetch_security_data()
+        with tahap("ambil_keamanan"):
+            t, c = fetch_security_data()
         st.session_state.login_token = t
         st.session_state.captcha_bytes = c
 
@@ -1077,7 +1091,8 @@ def display_login_form():
                     }
                     
                     # Login POST (HANYA SEKALI)
-                    login_resp = session.post(f"{base_url}login.php", data=payload)
+                    with tahap("login_post"):
+                        login_resp = session.post(f"{base_url}login.php", data=payload, timeout=(5, 20))
                     
                     # Cek apakah login berhasil
                     if "Histori Nilai" in login_resp.text or "Biodata" in login_resp.text:
@@ -1086,103 +1101,14 @@ def display_login_form():
                         if "Alumni" in login_resp.text or input_nim.startswith("A"):
                             trans_url = f"{base_url}modul/alumni/akademik-transkrip.php"
                         
-                        # Ambil data transkrip
-                        transkrip_resp = session.get(trans_url)
-
-                        if "Histori Nilai" in transkrip_resp.text:
-                            soup = BeautifulSoup(transkrip_resp.text, "html.parser")
-                            tables = soup.find_all("table")
-
-                            # --- LOGIKA EKSTRAKSI AKUN YANG DIPERBARUI ---
-                            user_info = {}
-                            info_table = None
-                            for table in tables:
-                                # Cari tabel yang kemungkinan besar berisi info mahasiswa
-                                if "NAMA" in table.get_text().upper() and "NIM" in table.get_text().upper():
-                                    info_table = table
-                                    break
-
-                            if info_table:
-                                rows = info_table.find_all("tr")
-                                for row in rows:
-                                    cols = row.find_all("td")
-                                    # Loop melalui setiap sel untuk mencari kunci informasi
-                                    for i, col in enumerate(cols):
-                                        key = col.get_text(strip=True)
-                                        # Periksa apakah ini adalah kunci yang kita cari
-                                        if "Nama" in key and i + 1 < len(cols):
-                                            value = cols[i + 1].get_text(strip=True)
-                                            # Bersihkan nilai dari karakter ':'
-                                            if value.startswith(":"):
-                                                value = value[1:].strip()
-                                            user_info["Nama Lengkap"] = value
-
-                                        if "NIM" in key and i + 1 < len(cols):
-                                            value = cols[i + 1].get_text(strip=True)
-                                            if value.startswith(":"):
-                                                value = value[1:].strip()
-                                            user_info["NIM"] = value
-
-                            st.session_state.user_info = user_info
-
-                            def table_has_keywords(table, keywords=("SEMESTER", "NAMA MATA AJAR", "NILAI")):
-                                text = " ".join(th.get_text(" ", strip=True).upper() for th in table.find_all(["th", "td"])[:10])
-                                return any(k in text for k in keywords)
-
-                            target_idx = None
-                            for i, table in enumerate(tables):
-                                if table_has_keywords(table):
-                                    target_idx = i
-                                    break
-
-                            if target_idx is None:
-                                st.error("Tabel nilai tidak ditemukan.")
-                                return
-
-                            target = tables[target_idx]
-                            rows = target.find_all("tr")
-
-                            data = []
-                            for row in rows:
-                                cols = row.find_all(["th", "td"])
-                                text_cols = [c.get_text(" ", strip=True) for c in cols]
-                                if any(cell.strip() for cell in text_cols):
-                                    data.append(text_cols)
-
-                            header = data[0]
-                            data_rows = data[1:]
-
-                            def semester_key(semester_str):
-                                if not semester_str or "/" not in semester_str:
-                                    return (0, 0)
-                                try:
-                                    tahun_awal = int(semester_str.split("/")[0].strip())
-                                except ValueError:
-                                    tahun_awal = 0
-                                jenis = "Ganjil" if "Ganjil" in semester_str else "Genap"
-                                urutan = 0 if jenis == "Ganjil" else 1
-                                return (tahun_awal, urutan)
-
-                            data_rows.sort(key=lambda r: semester_key(r[0]))
-
-                            wb = Workbook()
-                            ws = wb.active
-                            ws.title = "Transkrip Nilai"
-                            ws.append(header)
-                            for row in data_rows[3:]:
-                                ws.append(row)
-
-                            excel_buffer = BytesIO()
-                            wb.save(excel_buffer)
-                            excel_buffer.seek(0)
-
-                            st.session_state.df = pd.read_excel(excel_buffer)
-                            st.session_state.logged_in = True
-                            st.success("Login berhasil!")
-                            st.rerun()
-
-                        else:
-                            st.error("Gagal menarik data transkrip. Sesi mungkin berakhir.")
+                        # Transkrip + biodata diambil, di-parse dan dianalisis di latar;
+                        # dashboard langsung tampil dan terisi begitu datanya ada
+                        st.session_state.muat = mulai_muat(session, trans_url, base_url + PATH_BIODATA)
+                        st.session_state.df = None
+                        st.session_state.analitik = None
+                        st.session_state.trans_url = trans_url
+                        st.session_state.logged_in = True
+                        st.rerun()
                     else:
                         # Jika gagal, ambil alasan errornya
                         soup_err = BeautifulSoup(login_resp.text, "html.parser")
@@ -1202,6 +1128,127 @@ def display_login_form():
 
 
 
+# --- Pemuatan transkrip di latar setelah login ---
+def serap_muat():
+    """
+    Memindahkan isi pegangan pemuatan latar ke session_state. Jika pemuatan
+    gagal, sesi kembali ke form login dengan pesan galatnya. Mengembalikan
+    versi pegangan yang sudah diserap (None jika tidak ada pemuatan).
+    """
+    pegangan = st.session_state.get("muat")
+    if pegangan is None:
+        return None
+    versi = pegangan["versi"]  # dibaca lebih dulu: perubahan sesudahnya memicu rerun berikutnya
+    if pegangan["user_info"] is not None:
+        st.session_state.user_info = pegangan["user_info"]
+    if not muat_selesai(pegangan):
+        return versi
+
+    del st.session_state.muat
+    st.session_state.setdefault("waktu_fetch", {}).update(
+        {k: v for k, v in pegangan["waktu"].items() if isinstance(v, dict)}
+    )
+    if pegangan["fase"] == "gagal":
+        st.session_state.logged_in = False
+        st.session_state.login_error_msg = pegangan["galat"]
+        st.session_state.login_token = ""
+        st.rerun()
+    st.session_state.df = pegangan["df"]
+    st.session_state.analitik = pegangan["analitik"]
+    return None
+
+
+@st.fragment(run_every=INTERVAL_PANTAU)
+def pantau_muat(versi):
+    """Merender ulang aplikasi setiap kali pegangan berubah sejak rerun terakhir."""
+    pegangan = st.session_state.get("muat")
+    if pegangan is None or pegangan["versi"] != versi:
+        st.rerun()
+    st.caption(f"⏳ {FASE_MUAT[pegangan['fase']]} ({time.time() - pegangan['mulai']:.1f} detik)")
+
+
+def display_memuat():
+    """Kerangka dashboard selama transkrip masih dimuat di latar."""
+    pegangan = st.session_state.muat
+    st.title("Transkrip Akademik")
+    st.markdown("---")
+
+    # Kurikulum sudah ada di cache proses; program terdeteksi dari biodata jika sudah tiba
+    program = muat_program(deteksi_program(pegangan["user_info"]))
+    st.sidebar.caption(f"Kurikulum: {program['nama']}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Mata Kuliah Wajib", f"{len(program['wajib'])} MK", f"{int(program['wajib']['SKS'].sum())} SKS", delta_color="off")
+    with col2:
+        st.metric("Syarat Lulus", f"{program['sks_lulus']} SKS", f"KBK {program['sks_kbk']} SKS", delta_color="off")
+    if pegangan["jumlah_baris"] is not None:
+        st.caption(f"{pegangan['jumlah_baris']} baris nilai ditemukan di transkrip")
+
+
+# --- Laporan unduhan dibuang agar dibuat ulang dari data terbaru ---
+def buang_laporan():
+    st.session_state.pop("laporan", None)
+
+
+def minta_login_ulang():
+    """
+    Cookie portal tidak pernah disalin ke backend bersama (keadaan.py): klien
+    yang dipulihkan di proses lain kembali ke form login sebelum memakai portal.
+    """
+    st.session_state.logged_in = False
+    st.session_state.login_error_msg = "Sesi portal tidak tersedia, silakan login kembali."
+    st.session_state.login_token = ""
+
+
+# --- Fungsi untuk menarik ulang transkrip tanpa login ulang ---
+def perbarui_transkrip():
+    """Menarik ulang transkrip dan hanya menerapkan baris yang berubah."""
+    session = st.session_state.get("session")
+    if session is None:
+        minta_login_ulang()
+        return
+    try:
+        transkrip_resp = session.get(st.session_state.trans_url, timeout=15)
+    except requests.exceptions.RequestException as e:
+        st.sidebar.error(f"Terjadi kesalahan koneksi: {e}")
+        return
+
+    if "Histori Nilai" not in transkrip_resp.text:
+        st.sidebar.error("Gagal menarik data transkrip. Sesi mungkin berakhir.")
+        return
+
+    _, df = parse_transkrip_html(transkrip_resp.text)
+    if df is None:
+        st.sidebar.error("Tabel nilai tidak ditemukan.")
+        return
+
+    if st.session_state.get("analitik") is None:
+        st.session_state.analitik = analitik_transkrip(st.session_state.df)
+    analitik, beda = perbarui_analitik(st.session_state.analitik, df)
+    st.session_state.df = df
+    st.session_state.analitik = analitik
+    if beda["ditambah"].size or beda["dihapus"].size:
+        simpan_analitik(df, analitik)
+    buang_laporan()
+
+    jumlah = len(beda["ditambah"]) + len(beda["dihapus"])
+    if jumlah:
+        st.toast(f"{jumlah} baris nilai berubah", icon="🔄")
+    else:
+        st.toast("Tidak ada perubahan nilai", icon="✅")
+
+
+
+# Objek yang ditumpahkan ke disk saat sesi diam dipulihkan sebelum session_state dibaca
+pulihkan_sesi()
+
+# State klien (cookie id klien) dari backend bersama: proses lain atau muat ulang halaman melanjutkan sesi yang sama
+pulihkan_klien()
+
+# Cache bersama proses; no-op jika server dijalankan lewat `python src/pemanasan.py`
+panaskan_latar()
+
 # --- Inisialisasi session state ---
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -1210,17 +1257,26 @@ if "df" not in st.session_state:
 # Inisialisasi kunci untuk fitur reset
 if "grid_key_counter" not in st.session_state:
     st.session_state.grid_key_counter = 0
+mulai_rerun()
+catat_sesi()
+_mulai_rerun = time.perf_counter()
+st.session_state.view_metrik = "login"
+st.session_state.payload_rerun = 0
 
 # ==============================================================================
 # ROUTER UTAMA (UPDATE)
 # ==============================================================================
 if not st.session_state.logged_in:
-    display_login_form()
+    with tahap("form_login"):
+        display_login_form()
 else:
+    versi_muat = serap_muat()
+
     # Sidebar Configuration
     with st.sidebar:
         # 1. KARTU PROFIL (Menghilangkan duplikasi)
         st.sidebar.title('🏛️ Our Campus') 
+        u_nama, u_nim = "Memuat profil...", ""
         if "user_info" in st.session_state and st.session_state.user_info:
             u_nama = st.session_state.user_info.get("Nama Lengkap", "Mahasiswa")
             u_nim = st.session_state.user_info.get("NIM", "")
@@ -1237,8 +1293,8 @@ else:
         # 2. NAVIGASI MODERN (Pengganti Radio Button)
         selected = option_menu(
             menu_title=None, 
-            options=["Dashboard", "KRS Sniper"], 
-            icons=["bar-chart-line-fill", "crosshair"], 
+            options=["Dashboard", "Analitik MK", "KRS Sniper"], 
+            icons=["bar-chart-line-fill", "clipboard-data", "crosshair"], 
             menu_icon="cast", 
             default_index=0,
             styles={
@@ -1252,9 +1308,22 @@ else:
     # Router Halaman
     if selected == "Dashboard":
         # PENTING: Pastikan display_main_app() kamu SUDAH BERSIH dari kode st.sidebar lama!
-        display_main_app() 
+        with tahap("dashboard"):
+            if versi_muat is not None:
+                display_memuat()
+            else:
+                display_main_app()
         
+    elif selected == "Analitik MK":
+        st.session_state.view_metrik = "analitik_mk"
+        with tahap("analitik_mk"):
+            display_analitik_mk()
+
     elif selected == "KRS Sniper":
+        st.session_state.view_metrik = "sniper"
+        if "session" not in st.session_state:
+            minta_login_ulang()
+            st.rerun()
         display_sniper_page()
 
     # Tombol Logout Terpisah di Bawah
@@ -1266,7 +1335,22 @@ else:
         <p style="margin:0; font-size: 12px; color: green;">● Online</p>
     </div>
     """, unsafe_allow_html=True)
+    if versi_muat is not None:
+        # Dipantau dari sidebar agar halaman mana pun ikut terisi begitu data tiba
+        with st.sidebar:
+            pantau_muat(versi_muat)
+    elif "trans_url" in st.session_state:
+        st.sidebar.button("🔄 Perbarui Nilai", on_click=perbarui_transkrip, use_container_width=True)
     if st.sidebar.button("🚪 Logout Akun", use_container_width=True):
+        hapus_klien()
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
+
+panel_admin()
+simpan_klien()
+
+# Rerun yang dihentikan st.rerun()/st.stop() tidak ikut tercatat
+catat_rerun(st.session_state.get("view_metrik", "login"), time.perf_counter() - _mulai_rerun)
+catat_payload_rerun(st.session_state.get("view_metrik", "login"), st.session_state.get("payload_rerun", 0))
+ekspor_metrik()
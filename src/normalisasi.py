@@ -0,0 +1,85 @@
+
+__author__ = "irr"
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# ==============================================================================
+# KUNCI KANONIK NAMA MATA KULIAH
+# ==============================================================================
+# Nama MK di transkrip portal dan di workbook kurikulum sering berbeda hanya
+# pada penulisan: "Fisika Dasar 1" / "Fisika Dasar I", spasi ganda, tanda
+# baca "(Praktikum)", singkatan "Prak." / "Lab.". Kunci kanonik menyamakan
+# semuanya sekali saat data dimuat (kolom KOLOM_KUNCI), sehingga pencocokan
+# cukup membandingkan kunci dan hanya sisa yang benar-benar berbeda yang masuk
+# tahap kemiripan (SequenceMatcher).
+KOLOM_KUNCI = "Kunci"
+
+# Singkatan dan padanan Inggris -> bentuk baku (per kata, setelah huruf kecil)
+SINGKATAN = {
+    "prak": "praktikum",
+    "practicum": "praktikum",
+    "lab": "laboratorium",
+    "laboratory": "laboratorium",
+    "mat": "matematika",
+    "matematik": "matematika",
+    "mathematics": "matematika",
+    "peng": "pengantar",
+    "introduction": "pengantar",
+    "intro": "pengantar",
+    "dsr": "dasar",
+    "fis": "fisika",
+    "physics": "fisika",
+    "komp": "komputasi",
+    "computational": "komputasi",
+    "eksp": "eksperimental",
+    "experimental": "eksperimental",
+    "&": "dan",
+    "and": "dan",
+}
+
+# Angka romawi 1-39 sebagai kata utuh; "di", "mi" dan sejenisnya tidak cocok
+_ROMAWI = re.compile(r"^(x{0,3})(ix|iv|v?i{0,3})$")
+_NILAI_ROMAWI = {"i": 1, "v": 5, "x": 10}
+# Huruf yang menempel ke angka dipisah: "fisika1" -> "fisika 1"
+_BATAS_ANGKA = re.compile(r"(?<=[a-z])(?=\d)|(?<=\d)(?=[a-z])")
+_BUKAN_ALNUM = re.compile(r"[^a-z0-9&]+")
+
+
+def _romawi_ke_arab(kata):
+    total = 0
+    for i, h in enumerate(kata):
+        nilai = _NILAI_ROMAWI[h]
+        if i + 1 < len(kata) and _NILAI_ROMAWI[kata[i + 1]] > nilai:
+            total -= nilai
+        else:
+            total += nilai
+    return str(total)
+
+
+@lru_cache(maxsize=8192)
+def kunci_nama(nama):
+    """
+    Kunci kanonik satu nama MK: huruf kecil tanpa aksen, tanda baca jadi spasi,
+    singkatan diperluas, angka romawi dan "01" jadi angka arab.
+    """
+    if not isinstance(nama, str):
+        return ""
+    teks = unicodedata.normalize("NFKD", nama).encode("ascii", "ignore").decode().lower()
+    teks = _BATAS_ANGKA.sub(" ", _BUKAN_ALNUM.sub(" ", teks.replace("&", " & ")))
+
+    kata = []
+    for k in teks.split():
+        if k.isdigit():
+            k = str(int(k))
+        elif _ROMAWI.match(k):
+            k = _romawi_ke_arab(k)
+        kata.append(SINGKATAN.get(k, k))
+    return " ".join(kata)
+
+
+def kunci_kolom(nama_series):
+    """Kunci kanonik untuk satu kolom nama (tiap nama unik dihitung sekali)."""
+    unik = nama_series.dropna().unique()
+    return nama_series.map(dict(zip(unik, map(kunci_nama, unik)))).fillna("")
@@ -0,0 +1,170 @@
+
+__author__ = "irr"
+
+import importlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+from metrik import daftarkan_gauge
+from profil import catat_proses
+
+# ==============================================================================
+# PEMANASAN PROSES SERVER
+# ==============================================================================
+# Sumber daya bersama per proses (modul berat, cache font matplotlib, workbook
+# kurikulum beserta kunci kanoniknya, histogram dan skor risiko gudang kohort)
+# dimuat sekali sebelum sesi pertama datang, sehingga sesi pertama setelah
+# deploy secepat sesi berikutnya. Jalankan server lewat:
+#
+#     python src/pemanasan.py [argumen streamlit run ...]
+#
+# Tanpa peluncur ini, nilai.py memanggil panaskan_latar() sehingga pemanasan
+# berjalan di thread latar sementara sesi pertama masih di form login.
+# Durasi tiap langkah dicatat ke metrik (dashboard_warmup_seconds) dan ke
+# catatan profil proses (tahap "pemanasan_<langkah>").
+MODUL_BERAT = [
+    "matplotlib.pyplot",
+    "plotly.graph_objects",
+    "plotly.express",
+    "altair",
+    "st_aggrid",
+    "streamlit_option_menu",
+    "pyarrow.parquet",
+    "openpyxl",
+    "bs4",
+]
+
+_hasil = {}  # langkah -> {"detik": float, "galat": str | None}
+_selesai = threading.Event()
+_kunci = threading.Lock()
+_kunci_thread = threading.Lock()
+_thread = None
+
+
+def _impor():
+    for modul in MODUL_BERAT:
+        importlib.import_module(modul)
+
+
+def _grafik():
+    """Cache font matplotlib dan validator plotly terbentuk pada render pertama."""
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    from grafik import create_donut_chart, grafik_distribusi_nilai
+
+    fig = grafik_distribusi_nilai(pd.Series(["A", "B", "C"]))
+    fig.canvas.draw()
+    plt.close(fig)
+    create_donut_chart(3.0, "IPK").to_json()
+
+
+def _kurikulum():
+    """Workbook semua program (sampai kapasitas LRU) beserta kolom kunci kanoniknya."""
+    from kurikulum import MAKS_PROGRAM, daftar_program, muat_program, program_bawaan
+
+    kode_program = [program_bawaan()] + [k for k in daftar_program() if k != program_bawaan()]
+    for kode in kode_program[:MAKS_PROGRAM]:
+        muat_program(kode)
+
+
+def _pipeline():
+    """Satu putaran analitik + pencocokan pada transkrip kecil dari kurikulum bawaan."""
+    import pandas as pd
+
+    from analitik import hitung_analitik, smart_find_taken_courses
+    from kurikulum import muat_program
+    from normalisasi import KOLOM_KUNCI
+
+    program = muat_program()
+    contoh = program["wajib"].head(8)
+    df = pd.DataFrame({
+        "Semester": ["2023/2024 Ganjil"] * 4 + ["2023/2024 Genap"] * (len(contoh) - 4),
+        "Kode MA": contoh["Kode"].astype(str),
+        "Nama Mata Ajar": contoh["Mata Kuliah"],
+        "SKS": contoh["SKS"],
+        "Nilai": "A",
+        "Bobot": (contoh["SKS"] * 4.0).astype(str),
+    })
+    analitik = hitung_analitik(df)
+    for kurikulum_df in (program["wajib"], program["kbk"]):
+        smart_find_taken_courses(kurikulum_df, analitik["transkrip"][KOLOM_KUNCI].tolist())
+
+
+def _gudang():
+    """Histogram persentil, laporan kesulitan MK dan skor risiko program bawaan, jika gudang ada."""
+    from gudang import GUDANG_ROOT, Gudang
+    from kesulitan import kesulitan_gudang
+    from kurikulum import muat_program
+    from peringatan import peringatan_gudang
+    from peringkat import peringkat_gudang
+
+    if peringkat_gudang() is None:
+        return
+    program = muat_program()
+    kesulitan_gudang(Gudang(GUDANG_ROOT), program["wajib"], program["kbk"], program["kode"])
+    peringatan_gudang(program)
+
+
+LANGKAH = [
+    ("impor", _impor),
+    ("grafik", _grafik),
+    ("kurikulum", _kurikulum),
+    ("pipeline", _pipeline),
+    ("gudang", _gudang),
+]
+
+
+def _gauge_pemanasan():
+    return [({"langkah": langkah}, info["detik"]) for langkah, info in list(_hasil.items())]
+
+
+daftarkan_gauge("dashboard_warmup_seconds", _gauge_pemanasan)
+
+
+def panaskan(verbose=False):
+    """
+    Menjalankan semua LANGKAH sekali per proses (panggilan berikutnya langsung
+    kembali). Langkah yang gagal dicatat dan tidak menghentikan langkah lain.
+    Mengembalikan {langkah: {"detik", "galat"}}.
+    """
+    with _kunci:
+        if not _selesai.is_set():
+            for langkah, fungsi in LANGKAH:
+                mulai_epoch, mulai = time.time(), time.perf_counter()
+                galat = None
+                try:
+                    fungsi()
+                except Exception as e:  # pemanasan tidak boleh menggagalkan start server
+                    galat = f"{type(e).__name__}: {e}"
+                _hasil[langkah] = {"detik": time.perf_counter() - mulai, "galat": galat}
+                catat_proses(f"pemanasan_{langkah}", mulai_epoch, _hasil[langkah]["detik"])
+                if verbose:
+                    print(f"pemanasan {langkah:<10} {1000 * _hasil[langkah]['detik']:8.1f} ms  {galat or ''}")
+            _selesai.set()
+    return dict(_hasil)
+
+
+def panaskan_latar():
+    """Menjalankan panaskan() di thread latar (sekali per proses); tidak menunggu."""
+    global _thread
+    if _selesai.is_set():
+        return
+    with _kunci_thread:
+        if _thread is None:
+            _thread = threading.Thread(target=panaskan, name="pemanasan", daemon=True)
+            _thread.start()
+
+
+if __name__ == "__main__":
+    # Pemanasan di proses yang sama dengan server, lalu `streamlit run nilai.py ...`.
+    # Lewat modul `pemanasan` (bukan __main__) agar nilai.py melihat status yang sama.
+    import pemanasan
+
+    pemanasan.panaskan(verbose=True)
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", str(Path(__file__).with_name("nilai.py")), *sys.argv[1:]]
+    sys.exit(stcli.main())
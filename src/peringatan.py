@@ -0,0 +1,250 @@
+
+__author__ = "irr"
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analitik import bagi_ratus, bobot_ratus, hitung_jatah_sks_ratus, semester_sort_key
+from gudang import Gudang, GUDANG_ROOT
+
+# ==============================================================================
+# PERINGATAN DINI AKADEMIK (skor risiko per mahasiswa)
+# ==============================================================================
+# Sinyal yang sama dengan dashboard: IPS semester terakhir (jatah SKS turun ke
+# 15/18), tren IPS beberapa semester terakhir, MK yang nilai terbaiknya masih E,
+# dan kekurangan SKS wajib dibanding laju normal (total_sks_wajib dibagi
+# SEMESTER_NORMAL semester). Satu mahasiswa (dari hasil hitung_analitik) dan
+# seluruh gudang kohort memakai skor_risiko yang sama: satu baris fitur per
+# NIM, semua operasi vektor. Di gudang, tiap batch berisi transkrip lengkap
+# mahasiswanya, jadi Peringatan cukup menghitung ulang NIM di batch baru.
+SEMESTER_NORMAL = 8
+JENDELA_TREN = 4  # semester terakhir untuk kemiringan IPS
+SKS_PER_SEMESTER = 20  # kekurangan wajib sebesar ini dihitung "tertinggal satu semester"
+TINGKAT = ["Rendah", "Sedang", "Tinggi"]
+BATAS_TINGKAT = [25, 50]  # skor >= batas -> tingkat berikutnya
+
+KOLOM_FITUR = ["angkatan", "jumlah_semester", "ips_terakhir", "tren_ips", "jatah_sks", "mk_e", "sks_wajib"]
+
+
+def _fitur_ips(ips):
+    """
+    ips: DataFrame (NIM, Semester, Total_Bobot_Ratus, Total_SKS) -> per NIM:
+    jumlah_semester, ips_terakhir (seperseratus) dan tren_ips (kemiringan IPS per semester).
+    """
+    urut = {s: semester_sort_key(s) for s in ips["Semester"].unique()}
+    peringkat_semester = {s: i for i, s in enumerate(sorted(urut, key=urut.get))}
+    ips = ips.assign(
+        urut=ips["Semester"].map(peringkat_semester),
+        ips=bagi_ratus(ips["Total_Bobot_Ratus"].to_numpy(), ips["Total_SKS"].to_numpy()) / 100,
+    ).sort_values(["NIM", "urut"], kind="stable")
+
+    dari_akhir = ips.groupby("NIM").cumcount(ascending=False)
+    hasil = pd.DataFrame({
+        "jumlah_semester": ips.groupby("NIM").size(),
+        "ips_terakhir": (ips.loc[dari_akhir == 0].set_index("NIM")["ips"] * 100).round().astype(np.int64),
+    })
+
+    # Kemiringan kuadrat terkecil atas JENDELA_TREN semester terakhir (x = 0, -1, -2, ...)
+    jendela = ips.loc[dari_akhir < JENDELA_TREN].assign(x=-dari_akhir[dari_akhir < JENDELA_TREN])
+    jendela = jendela.assign(xy=jendela["x"] * jendela["ips"], xx=jendela["x"] ** 2)
+    s = jendela.groupby("NIM")[["x", "ips", "xy", "xx"]].sum()
+    n = jendela.groupby("NIM").size()
+    penyebut = n * s["xx"] - s["x"] ** 2
+    hasil["tren_ips"] = ((n * s["xy"] - s["x"] * s["ips"]) / penyebut.where(penyebut > 0)).fillna(0.0)
+    return hasil
+
+
+def fitur_gudang(baris, kode_wajib):
+    """
+    Fitur per NIM dari baris berskema gudang (NIM, angkatan, Semester, Kode MA,
+    SKS, Nilai, Bobot_numeric, dinilai, terbaik). MK wajib dicocokkan lewat Kode MA.
+    """
+    if baris.empty:
+        return _lengkapi_fitur(pd.DataFrame(index=pd.Index([], name="NIM")))
+    dinilai = baris[baris["dinilai"]]
+    ips = (
+        dinilai.assign(Bobot_ratus=bobot_ratus(dinilai))
+        .groupby(["NIM", "Semester"])
+        .agg(Total_Bobot_Ratus=("Bobot_ratus", "sum"), Total_SKS=("SKS", "sum"))
+        .reset_index()
+    )
+    fitur = pd.DataFrame(index=pd.Index(baris["NIM"].unique(), name="NIM"))
+    fitur["angkatan"] = baris.groupby("NIM")["angkatan"].first()
+    fitur = fitur.join(_fitur_ips(ips))
+
+    # MK yang belum pernah lulus dan pernah bernilai E
+    lulus = pd.MultiIndex.from_frame(dinilai[["NIM", "Kode MA"]])
+    e = baris.loc[baris["Nilai"] == "E", ["NIM", "Kode MA"]].drop_duplicates()
+    e = e[~pd.MultiIndex.from_frame(e).isin(lulus)]
+    fitur["mk_e"] = e.groupby("NIM").size()
+
+    wajib = baris[baris["terbaik"] & baris["Kode MA"].isin(kode_wajib)].drop_duplicates(["NIM", "Kode MA"])
+    fitur["sks_wajib"] = wajib.groupby("NIM")["SKS"].sum()
+    return _lengkapi_fitur(fitur)
+
+
+def fitur_analitik(analitik, sks_wajib, angkatan=None):
+    """Satu baris fitur dari hasil hitung_analitik; sks_wajib dari pencocokan kurikulum dashboard."""
+    ips_df = analitik["ips"]
+    fitur = _fitur_ips(ips_df.assign(NIM=""))
+    transkrip = analitik["transkrip"]
+    e = transkrip.loc[transkrip["Nilai"] == "E", "Kode MA"]
+    fitur["angkatan"] = angkatan
+    fitur["mk_e"] = e[~e.isin(analitik["graded"]["Kode MA"])].nunique()
+    fitur["sks_wajib"] = sks_wajib
+    return _lengkapi_fitur(fitur.reindex([""]))
+
+
+def _lengkapi_fitur(fitur):
+    fitur = fitur.reindex(columns=KOLOM_FITUR)
+    for kolom in ("jumlah_semester", "ips_terakhir", "mk_e", "sks_wajib"):
+        fitur[kolom] = fitur[kolom].fillna(0).astype(np.int64)
+    fitur["tren_ips"] = fitur["tren_ips"].fillna(0.0)
+    # Mahasiswa tanpa semester bernilai belum punya jatah turun (jatah awal 24)
+    fitur["jatah_sks"] = np.where(fitur["jumlah_semester"] > 0, hitung_jatah_sks_ratus(fitur["ips_terakhir"]), 24)
+    return fitur
+
+
+def skor_risiko(fitur, total_sks_wajib):
+    """
+    Menambahkan poin per sinyal, skor (0-100), tingkat (Rendah/Sedang/Tinggi),
+    percobaan (jatah 15 SKS) dan terlambat (tertinggal >= satu semester wajib).
+    """
+    target = total_sks_wajib * np.minimum(fitur["jumlah_semester"], SEMESTER_NORMAL) / SEMESTER_NORMAL
+    kurang = np.maximum(target - fitur["sks_wajib"], 0)
+    hasil = fitur.assign(
+        kurang_wajib=kurang.round().astype(np.int64),
+        poin_ips=np.select([fitur["jatah_sks"] <= 15, fitur["jatah_sks"] <= 18], [35, 20], 0),
+        poin_tren=np.clip(-fitur["tren_ips"] * 40, 0, 20),
+        poin_e=np.clip(fitur["mk_e"] * 10, 0, 20),
+        poin_wajib=np.clip(kurang / SKS_PER_SEMESTER * 15, 0, 25),
+    )
+    hasil["skor"] = (
+        hasil[["poin_ips", "poin_tren", "poin_e", "poin_wajib"]].sum(axis=1).round().astype(np.int64)
+    )
+    hasil["tingkat"] = np.array(TINGKAT)[np.searchsorted(BATAS_TINGKAT, hasil["skor"], side="right")]
+    hasil["percobaan"] = hasil["jatah_sks"] <= 15
+    hasil["terlambat"] = hasil["kurang_wajib"] >= SKS_PER_SEMESTER
+    return hasil
+
+
+def alasan_risiko(baris):
+    """Daftar kalimat pendek untuk satu baris hasil skor_risiko (ditampilkan di dashboard)."""
+    alasan = []
+    if baris["poin_ips"]:
+        alasan.append(f"IPS terakhir {baris['ips_terakhir'] / 100:.2f}: jatah SKS turun ke {baris['jatah_sks']}")
+    if baris["poin_tren"] >= 5:
+        alasan.append(f"IPS turun {-baris['tren_ips']:.2f} per semester")
+    if baris["mk_e"]:
+        alasan.append(f"{baris['mk_e']} MK bernilai E belum diulang/lulus")
+    if baris["poin_wajib"] >= 5:
+        alasan.append(f"Tertinggal {baris['kurang_wajib']} SKS wajib dari laju {SEMESTER_NORMAL} semester")
+    return alasan
+
+
+# ==============================================================================
+# SKOR SELURUH GUDANG (diperbarui per batch)
+# ==============================================================================
+class Peringatan:
+    """Tabel skor_risiko per NIM untuk satu gudang dan satu kurikulum."""
+
+    KOLOM = ["NIM", "angkatan", "Semester", "Kode MA", "SKS", "Nilai", "Bobot_numeric", "dinilai", "terbaik"]
+
+    def __init__(self, kode_wajib, total_sks_wajib):
+        self.versi = 0
+        self.kode_wajib = set(kode_wajib) - {"-"}
+        self.total_sks_wajib = int(total_sks_wajib)
+        self.tabel = skor_risiko(fitur_gudang(pd.DataFrame(columns=self.KOLOM), self.kode_wajib), self.total_sks_wajib)
+        self._kunci = threading.Lock()
+
+    def perbarui(self, baris):
+        """Menghitung ulang hanya NIM di baris (transkrip lengkap mereka); mengembalikan jumlah NIM."""
+        if baris.empty:
+            return 0
+        baru = skor_risiko(fitur_gudang(baris, self.kode_wajib), self.total_sks_wajib)
+        with self._kunci:
+            lama = self.tabel[~self.tabel.index.isin(baru.index)]
+            self.tabel = pd.concat([lama, baru]) if len(lama) else baru
+        return len(baru)
+
+    def sinkron(self, gudang):
+        """
+        Menerapkan batch tambah/ganti sejak versi terakhir. Jika kompaksi sudah
+        membuang berkas batch yang belum diterapkan, tabel dibangun ulang.
+        """
+        riwayat = gudang.riwayat_sejak(self.versi)
+        if not riwayat:
+            return
+        berubah = [b for b, jenis in riwayat if jenis != "kompaksi"]
+        kompaksi = max((b for b, jenis in riwayat if jenis == "kompaksi"), default=0)
+        if any(b < kompaksi for b in berubah):
+            tabel = skor_risiko(fitur_gudang(gudang.baca(kolom=self.KOLOM), self.kode_wajib), self.total_sks_wajib)
+            with self._kunci:
+                self.tabel = tabel
+        else:
+            for batch in berubah:
+                self.perbarui(gudang.baca_batch(batch, kolom=self.KOLOM))
+        self.versi = gudang.versi
+
+    def ringkasan(self, angkatan=None):
+        """Jumlah mahasiswa per tingkat (urutan TINGKAT), opsional untuk satu angkatan."""
+        tabel = self.tabel if angkatan is None else self.tabel[self.tabel["angkatan"] == angkatan]
+        return tabel["tingkat"].value_counts().reindex(TINGKAT, fill_value=0)
+
+
+_proses = {}
+_kunci_proses = threading.Lock()
+
+
+def peringatan_gudang(program, root=GUDANG_ROOT):
+    """
+    Peringatan bersama per proses untuk gudang di root dan program (dict dari
+    muat_program), disinkronkan jika manifest berubah. None jika gudang belum ada.
+    """
+    if not (Path(root) / "manifest.json").exists():
+        return None
+    kunci = (root, program["kode"])
+    with _kunci_proses:
+        if kunci not in _proses:
+            _proses[kunci] = (Gudang(root), Peringatan(program["wajib"]["Kode"].astype(str), program["wajib"]["SKS"].sum()))
+        gudang, peringatan = _proses[kunci]
+        gudang.muat_ulang()
+        if peringatan.versi != gudang.versi:
+            peringatan.sinkron(gudang)
+    return peringatan
+
+
+def main(argv=None):
+    from kurikulum import muat_program
+
+    parser = argparse.ArgumentParser(description="Skor peringatan dini akademik untuk seluruh gudang kohort")
+    parser.add_argument("--root", default=GUDANG_ROOT)
+    parser.add_argument("--program", default=None, help="kode program di registri kurikulum (bawaan: program bawaan)")
+    parser.add_argument("--angkatan", type=int, default=None)
+    parser.add_argument("--keluaran", default=None, help="file hasil (.parquet atau .csv); bawaan: cetak ringkasan")
+    args = parser.parse_args(argv)
+
+    mulai = time.perf_counter()
+    peringatan = peringatan_gudang(muat_program(args.program), args.root)
+    if peringatan is None:
+        sys.exit(f"Gudang {args.root} belum ada")
+    tabel = peringatan.tabel
+    if args.angkatan is not None:
+        tabel = tabel[tabel["angkatan"] == args.angkatan]
+    tabel = tabel.sort_values("skor", ascending=False)
+    print(f"{len(tabel)} mahasiswa dalam {time.perf_counter() - mulai:.2f} s", file=sys.stderr)
+    if args.keluaran:
+        (tabel.to_csv if args.keluaran.lower().endswith(".csv") else tabel.to_parquet)(args.keluaran)
+    else:
+        print(peringatan.ringkasan(args.angkatan).to_string())
+        print(tabel.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
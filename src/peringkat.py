@@ -0,0 +1,163 @@
+
+__author__ = "irr"
+
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from analitik import NILAI_MAP, bagi_ratus, bobot_ratus, ke_ratus
+from gudang import Gudang, GUDANG_ROOT
+
+# ==============================================================================
+# PERSENTIL KOHORT (histogram ber-bin tetap)
+# ==============================================================================
+# IPK disimpan sebagai histogram 401 bin (0,00 .. 4,00 per seperseratus) dan
+# nilai per mata kuliah sebagai 7 hitungan huruf NILAI_MAP, masing-masing per
+# angkatan dan untuk seluruh gudang (kunci None). Memori hanya bergantung pada
+# jumlah angkatan x mata kuliah, tidak pada jumlah mahasiswa, dan hasilnya
+# tepat pada resolusi seperseratus yang ditampilkan dashboard. Lookup hanya
+# satu indeks ke jumlah kumulatif (dihitung ulang malas setelah pembaruan).
+BIN_IPK = 401
+HURUF = list(NILAI_MAP)  # urut dari terbaik (A) ke terburuk (E)
+SEMUA = None
+
+
+def bin_ipk(ipk):
+    """IPK -> indeks bin seperseratus (pembulatan setengah ke atas)."""
+    return np.clip(ke_ratus(ipk), 0, BIN_IPK - 1)
+
+
+def _persentil(hitungan, kumulatif, indeks_rendah, indeks):
+    """Peringkat tengah: % yang lebih rendah + separuh yang sama."""
+    n = int(kumulatif[-1])
+    if n == 0:
+        return None, 0
+    bawah = int(kumulatif[indeks_rendah]) if indeks_rendah >= 0 else 0
+    return 100.0 * (bawah + 0.5 * int(hitungan[indeks])) / n, n
+
+
+class Peringkat:
+    """Histogram IPK dan nilai per MK per angkatan; diperbarui inkremental."""
+
+    def __init__(self):
+        self.versi = 0
+        self._ipk = {}  # angkatan -> int64[401]
+        self._mk = {}  # (angkatan, Kode MA) -> int64[7], indeks 0 = E ... 6 = A
+        self._kumulatif = {}
+        self._kunci = threading.Lock()
+
+    def tambah(self, baris):
+        """
+        Menambahkan mahasiswa baru dari baris berskema gudang
+        (NIM, angkatan, Kode MA, SKS, Nilai, Bobot_numeric, terbaik).
+        """
+        if baris.empty:
+            return
+        baris = baris.assign(angkatan=baris["angkatan"].fillna(-1).astype(int))  # -1: angkatan tak diketahui
+
+        # IPK per mahasiswa dari baris nilai terbaik (semantik sama dengan display_main_app)
+        terbaik = baris[baris["terbaik"] & baris["Bobot_numeric"].notna()]
+        per_nim = terbaik.assign(bobot=bobot_ratus(terbaik)).groupby("NIM").agg(
+            angkatan=("angkatan", "first"), bobot=("bobot", "sum"), sks=("SKS", "sum")
+        )
+        per_nim = per_nim[per_nim["sks"] > 0]
+        per_nim["bin"] = np.clip(bagi_ratus(per_nim["bobot"], per_nim["sks"]), 0, BIN_IPK - 1)
+
+        # Nilai akhir per mahasiswa per MK: huruf terbaik dari semua percobaan (E ikut dihitung)
+        dinilai = baris[baris["Nilai"].isin(HURUF)]
+        peringkat_huruf = dinilai["Nilai"].map({h: len(HURUF) - 1 - i for i, h in enumerate(HURUF)})
+        per_mk = (
+            dinilai.assign(huruf=peringkat_huruf)
+            .groupby(["angkatan", "NIM", "Kode MA"])["huruf"].max()
+            .reset_index()
+        )
+
+        with self._kunci:
+            for kunci, grup in per_nim.groupby("angkatan"):
+                for k in (kunci, SEMUA):
+                    hist = self._ipk.setdefault(k, np.zeros(BIN_IPK, dtype=np.int64))
+                    np.add.at(hist, grup["bin"].to_numpy(), 1)
+            hitungan = per_mk.groupby(["angkatan", "Kode MA", "huruf"]).size()
+            for (ang, kode, huruf), jumlah in hitungan.items():
+                for k in ((ang, kode), (SEMUA, kode)):
+                    self._mk.setdefault(k, np.zeros(len(HURUF), dtype=np.int64))[huruf] += jumlah
+            self._kumulatif.clear()
+
+    def _cum(self, kunci, hist):
+        cum = self._kumulatif.get(kunci)
+        if cum is None:
+            cum = self._kumulatif[kunci] = np.cumsum(hist)
+        return cum
+
+    def persentil_ipk(self, ipk, angkatan=SEMUA):
+        """(persentil 0-100, jumlah mahasiswa) IPK dalam angkatan; (None, 0) jika kosong."""
+        hist = self._ipk.get(angkatan)
+        if hist is None:
+            return None, 0
+        b = int(bin_ipk(ipk))
+        return _persentil(hist, self._cum(("ipk", angkatan), hist), b - 1, b)
+
+    def persentil_mk(self, kode, nilai, angkatan=SEMUA):
+        """(persentil 0-100, jumlah mahasiswa) huruf nilai untuk satu MK dalam angkatan."""
+        hist = self._mk.get((angkatan, kode))
+        if hist is None or nilai not in NILAI_MAP:
+            return None, 0
+        h = len(HURUF) - 1 - HURUF.index(nilai)
+        return _persentil(hist, self._cum(("mk", angkatan, kode), hist), h - 1, h)
+
+    def distribusi_mk(self, kode, angkatan=SEMUA):
+        """Jumlah mahasiswa per huruf (urutan HURUF, A..E) untuk satu MK; None jika belum ada."""
+        hist = self._mk.get((angkatan, kode))
+        return None if hist is None else hist[::-1].copy()
+
+    def persentil_transkrip(self, df_nilai, angkatan=SEMUA):
+        """Kolom Persentil dan N untuk DataFrame berkolom Kode MA dan Nilai."""
+        hasil = [self.persentil_mk(k, n, angkatan) for k, n in zip(df_nilai["Kode MA"], df_nilai["Nilai"])]
+        return df_nilai.assign(Persentil=[p for p, _ in hasil], N=[n for _, n in hasil])
+
+    # --------------------------------------------------------------------------
+    # Sinkronisasi dengan gudang
+    # --------------------------------------------------------------------------
+    KOLOM = ["NIM", "angkatan", "Kode MA", "SKS", "Nilai", "Bobot_numeric", "terbaik"]
+
+    def sinkron(self, gudang):
+        """
+        Menerapkan batch gudang yang belum diterapkan. Batch "tambah" diterapkan
+        inkremental, "kompaksi" tidak mengubah isi; "ganti" (NIM ditambahkan
+        ulang) membuat histogram dibangun ulang dari gudang.
+        """
+        riwayat = gudang.riwayat_sejak(self.versi)
+        if not riwayat:
+            return
+        if any(jenis == "ganti" for _, jenis in riwayat):
+            baru = Peringkat()
+            baru.tambah(gudang.baca(kolom=self.KOLOM))
+            with self._kunci:
+                self._ipk, self._mk, self._kumulatif = baru._ipk, baru._mk, {}
+        else:
+            for batch, jenis in riwayat:
+                if jenis == "tambah":
+                    self.tambah(gudang.baca_batch(batch, kolom=self.KOLOM))
+        self.versi = gudang.versi
+
+
+_proses = {}
+_kunci_proses = threading.Lock()
+
+
+def peringkat_gudang(root=GUDANG_ROOT):
+    """
+    Peringkat bersama per proses untuk gudang di root, disinkronkan jika
+    manifest berubah. None jika gudang belum ada.
+    """
+    if not (Path(root) / "manifest.json").exists():
+        return None
+    with _kunci_proses:
+        if root not in _proses:
+            _proses[root] = (Gudang(root), Peringkat())
+        gudang, peringkat = _proses[root]
+        gudang.muat_ulang()
+        if peringkat.versi != gudang.versi:
+            peringkat.sinkron(gudang)
+    return peringkat
@@ -0,0 +1,217 @@
+
+__author__ = "irr"
+
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ==============================================================================
+# KONFIGURASI KONEKSI PORTAL
+# ==============================================================================
+# Bisa diarahkan ke server tiruan lokal, contoh: PORTAL_BASE_URL=http://127.0.0.1:8765/
+BASE_URL = os.environ.get("PORTAL_BASE_URL", "https://mahasiswa.unair.ac.id/")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Referer": BASE_URL,
+    "Accept-Encoding": "gzip, deflate",
+}
+
+TIMEOUT = (5, 15)  # (connect, read) dalam detik, dipakai jika pemanggil tidak memberi timeout
+POOL_CONNECTIONS = 2  # jumlah host yang di-pool (portal + cadangan)
+POOL_MAXSIZE = 8  # koneksi paralel per host
+MAX_METRIK = 200  # jumlah catatan latensi yang disimpan per sesi
+
+# Halaman yang diambil bersamaan dengan transkrip setelah login (untuk melengkapi user_info)
+PATH_BIODATA = "modul/mhs/biodata.php"
+
+# Fungsi pengamat tingkat proses yang menerima setiap catatan latensi (mis. metrik.catat_portal)
+PENGAMAT = []
+
+
+def buat_retry():
+    """
+    Kebijakan retry: backoff eksponensial dengan jitter untuk error koneksi
+    dan respons 5xx. Status 5xx hanya diulang untuk GET/HEAD karena POST
+    login memakai captcha sekali pakai.
+    """
+    return Retry(
+        total=3,
+        connect=3,
+        read=2,
+        status=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.3,
+        backoff_max=8,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+class PortalSession(requests.Session):
+    """requests.Session dengan timeout wajib dan pencatatan latensi per request."""
+
+    def __init__(self, timeout=TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        self.metrik = deque(maxlen=MAX_METRIK)
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+
+        mulai = time.perf_counter()
+        status, galat, ukuran = None, None, 0
+        try:
+            resp = super().request(method, url, *args, **kwargs)
+            status, ukuran = resp.status_code, len(resp.content)
+            return resp
+        except requests.exceptions.RequestException as e:
+            galat = type(e).__name__
+            raise
+        finally:
+            catatan = {
+                "metode": method.upper(),
+                "path": urlsplit(url).path,
+                "status": status,
+                "galat": galat,
+                "ukuran": ukuran,
+                "detik": time.perf_counter() - mulai,
+            }
+            self.metrik.append(catatan)
+            for pengamat in PENGAMAT:
+                pengamat(catatan)
+
+    # Atribut tambahan ikut disimpan saat sesi di-pickle
+    __attrs__ = requests.Session.__attrs__ + ["timeout", "metrik"]
+
+
+def buat_session(timeout=TIMEOUT, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """Membuat sesi portal dengan pooling, retry, kompresi dan timeout bawaan."""
+    session = PortalSession(timeout=timeout)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=buat_retry(),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def ringkas_latensi(session):
+    """Ringkasan latensi per path: jumlah, rata-rata, p95 (detik) dan jumlah galat."""
+    per_path = {}
+    for m in session.metrik:
+        per_path.setdefault(m["path"], []).append(m)
+
+    ringkasan = {}
+    for path, catatan in per_path.items():
+        detik = sorted(m["detik"] for m in catatan)
+        ringkasan[path] = {
+            "jumlah": len(detik),
+            "rata_rata": sum(detik) / len(detik),
+            "p95": detik[min(len(detik) - 1, int(0.95 * len(detik)))],
+            "galat": sum(1 for m in catatan if m["galat"] or (m["status"] or 0) >= 500),
+        }
+    return ringkasan
+
+
+# ==============================================================================
+# PENGAMBILAN PARALEL
+# ==============================================================================
+# Mencari src gambar captcha tanpa menunggu BeautifulSoup selesai mem-parse halaman
+_POLA_CAPTCHA = re.compile(r"<img[^>]*alt=[\"']captcha[\"'][^>]*>", re.IGNORECASE)
+_POLA_SRC = re.compile(r"src=[\"']([^\"']+)[\"']", re.IGNORECASE)
+
+
+def _ambil_berwaktu(session, url, **kwargs):
+    """GET yang mengembalikan (respons atau exception, durasi detik)."""
+    mulai = time.perf_counter()
+    try:
+        hasil = session.get(url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        hasil = e
+    return hasil, time.perf_counter() - mulai
+
+
+def _ambil_captcha(session, c_url):
+    # Header Accept agar server tahu kita minta gambar
+    c_resp, durasi = _ambil_berwaktu(session, c_url, headers={"Accept": "image/*"}, timeout=10)
+    if isinstance(c_resp, Exception):
+        return None, durasi
+    if "image" in c_resp.headers.get("Content-Type", ""):
+        return c_resp.content, durasi
+    return None, durasi
+
+
+def ambil_data_keamanan(session, base_url=BASE_URL):
+    """
+    Mengambil CSRF token dan gambar captcha.
+    Captcha diunduh di thread lain sementara token di-parse, sehingga
+    keduanya tumpang tindih. Mengembalikan (token, captcha_bytes, waktu).
+    """
+    mulai = time.perf_counter()
+    resp = session.get(base_url, timeout=15)
+    durasi_login = time.perf_counter() - mulai
+
+    img_tag = _POLA_CAPTCHA.search(resp.text)
+    src = _POLA_SRC.search(img_tag.group(0)) if img_tag else None
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future_captcha = None
+        if src:
+            c_src = src.group(1)
+            c_url = base_url + c_src if not c_src.startswith("http") else c_src
+            future_captcha = pool.submit(_ambil_captcha, session, c_url)
+
+        # Ambil CSRF Token (Sesuai HTML: name="csrf_token") selagi captcha diunduh
+        mulai_parse = time.perf_counter()
+        soup = BeautifulSoup(resp.text, "html.parser")
+        token_el = soup.find("input", {"name": "csrf_token"})
+        token = token_el.get("value", "") if token_el else ""
+        durasi_parse = time.perf_counter() - mulai_parse
+
+        captcha_bytes, durasi_captcha = future_captcha.result() if future_captcha else (None, 0.0)
+
+    dinding = time.perf_counter() - mulai
+    serial = durasi_login + durasi_parse + durasi_captcha
+    waktu = {"tahap": "keamanan", "dinding": dinding, "serial": serial, "hemat": serial - dinding}
+    return token, captcha_bytes, waktu
+
+
+def ambil_halaman_paralel(session, urls, timeout=(5, 20), saat_tiba=None):
+    """
+    Mengambil beberapa halaman sekaligus dengan sesi (dan cookie) yang sama.
+    urls berupa dict nama -> url; hasilnya dict nama -> respons atau exception,
+    ditambah ringkasan waktu dinding vs waktu jika diambil berurutan.
+    saat_tiba(nama, hasil), jika ada, dipanggil begitu satu halaman selesai.
+    """
+    mulai = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(urls), POOL_MAXSIZE)) as pool:
+        futures = {
+            pool.submit(_ambil_berwaktu, session, url, timeout=timeout): nama
+            for nama, url in urls.items()
+        }
+        hasil_berwaktu = {}
+        for future in as_completed(futures):
+            nama = futures[future]
+            hasil_berwaktu[nama] = future.result()
+            if saat_tiba is not None:
+                saat_tiba(nama, hasil_berwaktu[nama][0])
+
+    dinding = time.perf_counter() - mulai
+    serial = sum(durasi for _, durasi in hasil_berwaktu.values())
+    waktu = {"tahap": "pasca_login", "dinding": dinding, "serial": serial, "hemat": serial - dinding}
+    return {nama: hasil_berwaktu[nama][0] for nama in urls}, waktu
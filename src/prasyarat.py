@@ -0,0 +1,285 @@
+
+__author__ = "irr"
+
+import re
+import threading
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analitik import bagi_ratus, bobot_ratus, ke_ratus
+from gudang import Gudang, GUDANG_ROOT
+from normalisasi import KOLOM_KUNCI, kunci_kolom, kunci_nama
+
+# ==============================================================================
+# PRASYARAT SEBAGAI BITSET
+# ==============================================================================
+# Kolom Prasyarat workbook kurikulum berisi nama MK (dipisah koma / titik koma)
+# dan kadang syarat SKS atau IPK ("≥ 110 SKS, IPK ≥ 2,0; Metode Penelitian
+# Fisika"). kompilasi_prasyarat memberi tiap MK wajib + KBK satu posisi bit dan
+# mengubah prasyaratnya menjadi mask uint64 (beberapa kata 64-bit bila MK lebih
+# dari 64), sekali per program. MK yang sudah diselesaikan mahasiswa juga
+# berupa bitset, sehingga kelayakan semua MK cukup (syarat & ~selesai) == 0 per
+# kata ditambah perbandingan SKS/IPK; untuk kohort operasi yang sama berjalan
+# atas matriks (mahasiswa x kata). MK yang sedang diambil dianggap selesai:
+# kelayakan berlaku untuk semester depan.
+AMBANG_NAMA = 0.77  # sama dengan smart_find_taken_courses
+KOLOM_MK = ["Kode", "Mata Kuliah", "SKS", "Semester", "Jenis"]
+_SKS = re.compile(r"(?:≥|>=)\s*(\d+)\s*SKS", re.I)
+_IPK = re.compile(r"IPK\s*(?:≥|>=)\s*(\d+(?:[.,]\d+)?)", re.I)
+_PEMISAH = re.compile(r"[,;]")
+
+
+def _cari_mk(kunci, daftar_kunci):
+    """Posisi MK untuk satu nama prasyarat: kunci sama, awalan unik, lalu kemiripan nama."""
+    if kunci in daftar_kunci:
+        return daftar_kunci.index(kunci)
+    awalan = [i for i, k in enumerate(daftar_kunci) if k.startswith(kunci + " ")]
+    if len(awalan) == 1:  # "Fisika Eksperimental II" -> "Fisika Eksperimental II (Praktikum)"
+        return awalan[0]
+    skor = [SequenceMatcher(None, kunci, k).ratio() for k in daftar_kunci]
+    terbaik = int(np.argmax(skor)) if skor else None
+    return terbaik if terbaik is not None and skor[terbaik] >= AMBANG_NAMA else None
+
+
+def _bit(posisi):
+    return np.left_shift(np.uint64(1), (np.asarray(posisi) % 64).astype(np.uint64))
+
+
+def _peta_posisi(nilai, kosong):
+    peta = {}
+    for i, k in enumerate(nilai):
+        if k != kosong:
+            peta.setdefault(k, []).append(i)
+    return {k: tuple(p) for k, p in peta.items()}
+
+
+def kompilasi_prasyarat(wajib_df, kbk_df):
+    """
+    Kurikulum wajib + KBK dalam bentuk siap dihitung: mk (posisi = baris),
+    syarat uint64[n_mk, kata], min_sks, min_ipk (seperseratus), nama prasyarat
+    yang tidak dikenali per MK, serta peta Kode / kunci nama -> tuple semua
+    posisinya (satu kode bisa muncul di beberapa baris kurikulum).
+    """
+    mk = pd.concat([wajib_df.assign(Jenis="Wajib"), kbk_df.assign(Jenis="KBK")], ignore_index=True)
+    if KOLOM_KUNCI not in mk.columns:
+        mk[KOLOM_KUNCI] = kunci_kolom(mk["Mata Kuliah"])
+    daftar_kunci = mk[KOLOM_KUNCI].tolist()
+    n, kata = len(mk), max(1, -(-len(mk) // 64))
+
+    syarat = np.zeros((n, kata), dtype=np.uint64)
+    min_sks = np.zeros(n, dtype=np.int64)
+    min_ipk = np.zeros(n, dtype=np.int64)
+    tak_dikenal = [[] for _ in range(n)]
+    for i, teks in enumerate(mk["Prasyarat"].fillna("-").astype(str)):
+        cocok = _SKS.search(teks)
+        if cocok:
+            min_sks[i] = int(cocok.group(1))
+        cocok = _IPK.search(teks)
+        if cocok:
+            min_ipk[i] = int(ke_ratus(float(cocok.group(1).replace(",", "."))))
+        for nama in _PEMISAH.split(_IPK.sub("", _SKS.sub("", teks))):
+            nama = nama.strip()
+            if not nama or nama == "-":
+                continue
+            j = _cari_mk(kunci_nama(nama), daftar_kunci)
+            if j is None or j == i:
+                tak_dikenal[i].append(nama)  # tidak menghalangi; ditampilkan apa adanya
+                continue
+            syarat[i, j // 64] |= _bit(j)
+
+    kode = mk["Kode"].astype(str)
+    return {
+        "mk": mk[KOLOM_MK + ["Prasyarat"]],
+        "n_wajib": len(wajib_df),
+        "kata": kata,
+        "syarat": syarat,
+        "min_sks": min_sks,
+        "min_ipk": min_ipk,
+        "tak_dikenal": tak_dikenal,
+        "kode": _peta_posisi(kode, "-"),
+        "kunci": _peta_posisi(daftar_kunci, ""),
+    }
+
+
+def posisi_kurikulum(kompilasi, df, jenis):
+    """Posisi bit untuk baris workbook wajib/KBK (indeks asli dari muat_program)."""
+    return np.asarray(df.index, dtype=np.int64) + (kompilasi["n_wajib"] if jenis == "KBK" else 0)
+
+
+def bitset(kompilasi, posisi):
+    """uint64[kata] dengan bit di setiap posisi."""
+    hasil = np.zeros(kompilasi["kata"], dtype=np.uint64)
+    posisi = np.asarray(posisi, dtype=np.int64)
+    np.bitwise_or.at(hasil, posisi // 64, _bit(posisi))
+    return hasil
+
+
+def _matriks_bit(selesai, n):
+    """uint64[m, kata] -> bool[m, n]."""
+    posisi = np.arange(n)
+    return (np.right_shift(selesai[:, posisi // 64], (posisi % 64).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+
+def layak(kompilasi, selesai, sks, ipk_ratus):
+    """
+    bool[m, n_mk]: prasyarat tiap MK terpenuhi oleh bitset selesai (uint64[m, kata]),
+    SKS dan IPK (seperseratus) per mahasiswa. Belum memperhitungkan MK yang sudah diambil.
+    """
+    selesai = np.atleast_2d(selesai)
+    syarat = kompilasi["syarat"]
+    ok = np.ones((len(selesai), len(syarat)), dtype=bool)
+    for k in range(kompilasi["kata"]):
+        ok &= (syarat[:, k][None, :] & ~selesai[:, k][:, None]) == 0
+    ok &= np.atleast_1d(sks)[:, None] >= kompilasi["min_sks"][None, :]
+    ok &= np.atleast_1d(ipk_ratus)[:, None] >= kompilasi["min_ipk"][None, :]
+    return ok
+
+
+def kelayakan_mahasiswa(kompilasi, selesai, sks, ipk_ratus):
+    """Per MK kurikulum (indeks = posisi): Layak dan Kurang (prasyarat yang belum terpenuhi)."""
+    ok = layak(kompilasi, selesai, sks, ipk_ratus)[0]
+    nama = kompilasi["mk"]["Mata Kuliah"].to_numpy()
+    kurang = kompilasi["syarat"] & ~selesai[None, :]
+    keterangan = []
+    for i in range(len(nama)):
+        bagian = [] if ok[i] else list(nama[_matriks_bit(kurang[i:i + 1], len(nama))[0]])
+        if kompilasi["min_sks"][i] > sks:
+            bagian.append(f"≥ {kompilasi['min_sks'][i]} SKS")
+        if kompilasi["min_ipk"][i] > ipk_ratus:
+            bagian.append(f"IPK ≥ {kompilasi['min_ipk'][i] / 100:.2f}")
+        keterangan.append(", ".join(bagian))
+    return pd.DataFrame({"Layak": ok, "Kurang": keterangan})
+
+
+def tandai_kelayakan(kompilasi, kelayakan, df, jenis):
+    """df (potongan workbook wajib/KBK) dengan kolom Layak dan Kurang dari kelayakan_mahasiswa."""
+    baris = kelayakan.iloc[posisi_kurikulum(kompilasi, df, jenis)]
+    return df.assign(Layak=baris["Layak"].to_numpy(), Kurang=baris["Kurang"].to_numpy())
+
+
+# ==============================================================================
+# PERMINTAAN MK SEMESTER DEPAN (seluruh gudang kohort)
+# ==============================================================================
+KOLOM_GUDANG = ["NIM", "angkatan", "Kode MA", "Nama Mata Ajar", "SKS", "Nilai", "Bobot_numeric", "dinilai", "terbaik", "berjalan"]
+
+
+def _pilih_posisi(dari_kode, kunci, kompilasi, nama_posisi):
+    """
+    Posisi untuk satu baris transkrip dari calon per kode (tuple, atau NaN jika
+    kode tidak dikenal) dan kunci nama baris itu.
+    """
+    dari_nama = kompilasi["kunci"].get(kunci, ())
+    if not isinstance(dari_kode, tuple):
+        return dari_nama
+    irisan = tuple(i for i in dari_kode if i in dari_nama)
+    if irisan:
+        return irisan
+    j = _cari_mk(kunci, [nama_posisi.get(i, "") for i in dari_kode])  # nama salah ketik
+    return dari_kode if j is None else (dari_kode[j],)
+
+
+def bitset_kohort(kompilasi, baris):
+    """
+    Baris berskema gudang -> DataFrame per NIM (angkatan, sks, ipk_ratus) dan
+    bitset selesai uint64[m, kata] (lulus atau sedang diambil). MK dicocokkan
+    lewat Kode MA, lalu kunci nama untuk MK kurikulum tanpa kode. Kode yang
+    muncul di beberapa baris kurikulum dipersempit dengan nama MK (seperti
+    smart_find_taken_courses); jika tidak ada yang cocok, semua baris kode
+    itu dianggap selesai.
+    """
+    nim, indeks = np.unique(baris["NIM"].to_numpy(str), return_inverse=True)
+    aktif = (baris["dinilai"] | baris["berjalan"]).to_numpy()
+    kode = baris["Kode MA"]
+    posisi = kode.map({k: p[0] for k, p in kompilasi["kode"].items() if len(p) == 1})
+    sisa = posisi.isna().to_numpy()  # kode ganda, tanpa kode, atau di luar kurikulum
+    satu = ~sisa & aktif
+
+    nama_posisi = {i: k for k, p in kompilasi["kunci"].items() for i in p}
+    calon = [
+        _pilih_posisi(k, n, kompilasi, nama_posisi) if a else ()
+        for k, n, a in zip(
+            kode[sisa].map(kompilasi["kode"]), kunci_kolom(baris.loc[sisa, "Nama Mata Ajar"]), aktif[sisa]
+        )
+    ]
+    jumlah = np.fromiter(map(len, calon), dtype=np.int64, count=len(calon))
+    m = np.concatenate([indeks[satu], np.repeat(indeks[sisa], jumlah)])
+    p = np.concatenate([posisi.to_numpy()[satu], [i for c in calon for i in c]]).astype(np.int64)
+    selesai = np.zeros((len(nim), kompilasi["kata"]), dtype=np.uint64)
+    np.bitwise_or.at(selesai, (m, p // 64), _bit(p))
+
+    # SKS setelah semester berjalan (untuk syarat "≥ n SKS") dan IPK saat ini
+    terbaik = baris["terbaik"].to_numpy() & baris["Bobot_numeric"].notna().to_numpy()
+    sks = baris["SKS"].to_numpy(np.int64)
+    total_sks = np.bincount(indeks, weights=sks * (terbaik | baris["berjalan"].to_numpy()), minlength=len(nim))
+    sks_ipk = np.bincount(indeks, weights=sks * terbaik, minlength=len(nim)).astype(np.int64)
+    bobot = np.bincount(indeks[terbaik], weights=bobot_ratus(baris[terbaik]), minlength=len(nim))
+    mahasiswa = pd.DataFrame({
+        "NIM": nim,
+        "angkatan": baris.groupby(indeks)["angkatan"].first().to_numpy(),
+        "sks": total_sks.astype(np.int64),
+        "ipk_ratus": bagi_ratus(np.rint(bobot).astype(np.int64), sks_ipk),
+    })
+    return mahasiswa, selesai
+
+
+def permintaan_mk(kompilasi, selesai, sks, ipk_ratus, paritas=None):
+    """
+    Per MK kurikulum: jumlah mahasiswa yang Layak mengambilnya semester depan,
+    yang Terkunci prasyarat, dan yang sudah Selesai. paritas "Ganjil"/"Genap"
+    membatasi ke MK yang ditawarkan di semester itu.
+    """
+    n = len(kompilasi["mk"])
+    ok = layak(kompilasi, selesai, sks, ipk_ratus)
+    sudah = _matriks_bit(selesai, n)
+    hasil = kompilasi["mk"][KOLOM_MK].assign(
+        Layak=(ok & ~sudah).sum(axis=0),
+        Terkunci=(~ok & ~sudah).sum(axis=0),
+        Selesai=sudah.sum(axis=0),
+    )
+    return hasil if paritas is None else hasil[hasil["Semester"] == paritas]
+
+
+_kompilasi = {}  # kode program -> (wajib_df, kbk_df, kompilasi)
+_kohort = {}  # (root, kode program) -> {"versi", "mahasiswa", "selesai"}
+_kunci = threading.Lock()
+
+
+def kompilasi_program(program):
+    """kompilasi_prasyarat per program (dict dari muat_program), dibuat ulang jika workbook dimuat ulang."""
+    with _kunci:
+        simpanan = _kompilasi.get(program["kode"])
+        if simpanan is None or simpanan[0] is not program["wajib"] or simpanan[1] is not program["kbk"]:
+            simpanan = _kompilasi[program["kode"]] = (
+                program["wajib"], program["kbk"], kompilasi_prasyarat(program["wajib"], program["kbk"])
+            )
+        return simpanan[2]
+
+
+def permintaan_gudang(program, angkatan=None, paritas=None, root=GUDANG_ROOT):
+    """
+    permintaan_mk untuk seluruh gudang (atau satu angkatan). Bitset mahasiswa
+    disimpan per proses dan dibangun ulang hanya jika ada batch tambah/ganti;
+    None jika gudang belum ada.
+    """
+    if not (Path(root) / "manifest.json").exists():
+        return None
+    kompilasi = kompilasi_program(program)
+    gudang = Gudang(root)
+    kunci = (str(root), program["kode"])
+    with _kunci:
+        simpanan = _kohort.get(kunci)
+        if simpanan is None or simpanan["kompilasi"] is not kompilasi or any(
+            jenis != "kompaksi" for _, jenis in gudang.riwayat_sejak(simpanan["versi"])
+        ):
+            mahasiswa, selesai = bitset_kohort(kompilasi, gudang.baca(kolom=KOLOM_GUDANG))
+            simpanan = _kohort[kunci] = {"kompilasi": kompilasi, "mahasiswa": mahasiswa, "selesai": selesai}
+        simpanan["versi"] = gudang.versi
+
+    mahasiswa, selesai = simpanan["mahasiswa"], simpanan["selesai"]
+    if angkatan is not None:
+        pilih = (mahasiswa["angkatan"] == angkatan).to_numpy()
+        mahasiswa, selesai = mahasiswa[pilih], selesai[pilih]
+    return permintaan_mk(kompilasi, selesai, mahasiswa["sks"].to_numpy(), mahasiswa["ipk_ratus"].to_numpy(), paritas)
@@ -0,0 +1,164 @@
+
+__author__ = "irr"
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ==============================================================================
+# PROFIL PER TAHAP
+# ==============================================================================
+# DASHBOARD_PROFIL=1 mengaktifkan profil untuk semua sesi; tanpa itu profil
+# hanya aktif untuk sesi admin yang menyalakannya di panel sidebar.
+PROFIL_GLOBAL = os.environ.get("DASHBOARD_PROFIL", "") == "1"
+# Panel admin muncul jika URL berisi ?admin=<DASHBOARD_ADMIN_TOKEN>
+ADMIN_TOKEN = os.environ.get("DASHBOARD_ADMIN_TOKEN", "")
+
+MAX_CATATAN_SESI = 2000
+MAX_CATATAN_PROSES = 20000
+
+_catatan_proses = deque(maxlen=MAX_CATATAN_PROSES)
+_kunci = threading.Lock()
+_TIDAK_AKTIF = nullcontext()
+
+
+def aktif():
+    return PROFIL_GLOBAL or st.session_state.get("profil_aktif", False)
+
+
+def _rekam(nama, mulai_epoch, detik):
+    ctx = get_script_run_ctx()
+    catatan = {
+        "sesi": ctx.session_id if ctx else None,
+        "rerun": st.session_state.get("profil_rerun", 0),
+        "tahap": nama,
+        "mulai": mulai_epoch,
+        "detik": detik,
+    }
+    if "profil_catatan" not in st.session_state:
+        st.session_state.profil_catatan = deque(maxlen=MAX_CATATAN_SESI)
+    st.session_state.profil_catatan.append(catatan)
+    with _kunci:
+        _catatan_proses.append(catatan)
+
+
+def catat_proses(nama, mulai_epoch, detik):
+    """Catatan tahap di luar sesi mana pun (mis. pemanasan server), hanya ke catatan proses."""
+    with _kunci:
+        _catatan_proses.append({"sesi": None, "rerun": 0, "tahap": nama, "mulai": mulai_epoch, "detik": detik})
+
+
+@contextmanager
+def _ukur(nama):
+    mulai_epoch, mulai = time.time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        _rekam(nama, mulai_epoch, time.perf_counter() - mulai)
+
+
+def tahap(nama):
+    """
+    Context manager pengukur satu tahap:  with tahap("pencocokan_wajib"): ...
+    Jika profil tidak aktif yang dikembalikan nullcontext bersama (tanpa biaya berarti).
+    """
+    if not aktif():
+        return _TIDAK_AKTIF
+    return _ukur(nama)
+
+
+def mulai_rerun():
+    """Dipanggil sekali di awal skrip untuk memberi nomor rerun pada catatan."""
+    st.session_state.profil_rerun = st.session_state.get("profil_rerun", 0) + 1
+
+
+def catatan_sesi():
+    return list(st.session_state.get("profil_catatan", []))
+
+
+def catatan_proses():
+    with _kunci:
+        return list(_catatan_proses)
+
+
+def ekspor_jsonl(catatan):
+    """Catatan terstruktur sebagai JSON Lines untuk analisis offline."""
+    return "\n".join(json.dumps(c) for c in catatan) + "\n"
+
+
+def ringkas(catatan):
+    """Jumlah, rata-rata, p95 dan total (ms) per tahap."""
+    if not catatan:
+        return pd.DataFrame(columns=["tahap", "jumlah", "rata_ms", "p95_ms", "total_ms"])
+    df = pd.DataFrame(catatan)
+    df["ms"] = df["detik"] * 1000
+    return (
+        df.groupby("tahap")["ms"]
+        .agg(jumlah="count", rata_ms="mean", p95_ms=lambda s: s.quantile(0.95), total_ms="sum")
+        .sort_values("total_ms", ascending=False)
+        .reset_index()
+    )
+
+
+def admin():
+    return bool(ADMIN_TOKEN) and st.query_params.get("admin") == ADMIN_TOKEN
+
+
+def panel_admin():
+    """Panel performa di sidebar, hanya untuk admin."""
+    if not admin():
+        return
+    with st.sidebar.expander("⏱️ Performa", expanded=False):
+        st.toggle("Profil sesi ini", key="profil_aktif", disabled=PROFIL_GLOBAL)
+
+        sesi = catatan_sesi()
+        terakhir = [c for c in sesi if c["rerun"] == st.session_state.get("profil_rerun", 0) - 1]
+        st.caption("Rerun sebelumnya")
+        st.dataframe(
+            pd.DataFrame(terakhir, columns=["tahap", "detik"]).assign(ms=lambda d: d["detik"] * 1000)[["tahap", "ms"]],
+            hide_index=True,
+        )
+
+        cakupan = st.radio("Ringkasan", ["Sesi", "Proses"], horizontal=True)
+        catatan = sesi if cakupan == "Sesi" else catatan_proses()
+        st.dataframe(ringkas(catatan), hide_index=True)
+
+        from sesi import sesi_hidup  # sesi.py memuat pyarrow; profil tetap ringan untuk pemanasan
+
+        hidup = sesi_hidup()
+        if hidup:
+            st.caption(f"Sesi proses ini ({len(hidup)})")
+            sekarang = time.time()
+            st.dataframe(
+                pd.DataFrame(
+                    [(sid[:8], info["bytes"] / 2**20, sekarang - info["terakhir"], info["tumpah"]) for sid, info in hidup],
+                    columns=["sesi", "MB", "diam (s)", "tumpah"],
+                ).sort_values("MB", ascending=False),
+                hide_index=True,
+            )
+
+        waktu_fetch = st.session_state.get("waktu_fetch")
+        if waktu_fetch:
+            st.caption("Fetch paralel (detik)")
+            st.dataframe(pd.DataFrame(waktu_fetch.values()), hide_index=True)
+
+        portal = st.session_state.get("session")
+        if getattr(portal, "metrik", None):
+            from portal import ringkas_latensi  # portal.py memuat requests/bs4; hanya bila ada sesi portal
+
+            st.caption("Latensi portal per path (detik)")
+            st.dataframe(pd.DataFrame.from_dict(ringkas_latensi(portal), orient="index"))
+
+        st.download_button(
+            "Unduh catatan (JSONL)",
+            data=ekspor_jsonl(catatan),
+            file_name=f"profil_{cakupan.lower()}.jsonl",
+            mime="application/jsonl",
+        )
@@ -0,0 +1,154 @@
+
+__author__ = "irr"
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from analitik import NILAI_MAP, NILAI_RATUS, bagi_ratus, bobot_ratus, hitung_jatah_sks_ratus
+
+# ==============================================================================
+# PROYEKSI MONTE CARLO: IPK AKHIR & PELUANG LULUS
+# ==============================================================================
+# Semua lintasan disimulasikan bersama, satu semester per langkah, dengan array
+# (lintasan x mata kuliah). Tiap semester lintasan mengambil MK tersisa menurut
+# urutan daftar selama SKS-nya masih muat dalam jatah (hitung_jatah_sks_ratus dari
+# IPS semester sebelumnya), lalu huruf nilai diundi dari distribusi MK itu. MK
+# bernilai E tetap tersisa, sehingga diulang lebih dulu di semester berikutnya.
+# Seperti IPK/IPS dashboard, nilai E tidak ikut dihitung, dan bobot dijumlahkan
+# dalam seperseratus bulat (lihat analitik.bagi_ratus).
+HURUF = list(NILAI_MAP)
+BOBOT_RATUS = np.array(list(NILAI_RATUS.values()), dtype=np.int64)
+INDEKS_E = HURUF.index("E")
+
+N_LINTASAN = 20_000
+MAKS_SEMESTER = 14  # batas masa studi S1
+SEMESTER_TEPAT_WAKTU = 8
+JATAH_AWAL = 20  # jatah semester berikutnya jika belum ada IPS sama sekali
+SKS_PILIHAN = 3  # SKS per MK pilihan bebas pengisi kekurangan SKS lulus
+PRIOR = 0.5  # pseudo-hitungan per huruf pada distribusi nilai mahasiswa
+MIN_KOHORT = 10  # minimal mahasiswa agar distribusi kohort satu MK dipakai
+
+
+def distribusi_mahasiswa(transkrip_df):
+    """Peluang tiap huruf (urutan HURUF) dari semua percobaan di transkrip, dihaluskan PRIOR."""
+    hitungan = transkrip_df["Nilai"].value_counts().reindex(HURUF, fill_value=0).to_numpy(float)
+    return (hitungan + PRIOR) / (hitungan.sum() + PRIOR * len(HURUF))
+
+
+def mk_tersisa(analitik, wajib_sisa, kbk_sisa, sks_lulus, sks_kbk, sks_kbk_diambil):
+    """
+    Daftar MK yang masih harus lulus, berurutan: MK yang sedang diambil,
+    MK bernilai E yang belum diulang, MK wajib tersisa, MK KBK sampai target
+    sks_kbk, lalu MK pilihan SKS_PILIHAN sampai sks_lulus tercapai.
+    Kolom: Kode, Mata Kuliah, SKS, Sedang.
+    """
+    lulus, sedang = analitik["unique_graded"], analitik["ongoing"]
+    transkrip = analitik["transkrip"]
+    gagal = transkrip[
+        (transkrip["Nilai"] == "E")
+        & ~transkrip["Nama Mata Ajar"].isin(lulus["Nama Mata Ajar"])
+        & ~transkrip["Nama Mata Ajar"].isin(sedang["Nama Mata Ajar"])
+    ].drop_duplicates(subset="Nama Mata Ajar")
+
+    def dari_transkrip(df, status):
+        return pd.DataFrame({
+            "Kode": df["Kode MA"], "Mata Kuliah": df["Nama Mata Ajar"], "SKS": df["SKS"], "Sedang": status,
+        })
+
+    kekurangan_kbk = max(0, sks_kbk - sks_kbk_diambil)
+    kbk = kbk_sisa[kbk_sisa["SKS"].cumsum().shift(fill_value=0) < kekurangan_kbk]
+    daftar = pd.concat([
+        dari_transkrip(sedang, True),
+        dari_transkrip(gagal, False),
+        wajib_sisa[["Kode", "Mata Kuliah", "SKS"]].assign(Sedang=False),
+        kbk[["Kode", "Mata Kuliah", "SKS"]].assign(Sedang=False),
+    ], ignore_index=True)
+    daftar["SKS"] = pd.to_numeric(daftar["SKS"], errors="coerce").fillna(0).astype(int)
+    daftar = daftar[daftar["SKS"] > 0]
+
+    kurang = sks_lulus - int(lulus["SKS"].sum()) - int(daftar["SKS"].sum())
+    if kurang > 0:
+        pilihan = pd.DataFrame({
+            "Kode": None,
+            "Mata Kuliah": "MK Pilihan",
+            "SKS": [SKS_PILIHAN] * math.ceil(kurang / SKS_PILIHAN),
+            "Sedang": False,
+        })
+        daftar = pd.concat([daftar, pilihan], ignore_index=True)
+    return daftar.reset_index(drop=True)
+
+
+def _peluang_mk(mk_df, peluang_mahasiswa, distribusi_mk):
+    """Matriks (MK x huruf): distribusi kohort MK bila cukup data, selain itu distribusi mahasiswa."""
+    peluang = np.tile(peluang_mahasiswa, (len(mk_df), 1))
+    if distribusi_mk is not None:
+        for i, kode in enumerate(mk_df["Kode"]):
+            hitungan = distribusi_mk(kode) if isinstance(kode, str) else None
+            if hitungan is not None and hitungan.sum() >= MIN_KOHORT:
+                peluang[i] = hitungan / hitungan.sum()
+    return peluang
+
+
+def proyeksi(analitik, mk_df, distribusi_mk=None, n=N_LINTASAN, seed=None):
+    """
+    Simulasi n lintasan sampai semua MK di mk_df (hasil mk_tersisa) lulus atau
+    MAKS_SEMESTER terlewati. distribusi_mk(kode) boleh mengembalikan jumlah per
+    huruf kohort untuk MK itu (None jika tidak ada).
+
+    Mengembalikan dict:
+    - ipk: IPK akhir per lintasan
+    - semester_lulus: semester ke- saat semua MK lulus (0 = tidak lulus dalam batas)
+    - peluang_lulus: Series semester ke- -> peluang sudah lulus pada semester itu
+    - tepat_waktu: peluang lulus paling lambat SEMESTER_TEPAT_WAKTU
+    """
+    rng = np.random.default_rng(seed)
+    lulus, ips_df = analitik["unique_graded"], analitik["ips"]
+    sks = mk_df["SKS"].to_numpy(int)
+    sedang = mk_df["Sedang"].to_numpy(bool)
+    kumulatif = _peluang_mk(mk_df, distribusi_mahasiswa(analitik["transkrip"]), distribusi_mk).cumsum(axis=1)
+    kumulatif[:, -1] = 1.0
+
+    # Semester berjalan (MK sedang diambil) ikut disimulasikan dengan beban tetap
+    semester_ke = analitik["transkrip"]["Semester"].nunique()
+    awal = semester_ke if sedang.any() else semester_ke + 1
+    jatah = np.full(n, hitung_jatah_sks_ratus(ips_df["IPS_Ratus"].iloc[-1]) if len(ips_df) else JATAH_AWAL)
+
+    selesai = np.zeros((n, len(mk_df)), dtype=bool)
+    bobot = np.full(n, int(bobot_ratus(lulus).sum()), dtype=np.int64)
+    sks_total = np.full(n, int(lulus["SKS"].sum()), dtype=np.int64)
+    semester_lulus = np.where(selesai.all(axis=1), awal - 1, 0)
+
+    for semester in range(awal, MAKS_SEMESTER + 1):
+        if semester_lulus.all():
+            break
+        if semester == awal and sedang.any():
+            ambil = np.broadcast_to(sedang, selesai.shape)
+        else:
+            # MK tersisa diambil berurutan selama kumulatif SKS masih dalam jatah
+            beban = np.where(selesai, 0, sks)
+            ambil = ~selesai & (beban.cumsum(axis=1) <= jatah[:, None])
+
+        baris, kolom = np.nonzero(ambil)
+        huruf = (rng.random(len(kolom))[:, None] > kumulatif[kolom]).sum(axis=1)
+        lulus_mk = huruf != INDEKS_E
+        # bincount menjumlah dalam float64, tetapi semua suku bulat (< 2**53) sehingga tetap tepat
+        sks_semester = np.rint(np.bincount(baris, weights=sks[kolom] * lulus_mk, minlength=n)).astype(np.int64)
+        bobot_semester = np.rint(np.bincount(baris, weights=sks[kolom] * BOBOT_RATUS[huruf], minlength=n)).astype(np.int64)
+
+        selesai[baris[lulus_mk], kolom[lulus_mk]] = True
+        bobot += bobot_semester
+        sks_total += sks_semester
+        jatah = hitung_jatah_sks_ratus(bagi_ratus(bobot_semester, sks_semester))
+        semester_lulus[(semester_lulus == 0) & selesai.all(axis=1)] = semester
+
+    ipk = bagi_ratus(bobot, sks_total) / 100
+    sampai = np.arange(awal - 1, MAKS_SEMESTER + 1)
+    peluang = ((semester_lulus[None, :] > 0) & (semester_lulus[None, :] <= sampai[:, None])).mean(axis=1)
+    return {
+        "ipk": ipk,
+        "semester_lulus": semester_lulus,
+        "peluang_lulus": pd.Series(peluang, index=sampai, name="Peluang Lulus"),
+        "tepat_waktu": float(((semester_lulus > 0) & (semester_lulus <= SEMESTER_TEPAT_WAKTU)).mean()),
+    }
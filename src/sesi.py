@@ -0,0 +1,381 @@
+
+__author__ = "irr"
+
+import asyncio
+import io
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from keadaan import ukuran_backend
+from metrik import daftarkan_gauge, tambah
+
+try:
+    from streamlit.runtime.app_session import AppSessionState
+except ImportError:  # modul internal; tanpanya penjaga sesi tidak dijalankan
+    AppSessionState = None
+
+# ==============================================================================
+# REGISTRI SESI
+# ==============================================================================
+# Ukuran st.session_state dihitung ulang paling sering tiap INTERVAL_UKUR detik
+# per sesi; sesi yang tidak lagi aktif di runtime dibuang dari registri.
+INTERVAL_UKUR = 10.0
+BATAS_DIAM = 1800  # cadangan jika daftar sesi runtime tidak tersedia (detik)
+
+_sesi = {}  # session_id -> {"terakhir", "diukur", "bytes", "tumpah", "kunci"}
+_kunci = threading.Lock()
+
+
+def ukuran_objek(obj, _terlihat=None):
+    """Perkiraan memori (byte) sebuah nilai di session_state."""
+    _terlihat = set() if _terlihat is None else _terlihat
+    if id(obj) in _terlihat:
+        return 0
+    _terlihat.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(ukuran_objek(k, _terlihat) + ukuran_objek(v, _terlihat) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == "deque":
+        return sys.getsizeof(obj) + sum(ukuran_objek(v, _terlihat) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def _info(session_id, sekarang):
+    with _kunci:
+        return _sesi.setdefault(session_id, {
+            "terakhir": sekarang, "diukur": 0.0, "bytes": 0, "tumpah": False, "kunci": threading.Lock(),
+        })
+
+
+def catat_sesi():
+    """Dipanggil tiap rerun: memperbarui waktu aktif dan (berkala) ukuran session_state sesi ini."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    sekarang = time.time()
+    info = _info(ctx.session_id, sekarang)
+    with _kunci:
+        info["terakhir"] = sekarang
+        perlu_ukur = sekarang - info["diukur"] >= INTERVAL_UKUR
+
+    if perlu_ukur:
+        ukuran = sum(ukuran_objek(st.session_state[k]) for k in list(st.session_state.keys()))
+        with _kunci:
+            info["diukur"], info["bytes"] = sekarang, ukuran
+
+
+def _sesi_runtime():
+    """{session_id: AppSession} yang masih terhubung menurut runtime Streamlit, atau None."""
+    try:
+        from streamlit.runtime import Runtime
+
+        return {s.session.id: s.session for s in Runtime.instance()._session_mgr.list_active_sessions()}
+    except Exception:
+        return None
+
+
+def _sesi_aktif_runtime():
+    """session_id yang masih terhubung menurut runtime Streamlit, atau None jika tidak tersedia."""
+    sesi = _sesi_runtime()
+    return None if sesi is None else set(sesi)
+
+
+def sesi_hidup():
+    """Daftar (session_id, info) setelah membuang sesi yang sudah tertutup."""
+    aktif = _sesi_aktif_runtime()
+    batas = time.time() - BATAS_DIAM
+    with _kunci:
+        for sid in list(_sesi):
+            if (aktif is not None and sid not in aktif) or (aktif is None and _sesi[sid]["terakhir"] < batas):
+                del _sesi[sid]
+                _path_tumpahan(sid).unlink(missing_ok=True)
+        return [(sid, {k: v for k, v in info.items() if k != "kunci"}) for sid, info in _sesi.items()]
+
+
+def _gauge_sesi():
+    return [({}, len(sesi_hidup()))]
+
+
+# Per sesi hanya di panel admin (profil.py); Prometheus menerima agregatnya saja
+def _gauge_memori():
+    return [({}, sum(info["bytes"] for _, info in sesi_hidup()))]
+
+
+def _gauge_memori_maks():
+    return [({}, max((info["bytes"] for _, info in sesi_hidup()), default=0))]
+
+
+def _gauge_tumpah():
+    return [({}, sum(info["tumpah"] for _, info in sesi_hidup()))]
+
+
+daftarkan_gauge("dashboard_sessions", _gauge_sesi)
+daftarkan_gauge("dashboard_session_memory_bytes", _gauge_memori)
+daftarkan_gauge("dashboard_session_memory_max_bytes", _gauge_memori_maks)
+daftarkan_gauge("dashboard_sessions_spilled", _gauge_tumpah)
+
+
+# ==============================================================================
+# ANGGARAN MEMORI: PENGGUSURAN SESI DIAM
+# ==============================================================================
+# Thread penjaga memeriksa sesi tiap INTERVAL_PENJAGA detik. Sesi yang tidak
+# sedang menjalankan skrip digusur jika diam >= DIAM_TUMPAH detik, atau jika
+# total memori semua sesi, ditambah isi backend state memori (keadaan.py),
+# melebihi ANGGARAN_PROSES (yang paling lama diam lebih dulu, minimal
+# DIAM_MIN detik):
+# - nilai turunan (KUNCI_BUANG) dibuang, karena dihitung ulang saat dibutuhkan;
+# - objek berat (KUNCI_TUMPAH) ditulis ke satu berkas per sesi di DIR_TUMPAH
+#   (DataFrame sebagai Parquet) dan dipulihkan oleh pulihkan_sesi() di awal
+#   rerun berikutnya;
+# - sesi yang belum login cukup membuang session/captcha; form login
+#   mengambil token dan captcha baru.
+#
+# Penjaga memakai bagian internal runtime Streamlit (Runtime._session_mgr,
+# AppSession._state/_scriptrunner/_event_loop). Jika salah satunya tidak ada
+# di versi terpasang, penjaga berhenti dengan peringatan di stderr dan sesi
+# tidak digusur. State sesi lain hanya diubah di event loop sesi itu dan hanya
+# saat tidak ada ScriptRunner: runner baru juga dibuat di event loop, jadi
+# rerun berikutnya selalu melihat state yang sudah selesai digusur. Berkas
+# tumpahan ditulis lebih dulu di thread penjaga; isinya dibatalkan jika objek
+# di state sudah diganti saat digusur.
+DIAM_TUMPAH = float(os.environ.get("DASHBOARD_SESI_DIAM", "600") or 600)
+DIAM_MIN = 60.0
+ANGGARAN_PROSES = int(float(os.environ.get("DASHBOARD_SESI_ANGGARAN_MB", "512") or 512) * 2**20)
+INTERVAL_PENJAGA = 30.0
+DIR_TUMPAH = Path(os.environ.get("DASHBOARD_SESI_TUMPAH") or Path(tempfile.gettempdir()) / "dashboard_sesi")
+
+KUNCI_BUANG = ("analitik", "proyeksi", "laporan", "captcha_bytes", "basis_skenario")
+KUNCI_TUMPAH = ("df", "session", "user_info", "log_history", "success_history")
+KUNCI_BUANG_TAMU = ("session", "captcha_bytes")
+PENANDA = "_sesi_tumpah"  # ada di session_state selama isinya di berkas
+
+_penjaga = None
+_kunci_penjaga = threading.Lock()
+
+
+def _dir_proses():
+    # Satu subfolder per proses server; folder proses yang sudah mati dibersihkan saat penjaga mulai
+    return DIR_TUMPAH / str(os.getpid())
+
+
+def _path_tumpahan(session_id):
+    return _dir_proses() / f"{session_id}.pkl"
+
+
+def _tulis_tumpahan(path, isi):
+    paket = {}
+    for kunci, nilai in isi.items():
+        if isinstance(nilai, pd.DataFrame):
+            try:
+                paket[kunci] = ("parquet", nilai.to_parquet())
+                continue
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                pass  # kolom campuran: disimpan apa adanya
+        paket[kunci] = ("pickle", nilai)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sementara = path.with_suffix(".tmp")
+    sementara.write_bytes(pickle.dumps(paket, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(sementara, path)
+
+
+def _baca_tumpahan(path):
+    paket = pickle.loads(Path(path).read_bytes())
+    return {
+        kunci: pd.read_parquet(io.BytesIO(data)) if jenis == "parquet" else data
+        for kunci, (jenis, data) in paket.items()
+    }
+
+
+_ATRIBUT_APP = ("session_state", "_state", "_scriptrunner", "_event_loop")
+
+
+def fitur_runtime_hilang():
+    """Bagian internal Streamlit yang dibutuhkan penjaga tetapi tidak ada, atau None jika lengkap."""
+    if AppSessionState is None:
+        return "streamlit.runtime.app_session.AppSessionState"
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return None  # runtime belum berjalan: putaran ini dilewati
+    sesi_mgr = getattr(Runtime.instance(), "_session_mgr", None)
+    if not hasattr(sesi_mgr, "list_active_sessions"):
+        return "Runtime._session_mgr.list_active_sessions"
+    for aktif in sesi_mgr.list_active_sessions():
+        hilang = [a for a in _ATRIBUT_APP if not hasattr(getattr(aktif, "session", None), a)]
+        if hilang:
+            return ", ".join(f"AppSession.{a}" for a in hilang)
+    return None
+
+
+def _saat_diam(app, fungsi):
+    """
+    fungsi(state) dijalankan di event loop sesi, hanya jika sesi tidak punya
+    ScriptRunner; None jika sesi sedang (atau akan) menjalankan skrip.
+    """
+    async def tugas():
+        if app._scriptrunner is not None or app._state == AppSessionState.APP_IS_RUNNING:
+            return None
+        return fungsi(app.session_state)
+
+    return asyncio.run_coroutine_threadsafe(tugas(), app._event_loop).result(timeout=30)
+
+
+def _ambil_isi(state):
+    if PENANDA in state:
+        return None
+    login = "logged_in" in state and bool(state["logged_in"])
+    isi = {k: state[k] for k in KUNCI_TUMPAH if k in state and state[k] is not None} if login else {}
+    return login, isi
+
+
+def _lepaskan(state, login, isi, path):
+    """Membuang objek yang digusur dari state; None jika isinya berubah sejak diambil."""
+    if PENANDA in state or ("logged_in" in state and bool(state["logged_in"])) != login:
+        return None
+    if any(k not in state or state[k] is not v for k, v in isi.items()):
+        return None
+    buang = (KUNCI_BUANG + tuple(isi)) if login else KUNCI_BUANG_TAMU
+    dilepas = {k: state[k] for k in buang if k in state}
+    for kunci in dilepas:
+        del state[kunci]
+    if isi:
+        state[PENANDA] = str(path)
+    if not login and "login_token" in state:
+        state["login_token"] = ""
+    return dilepas
+
+
+def tumpahkan(session_id, app, terakhir):
+    """
+    Menggusur satu sesi (AppSession dari runtime). Dibatalkan jika sesi aktif
+    lagi sejak `terakhir` atau sedang menjalankan skrip. Mengembalikan
+    perkiraan byte yang dibebaskan.
+    """
+    info = _info(session_id, terakhir)
+    with info["kunci"]:  # pulihkan_sesi() di awal rerun menunggu sampai selesai
+        if info["terakhir"] != terakhir or info["tumpah"]:
+            return 0
+        diambil = _saat_diam(app, _ambil_isi)
+        if diambil is None:
+            return 0
+        login, isi = diambil
+        path = _path_tumpahan(session_id)
+        if isi:
+            _tulis_tumpahan(path, isi)
+        dilepas = _saat_diam(app, lambda state: _lepaskan(state, login, isi, path))
+        if dilepas is None:
+            path.unlink(missing_ok=True)
+            return 0
+        dibebaskan = sum(ukuran_objek(v) for v in dilepas.values())
+        with _kunci:
+            info["tumpah"], info["diukur"] = True, time.time()
+            info["bytes"] = max(0, info["bytes"] - dibebaskan)
+    tambah("dashboard_session_evictions_total", jenis="tumpah")
+    return dibebaskan
+
+
+def tegakkan_anggaran(sekarang=None):
+    """Satu putaran kebijakan penggusuran; mengembalikan jumlah sesi yang digusur."""
+    runtime = _sesi_runtime()
+    if runtime is None or fitur_runtime_hilang() is not None:
+        return 0
+    sekarang = sekarang or time.time()
+    hidup = sesi_hidup()
+    total = sum(info["bytes"] for _, info in hidup) + ukuran_backend()
+    digusur = 0
+    for terakhir, sid in sorted((info["terakhir"], sid) for sid, info in hidup if not info["tumpah"]):
+        diam = sekarang - terakhir
+        if diam < DIAM_TUMPAH and (total <= ANGGARAN_PROSES or diam < DIAM_MIN):
+            continue
+        app = runtime.get(sid)
+        if app is None:
+            continue
+        dibebaskan = tumpahkan(sid, app, terakhir)  # dilewati selama skrip berjalan (mis. loop sniper)
+        if dibebaskan:
+            total -= dibebaskan
+            digusur += 1
+    return digusur
+
+
+def _bersihkan_proses_mati():
+    if not DIR_TUMPAH.is_dir():
+        return
+    for folder in DIR_TUMPAH.iterdir():
+        if not folder.name.isdigit() or int(folder.name) == os.getpid():
+            continue
+        try:
+            os.kill(int(folder.name), 0)
+        except ProcessLookupError:
+            shutil.rmtree(folder, ignore_errors=True)
+        except PermissionError:
+            pass  # proses milik pengguna lain masih hidup
+
+
+def _jalankan_penjaga():
+    _bersihkan_proses_mati()
+    while True:
+        time.sleep(INTERVAL_PENJAGA)
+        hilang = fitur_runtime_hilang()
+        if hilang is not None:
+            print(
+                f"penjaga sesi dimatikan: {hilang} tidak ada di streamlit {st.__version__}; sesi diam tidak digusur",
+                file=sys.stderr,
+            )
+            return
+        try:
+            tegakkan_anggaran()
+        except Exception as e:  # penjaga tidak boleh mati karena satu sesi bermasalah
+            print(f"penjaga sesi: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def pulihkan_sesi():
+    """
+    Dipanggil paling awal di setiap rerun (sebelum session_state dibaca):
+    memulihkan objek yang ditumpahkan saat sesi diam, dan memastikan thread
+    penjaga berjalan.
+    """
+    global _penjaga
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    if _penjaga is None:
+        with _kunci_penjaga:
+            if _penjaga is None:
+                _penjaga = threading.Thread(target=_jalankan_penjaga, name="penjaga-sesi", daemon=True)
+                _penjaga.start()
+
+    sekarang = time.time()
+    info = _info(ctx.session_id, sekarang)
+    with info["kunci"]:
+        with _kunci:
+            info["terakhir"], info["tumpah"] = sekarang, False
+        path = st.session_state.get(PENANDA)
+        if path is None:
+            return
+        del st.session_state[PENANDA]
+        try:
+            isi = _baca_tumpahan(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # Berkas hilang: sesi dianggap kedaluwarsa dan kembali ke form login
+            st.session_state.logged_in = False
+            st.session_state.login_error_msg = "Sesi kedaluwarsa, silakan login kembali."
+            return
+        for kunci, nilai in isi.items():
+            st.session_state[kunci] = nilai
+        Path(path).unlink(missing_ok=True)
+    tambah("dashboard_session_evictions_total", jenis="pulih")
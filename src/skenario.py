@@ -0,0 +1,121 @@
+
+__author__ = "irr"
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from analitik import NILAI_RATUS, bagi_ratus
+from keadaan import backend
+
+# ==============================================================================
+# SKENARIO SIMULASI (DELTA TERHADAP TRANSKRIP)
+# ==============================================================================
+# Skenario bernama disimpan sebagai delta jarang {Kode MA: nilai simulasi},
+# hanya MK yang nilainya berbeda dari transkrip. basis_skenario meringkas
+# tabel simulasi sekali (total bobot seperseratus dan SKS, plus kontribusi
+# tiap MK), sehingga IPK satu skenario dihitung dari deltanya saja: biaya
+# sebanding jumlah MK yang diubah, bukan panjang transkrip. Seperti IPK
+# transkrip, yang dihitung adalah nilai terbaik per Kode MA dan baris tanpa
+# nilai diabaikan. Skenario disimpan per NIM di ruang tetap backend state
+# (keadaan.py, tidak digusur dan tidak kedaluwarsa), paling banyak
+# MAKS_SKENARIO per mahasiswa. Tanpa NIM tidak ada yang dimuat atau disimpan.
+MAKS_SKENARIO = 20
+
+
+def basis_skenario(df_tabel):
+    """
+    Ringkasan tabel simulasi (kolom Kode MA, SKS, Nilai; posisi = baris ke-):
+    total bobot/SKS transkrip, MK -> (SKS, nilai terbaik), dan Kode MA / nilai per baris.
+    """
+    kode = df_tabel["Kode MA"].astype(str).to_numpy()
+    sks = pd.to_numeric(df_tabel["SKS"], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    nilai = df_tabel["Nilai"].to_numpy(object)
+    bobot = pd.Series(nilai).map(NILAI_RATUS).to_numpy(float) * sks
+
+    ringkas = pd.DataFrame({"kode": kode, "sks": sks, "nilai": nilai, "bobot": bobot})
+    terbaik = ringkas.dropna(subset=["bobot"]).sort_values("bobot", ascending=False, kind="stable")
+    terbaik = terbaik.drop_duplicates(subset="kode")
+    # MK tanpa nilai (mis. sedang diambil) tetap tercatat dengan SKS-nya agar bisa disimulasikan
+    mk = {k: (int(s), None) for k, s in zip(kode, sks)}
+    mk.update({k: (int(s), n) for k, s, n in zip(terbaik["kode"], terbaik["sks"], terbaik["nilai"])})
+    return {
+        "bobot": int(terbaik["bobot"].sum()),
+        "sks": int(terbaik["sks"].sum()),
+        "mk": mk,
+        "kode_baris": kode,
+        "nilai_baris": nilai,
+        "baris_mk": pd.Series(np.arange(len(kode))).groupby(kode).agg(list).to_dict(),
+    }
+
+
+def ipk_skenario(basis, delta):
+    """IPK (dibulatkan resmi) transkrip dengan delta {Kode MA: nilai} diterapkan; O(len(delta))."""
+    bobot, sks = basis["bobot"], basis["sks"]
+    for kode, nilai in delta.items():
+        if kode not in basis["mk"]:
+            continue
+        s, lama = basis["mk"][kode]
+        if lama in NILAI_RATUS:
+            bobot -= s * NILAI_RATUS[lama]
+            sks -= s
+        if nilai in NILAI_RATUS:
+            bobot += s * NILAI_RATUS[nilai]
+            sks += s
+    return bagi_ratus(bobot, sks) / 100
+
+
+def delta_dari_suntingan(basis, baris):
+    """
+    Suntingan grid {posisi: {"Nilai": ...}} -> delta {Kode MA: nilai terbaik}, tanpa MK
+    yang tidak berubah. MK yang muncul di beberapa baris (mengulang) memakai nilai
+    terbaik dari semua barisnya.
+    """
+    tersunting = {}
+    for pos, suntingan in baris.items():
+        if 0 <= pos < len(basis["kode_baris"]) and "Nilai" in suntingan:
+            tersunting[pos] = suntingan["Nilai"]
+    delta = {}
+    for kode in {basis["kode_baris"][pos] for pos in tersunting}:
+        calon = [tersunting.get(pos, basis["nilai_baris"][pos]) for pos in basis["baris_mk"][kode]]
+        calon = [n for n in calon if n in NILAI_RATUS]
+        terbaik = max(calon, key=NILAI_RATUS.get) if calon else None
+        if terbaik != basis["mk"][kode][1]:
+            delta[kode] = terbaik
+    return delta
+
+
+def suntingan_dari_delta(basis, delta):
+    """
+    Kebalikan delta_dari_suntingan: {posisi: {"Nilai": ...}} untuk mengisi grid simulasi.
+    Semua baris MK yang diubah diberi nilai delta agar nilai terbaiknya tepat nilai itu.
+    """
+    return {
+        pos: {"Nilai": delta[kode]}
+        for pos, kode in enumerate(basis["kode_baris"])
+        if kode in delta and delta[kode] != basis["nilai_baris"][pos]
+    }
+
+
+# ==============================================================================
+# PENYIMPANAN PER MAHASISWA
+# ==============================================================================
+def _kunci_skenario(nim):
+    nim = str(nim or "").strip()
+    if not nim:
+        raise ValueError("NIM kosong: skenario tidak dapat dimuat atau disimpan")
+    return f"skenario:{nim}"
+
+
+def muat_skenario(nim):
+    """{nama: delta} tersimpan untuk NIM ({} jika belum ada)."""
+    data = backend().baca_tetap(_kunci_skenario(nim))
+    return json.loads(data) if data else {}
+
+
+def simpan_skenario(nim, skenario):
+    """Menyimpan {nama: delta}; skenario tertua dibuang jika melebihi MAKS_SKENARIO."""
+    skenario = dict(list(skenario.items())[-MAKS_SKENARIO:])
+    backend().tulis_tetap(_kunci_skenario(nim), json.dumps(skenario).encode())
+    return skenario
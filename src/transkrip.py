@@ -0,0 +1,155 @@
+
+__author__ = "irr"
+
+from io import BytesIO
+
+import pandas as pd
+from bs4 import BeautifulSoup
+from openpyxl import Workbook
+
+# Kolom yang menentukan identitas sebuah baris transkrip
+KOLOM_SIDIK = ["Semester", "Kode MA", "Nilai"]
+
+
+def semester_key(semester_str):
+    if not semester_str or "/" not in semester_str:
+        return (0, 0)
+    try:
+        tahun_awal = int(semester_str.split("/")[0].strip())
+    except ValueError:
+        tahun_awal = 0
+    jenis = "Ganjil" if "Ganjil" in semester_str else "Genap"
+    urutan = 0 if jenis == "Ganjil" else 1
+    return (tahun_awal, urutan)
+
+
+def ambil_user_info(tables):
+    """Mengambil Nama Lengkap, NIM dan Program Studi dari tabel info mahasiswa."""
+    user_info = {}
+    info_table = None
+    for table in tables:
+        # Cari tabel yang kemungkinan besar berisi info mahasiswa
+        if "NAMA" in table.get_text().upper() and "NIM" in table.get_text().upper():
+            info_table = table
+            break
+
+    if info_table:
+        rows = info_table.find_all("tr")
+        for row in rows:
+            cols = row.find_all("td")
+            # Loop melalui setiap sel untuk mencari kunci informasi
+            for i, col in enumerate(cols):
+                key = col.get_text(strip=True)
+                # Periksa apakah ini adalah kunci yang kita cari
+                if "Nama" in key and i + 1 < len(cols):
+                    value = cols[i + 1].get_text(strip=True)
+                    # Bersihkan nilai dari karakter ':'
+                    if value.startswith(":"):
+                        value = value[1:].strip()
+                    user_info["Nama Lengkap"] = value
+
+                if "NIM" in key and i + 1 < len(cols):
+                    value = cols[i + 1].get_text(strip=True)
+                    if value.startswith(":"):
+                        value = value[1:].strip()
+                    user_info["NIM"] = value
+
+                if ("Program Studi" in key or "Prodi" in key) and i + 1 < len(cols):
+                    value = cols[i + 1].get_text(strip=True)
+                    if value.startswith(":"):
+                        value = value[1:].strip()
+                    user_info["Program Studi"] = value
+    return user_info
+
+
+def ekstrak_baris_html(html):
+    """
+    Mem-parse halaman transkrip portal menjadi (user_info, header, baris).
+    header bernilai None jika tabel nilai tidak ditemukan.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    tables = soup.find_all("table")
+    user_info = ambil_user_info(tables)
+
+    def table_has_keywords(table, keywords=("SEMESTER", "NAMA MATA AJAR", "NILAI")):
+        text = " ".join(th.get_text(" ", strip=True).upper() for th in table.find_all(["th", "td"])[:10])
+        return any(k in text for k in keywords)
+
+    target_idx = None
+    for i, table in enumerate(tables):
+        if table_has_keywords(table):
+            target_idx = i
+            break
+
+    if target_idx is None:
+        return user_info, None, []
+
+    target = tables[target_idx]
+    rows = target.find_all("tr")
+
+    data = []
+    for row in rows:
+        cols = row.find_all(["th", "td"])
+        text_cols = [c.get_text(" ", strip=True) for c in cols]
+        if any(cell.strip() for cell in text_cols):
+            data.append(text_cols)
+
+    return user_info, data[0], data[1:]
+
+
+def bangun_dataframe(header, data_rows):
+    """Mengurutkan baris per semester lalu membangun DataFrame transkrip."""
+    data_rows = sorted(data_rows, key=lambda r: semester_key(r[0]))
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Transkrip Nilai"
+    ws.append(header)
+    for row in data_rows[3:]:
+        ws.append(row)
+
+    excel_buffer = BytesIO()
+    wb.save(excel_buffer)
+    excel_buffer.seek(0)
+
+    return pd.read_excel(excel_buffer)
+
+
+def parse_transkrip_html(html):
+    """
+    Mengubah halaman transkrip portal menjadi (user_info, DataFrame).
+    DataFrame bernilai None jika tabel nilai tidak ditemukan.
+    """
+    user_info, header, data_rows = ekstrak_baris_html(html)
+    if header is None:
+        return user_info, None
+    return user_info, bangun_dataframe(header, data_rows)
+
+
+# ==============================================================================
+# SIDIK BARIS & PERBANDINGAN TRANSKRIP
+# ==============================================================================
+def sidik_baris(df):
+    """
+    Sidik (hash uint64) per baris dari Semester, Kode MA dan Nilai.
+    Baris kembar diberi nomor urut agar setiap sidik tetap unik.
+    """
+    kunci = df[KOLOM_SIDIK].astype(str)
+    kunci["urutan"] = kunci.groupby(KOLOM_SIDIK).cumcount()
+    return pd.util.hash_pandas_object(kunci, index=False)
+
+
+def bandingkan_transkrip(lama, baru):
+    """
+    Membandingkan dua transkrip yang sudah berindeks sidik.
+    Mengembalikan dict berisi baris yang ditambah, sidik yang dihapus,
+    serta semester dan nama mata kuliah yang terdampak.
+    """
+    ditambah = baru[~baru.index.isin(lama.index)]
+    dihapus = lama[~lama.index.isin(baru.index)]
+    return {
+        "ditambah": ditambah,
+        "dihapus": dihapus.index,
+        "semester": set(ditambah["Semester"]) | set(dihapus["Semester"]),
+        "mata_kuliah": set(ditambah["Nama Mata Ajar"]) | set(dihapus["Nama Mata Ajar"]),
+    }